@@ -5,18 +5,28 @@ Format Converter 2.1 - Design épuré style Apple
 Interface minimaliste avec couleurs sobres
 """
 
+import time
+# Début du chargement du module : référence des mesures de démarrage
+_IMPORT_START = time.perf_counter()
+
 import customtkinter as ctk
-from tkinter import filedialog, messagebox, Menu
+from tkinter import filedialog, messagebox
 import subprocess
 import os
-import shutil
+import sys
 import json
 from pathlib import Path
-from PIL import Image, ImageTk, ImageDraw, ImageFilter
 import threading
-from datetime import datetime
+import queue
 from typing import List, Dict, Optional, Callable
 
+# Pillow, pypdf et les outils PDF ne sont chargés qu'au premier usage
+from converter import ConversionOptions, ConversionScheduler, convert_file, output_path_for, parse_renditions
+from metrics import JOB_STAGE, MetricsCollector
+from history import ConversionHistory
+from thumbnails import ThumbnailLoader
+from file_queue import FileQueue, FileEntry, DONE, ERROR
+
 # === THÈME PERSONNALISÉ ===
 class Theme:
     """Palette de couleurs sobre et élégante"""
@@ -49,50 +59,6 @@ class Theme:
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-HISTORY_FILE = Path.home() / ".format_converter_history.json"
-
-
-class ConversionOptions:
-    """Options de conversion"""
-    def __init__(self):
-        self.quality = 85
-        self.resize_width = None
-        self.resize_height = None
-        self.keep_aspect_ratio = True
-        self.bitrate_audio = "256k"
-        self.prefix = ""
-        self.suffix = ""
-
-
-class ConversionHistory:
-    """Gestionnaire d'historique"""
-    
-    @staticmethod
-    def load() -> List[Dict]:
-        if HISTORY_FILE.exists():
-            try:
-                return json.load(open(HISTORY_FILE, 'r'))
-            except:
-                return []
-        return []
-    
-    @staticmethod
-    def save(history: List[Dict]):
-        json.dump(history[-50:], open(HISTORY_FILE, 'w'), indent=2, default=str)
-    
-    @staticmethod
-    def add(input_file: str, output_file: str, format_out: str, success: bool):
-        history = ConversionHistory.load()
-        history.append({
-            "timestamp": datetime.now().isoformat(),
-            "input": input_file,
-            "output": output_file,
-            "format": format_out,
-            "success": success
-        })
-        ConversionHistory.save(history)
-
-
 # === COMPOSANTS UI PERSONNALISÉS ===
 
 class SidebarButton(ctk.CTkButton):
@@ -142,11 +108,12 @@ class SidebarButton(ctk.CTkButton):
 
 
 class FileItem(ctk.CTkFrame):
-    """Item de fichier avec design épuré"""
+    """Item de fichier avec design épuré (réutilisé d'une ligne à l'autre)"""
     
-    def __init__(self, master, filepath: str, on_remove: Callable, on_select: Callable, **kwargs):
+    def __init__(self, master, on_remove: Callable, on_select: Callable,
+                 on_scroll: Optional[Callable] = None, **kwargs):
         super().__init__(master, **kwargs)
-        self.filepath = filepath
+        self.filepath: Optional[str] = None
         self.selected = False
         
         self.configure(
@@ -158,59 +125,44 @@ class FileItem(ctk.CTkFrame):
         )
         self.pack_propagate(False)
         
-        path = Path(filepath)
-        
         # Container interne
         inner = ctk.CTkFrame(self, fg_color="transparent")
         inner.pack(fill="both", expand=True, padx=16, pady=14)
         
         # Icône avec fond coloré
-        icon_frame = ctk.CTkFrame(
+        self.icon_frame = ctk.CTkFrame(
             inner,
-            fg_color=self._get_icon_bg(path.suffix.lower()),
+            fg_color=self._get_icon_bg(""),
             corner_radius=10,
             width=42,
             height=42
         )
-        icon_frame.pack(side="left")
-        icon_frame.pack_propagate(False)
+        self.icon_frame.pack(side="left")
+        self.icon_frame.pack_propagate(False)
         
-        icon_label = ctk.CTkLabel(
-            icon_frame,
-            text=self._get_icon(path.suffix.lower()),
+        self.icon_label = ctk.CTkLabel(
+            self.icon_frame,
+            text=self._get_icon(""),
             font=ctk.CTkFont(size=18)
         )
-        icon_label.place(relx=0.5, rely=0.5, anchor="center")
+        self.icon_label.place(relx=0.5, rely=0.5, anchor="center")
         
         # Infos fichier
         info = ctk.CTkFrame(inner, fg_color="transparent")
         info.pack(side="left", fill="both", expand=True, padx=14)
         
-        # Nom (tronqué si nécessaire)
-        name = path.name
-        if len(name) > 32:
-            name = name[:29] + "..."
-        
         self.name_label = ctk.CTkLabel(
             info,
-            text=name,
+            text="",
             font=ctk.CTkFont(size=14, weight="bold"),
             text_color=Theme.TEXT_PRIMARY,
             anchor="w"
         )
         self.name_label.pack(anchor="w")
         
-        # Taille + extension
-        try:
-            size = self._format_size(path.stat().st_size)
-            ext = path.suffix.upper()[1:] if path.suffix else "FILE"
-            subtitle = f"{ext} • {size}"
-        except:
-            subtitle = path.suffix.upper()[1:] if path.suffix else "FILE"
-        
         self.size_label = ctk.CTkLabel(
             info,
-            text=subtitle,
+            text="",
             font=ctk.CTkFont(size=12),
             text_color=Theme.TEXT_SECONDARY,
             anchor="w"
@@ -228,15 +180,40 @@ class FileItem(ctk.CTkFrame):
             hover_color=("#FFEBEE", "#3D1F1F"),
             text_color=Theme.TEXT_TERTIARY,
             font=ctk.CTkFont(size=14),
-            command=lambda: on_remove(filepath)
+            command=lambda: self.filepath and on_remove(self.filepath)
         )
         self.remove_btn.pack(side="right", padx=(8, 0))
         
         # Bindings
         for widget in [self, inner, info, self.name_label, self.size_label]:
-            widget.bind("<Button-1>", lambda e: on_select(filepath))
+            widget.bind("<Button-1>", lambda e: self.filepath and on_select(self.filepath))
             widget.bind("<Enter>", self._on_hover)
             widget.bind("<Leave>", self._on_leave)
+            if on_scroll:
+                for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                    widget.bind(sequence, on_scroll)
+    
+    def show_row(self, row: FileEntry, selected: bool):
+        """Afficher une ligne du modèle (ne touche que ce qui change)"""
+        if row.path != self.filepath:
+            self.filepath = row.path
+            
+            # Nom (tronqué si nécessaire)
+            name = os.path.basename(row.path)
+            if len(name) > 32:
+                name = name[:29] + "..."
+            self.name_label.configure(text=name)
+            
+            # Taille + extension
+            ext = row.ext.upper()[1:] if row.ext else "FILE"
+            size = row.get_size()
+            self.size_label.configure(text=f"{ext} • {self._format_size(size)}" if size is not None else ext)
+            
+            self.icon_frame.configure(fg_color=self._get_icon_bg(row.ext))
+            self.icon_label.configure(text=self._get_icon(row.ext))
+        
+        if selected != self.selected:
+            self.set_selected(selected)
     
     def _on_hover(self, event):
         self.configure(border_color=Theme.ACCENT)
@@ -295,6 +272,121 @@ class FileItem(ctk.CTkFrame):
         return f"{size:.1f} To"
 
 
+class VirtualFileList(ctk.CTkFrame):
+    """Liste de fichiers virtualisée
+    
+    Seules les lignes visibles ont un FileItem ; au défilement, les mêmes
+    widgets sont réaffectés aux lignes suivantes du modèle.
+    """
+    
+    ROW_HEIGHT = 74  # FileItem (68) + marges
+    
+    def __init__(self, master, model: FileQueue, on_remove: Callable, on_select: Callable, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_remove = on_remove
+        self.on_select = on_select
+        self.rows = model
+        self.selected: Optional[str] = None
+        self.first = 0
+        self.items: List[FileItem] = []
+        
+        self.area = ctk.CTkFrame(self, fg_color="transparent")
+        self.area.pack(side="left", fill="both", expand=True, pady=8)
+        self.area.pack_propagate(False)
+        
+        self.scrollbar = ctk.CTkScrollbar(
+            self,
+            command=self._on_scrollbar,
+            button_color=Theme.BORDER,
+            button_hover_color=Theme.TEXT_TERTIARY
+        )
+        self.scrollbar.pack(side="right", fill="y", padx=(0, 4), pady=12)
+        
+        self.empty_label = ctk.CTkLabel(
+            self.area,
+            text="Aucun fichier sélectionné",
+            font=ctk.CTkFont(size=14),
+            text_color=Theme.TEXT_TERTIARY
+        )
+        
+        self.area.bind("<Configure>", lambda e: self.refresh())
+        for widget in [self.area, self.empty_label]:
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                widget.bind(sequence, self._on_wheel)
+        
+        self.refresh()
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+    
+    def select(self, path: Optional[str]):
+        self.selected = path
+        self.refresh()
+    
+    # === AFFICHAGE ===
+    
+    def _row_height(self) -> int:
+        return int(self._apply_widget_scaling(self.ROW_HEIGHT))
+    
+    def _fully_visible(self) -> int:
+        return max(1, self.area.winfo_height() // self._row_height())
+    
+    def refresh(self):
+        """Réaffecter les widgets visibles aux lignes à partir de self.first
+        
+        À appeler une fois après toute modification du modèle.
+        """
+        full = self._fully_visible()
+        n_visible = full + 1  # + la ligne partiellement visible
+        self.first = max(0, min(self.first, len(self.rows) - full))
+        
+        # Créer les widgets manquants (jamais plus que l'écran n'en montre)
+        while len(self.items) < n_visible:
+            self.items.append(FileItem(
+                self.area,
+                on_remove=self.on_remove,
+                on_select=self.on_select,
+                on_scroll=self._on_wheel
+            ))
+        
+        for i, item in enumerate(self.items):
+            index = self.first + i
+            if i < n_visible and index < len(self.rows):
+                row = self.rows[index]
+                item.show_row(row, row.path == self.selected)
+                if not item.winfo_manager():
+                    item.pack(fill="x", pady=3, padx=6)
+            elif item.winfo_manager():
+                item.pack_forget()
+        
+        if self.rows:
+            self.empty_label.place_forget()
+            total = len(self.rows)
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + full) / total))
+        else:
+            self.empty_label.place(relx=0.5, rely=0.5, anchor="center")
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll_to(self, first: int):
+        first = max(0, min(first, len(self.rows) - self._fully_visible()))
+        if first != self.first:
+            self.first = first
+            self.refresh()
+    
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first - 1)
+        else:
+            self.scroll_to(self.first + 1)
+    
+    def _on_scrollbar(self, action: str, value, unit: Optional[str] = None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif action == "scroll":
+            step = self._fully_visible() if unit == "pages" else 1
+            self.scroll_to(self.first + int(value) * step)
+
+
 class PreviewCard(ctk.CTkFrame):
     """Carte de prévisualisation élégante"""
     
@@ -307,6 +399,11 @@ class PreviewCard(ctk.CTkFrame):
             border_color=Theme.BORDER_LIGHT
         )
         
+        # Miniatures générées hors du thread de l'interface
+        self.thumbnails = ThumbnailLoader()
+        self.current_path: Optional[str] = None
+        self._polling = False
+        
         # Header
         header = ctk.CTkFrame(self, fg_color="transparent", height=40)
         header.pack(fill="x", padx=16, pady=(12, 0))
@@ -362,6 +459,7 @@ class PreviewCard(ctk.CTkFrame):
         """Afficher l'aperçu d'un fichier"""
         path = Path(filepath)
         ext = path.suffix.lower()
+        self.current_path = filepath
         
         self.filename_label.configure(text=path.name[:30] + ("..." if len(path.name) > 30 else ""))
         
@@ -380,20 +478,50 @@ class PreviewCard(ctk.CTkFrame):
             self._show_icon(ext)
     
     def _show_image(self, filepath: str):
+        entry = self.thumbnails.cached(filepath)
+        if entry is not None:
+            self._display_thumbnail(filepath, *entry)
+            return
+        
+        self.preview_content.configure(image=None, text="Chargement...", font=ctk.CTkFont(size=12))
+        self.thumbnails.request(filepath)
+        if not self._polling:
+            self._polling = True
+            self.after(20, self._poll_thumbnails)
+    
+    def _poll_thumbnails(self):
+        """Récupérer les miniatures prêtes (thread de l'interface)"""
+        while True:
+            try:
+                filepath, thumb, dimensions = self.thumbnails.results.get_nowait()
+            except queue.Empty:
+                break
+            # Ignorer les résultats d'un fichier qui n'est plus sélectionné
+            if filepath == self.current_path:
+                self._display_thumbnail(filepath, thumb, dimensions)
+        
+        if self.current_path and self.preview_content.cget("text") == "Chargement...":
+            self.after(20, self._poll_thumbnails)
+        else:
+            self._polling = False
+    
+    def _display_thumbnail(self, filepath: str, thumb, dimensions):
+        if thumb is None:
+            self._show_icon(Path(filepath).suffix.lower())
+            return
+        
+        self.current_image = ctk.CTkImage(light_image=thumb, dark_image=thumb, size=thumb.size)
+        self.preview_content.configure(image=self.current_image, text="")
+        
         try:
-            img = Image.open(filepath)
-            # Resize pour aperçu
-            img.thumbnail((200, 140), Image.Resampling.LANCZOS)
-            self.current_image = ctk.CTkImage(light_image=img, dark_image=img, size=img.size)
-            self.preview_content.configure(image=self.current_image, text="")
-            
-            # Dimensions originales
-            orig = Image.open(filepath)
-            self.details_label.configure(
-                text=f"{orig.width} × {orig.height} px • {self._format_size(Path(filepath).stat().st_size)}"
-            )
+            size = self._format_size(Path(filepath).stat().st_size)
+            self.details_label.configure(text=f"{dimensions[0]} × {dimensions[1]} px • {size}")
         except:
-            self._show_icon(Path(filepath).suffix.lower())
+            pass
+    
+    def prefetch(self, filepaths: List[str]):
+        """Préparer en arrière-plan les miniatures des fichiers ajoutés"""
+        self.thumbnails.prefetch(filepaths)
     
     def _show_text(self, filepath: str):
         try:
@@ -413,6 +541,7 @@ class PreviewCard(ctk.CTkFrame):
         self.preview_content.configure(image=None, text=icon, font=ctk.CTkFont(size=48))
     
     def clear(self):
+        self.current_path = None
         self.preview_content.configure(image=None, text="Sélectionnez un fichier", font=ctk.CTkFont(size=12))
         self.filename_label.configure(text="")
         self.details_label.configure(text="")
@@ -440,6 +569,14 @@ class OptionsCard(ctk.CTkFrame):
         )
         self.options = ConversionOptions()
         
+        # Variables des options propres à certains formats : get_options()
+        # ne dépend pas des lignes déjà construites
+        self.bitrate_var = ctk.StringVar(value="256k")
+        self.compression_var = ctk.StringVar(value="Normale")
+        self.merge_pdf_var = ctk.BooleanVar(value=False)
+        # Saisie des déclinaisons (CTkEntry n'affiche pas d'indication avec une textvariable)
+        self.renditions_entry: Optional[ctk.CTkEntry] = None
+        
         # Header
         header = ctk.CTkFrame(self, fg_color="transparent", height=40)
         header.pack(fill="x", padx=16, pady=(12, 0))
@@ -452,19 +589,40 @@ class OptionsCard(ctk.CTkFrame):
         ).pack(side="left")
         
         # Contenu
-        content = ctk.CTkFrame(self, fg_color="transparent")
-        content.pack(fill="x", padx=16, pady=12)
+        self.content = ctk.CTkFrame(self, fg_color="transparent")
+        self.content.pack(fill="x", padx=16, pady=12)
         
         # Qualité
-        self._create_option_row(content, "Qualité", self._create_quality_control)
+        self._create_option_row(self.content, "Qualité", self._create_quality_control)
         
         # Resize
-        self._create_option_row(content, "Taille", self._create_resize_control)
-        
-        # Bitrate
-        self._create_option_row(content, "Bitrate", self._create_bitrate_control)
+        self._create_option_row(self.content, "Taille", self._create_resize_control)
+        
+        # Conversions simultanées
+        self.workers_row = self._create_option_row(self.content, "Parallèle", self._create_workers_control)
+        
+        # Lignes propres à certains formats (libellé, formats, contrôle) :
+        # construites au premier choix d'un de ces formats, masquées sinon
+        self.format_rows = [
+            ("Bitrate", ("mp3", "aac", "m4a"), self._create_bitrate_control),
+            ("ZIP", ("zip",), self._create_compression_control),
+            ("PDF", ("pdf",), self._create_merge_pdf_control),
+            ("Tailles", ("png", "jpg", "webp"), self._create_renditions_control),
+        ]
+        self._rows: Dict[str, ctk.CTkFrame] = {}
+    
+    def show_for(self, fmt: str):
+        """Afficher les options du format choisi"""
+        for label, formats, control_factory in self.format_rows:
+            row = self._rows.get(label)
+            if fmt in formats:
+                if row is None:
+                    row = self._rows[label] = self._create_option_row(self.content, label, control_factory)
+                row.pack(fill="x", pady=6, before=self.workers_row)
+            elif row is not None:
+                row.pack_forget()
     
-    def _create_option_row(self, parent, label: str, control_factory):
+    def _create_option_row(self, parent, label: str, control_factory) -> ctk.CTkFrame:
         row = ctk.CTkFrame(parent, fg_color="transparent", height=36)
         row.pack(fill="x", pady=6)
         
@@ -478,6 +636,7 @@ class OptionsCard(ctk.CTkFrame):
         ).pack(side="left")
         
         control_factory(row)
+        return row
     
     def _create_quality_control(self, parent):
         frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -525,8 +684,6 @@ class OptionsCard(ctk.CTkFrame):
         menu.pack(side="right")
     
     def _create_bitrate_control(self, parent):
-        self.bitrate_var = ctk.StringVar(value="256k")
-        
         menu = ctk.CTkOptionMenu(
             parent,
             values=["128k", "192k", "256k", "320k"],
@@ -542,6 +699,69 @@ class OptionsCard(ctk.CTkFrame):
         )
         menu.pack(side="right")
     
+    # Niveaux zlib proposés pour les archives ZIP
+    COMPRESSION_LEVELS = {"Aucune": 0, "Rapide": 1, "Normale": 6, "Maximale": 9}
+    
+    def _create_compression_control(self, parent):
+        menu = ctk.CTkOptionMenu(
+            parent,
+            values=list(self.COMPRESSION_LEVELS),
+            variable=self.compression_var,
+            width=100,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color=Theme.BG_TERTIARY,
+            button_color=Theme.BG_TERTIARY,
+            button_hover_color=Theme.BORDER,
+            dropdown_fg_color=Theme.BG_SECONDARY,
+            corner_radius=6
+        )
+        menu.pack(side="right")
+    
+    def _create_merge_pdf_control(self, parent):
+        ctk.CTkSwitch(
+            parent,
+            text="Un seul fichier",
+            variable=self.merge_pdf_var,
+            font=ctk.CTkFont(size=12),
+            text_color=Theme.TEXT_PRIMARY,
+            progress_color=Theme.ACCENT[1],
+            switch_width=36,
+            switch_height=18
+        ).pack(side="right")
+    
+    def _create_renditions_control(self, parent):
+        # Vide : une seule sortie ; sinon une par taille (grand côté), ex. 2048, 1024:jpg, 256
+        self.renditions_entry = ctk.CTkEntry(
+            parent,
+            placeholder_text="2048, 1024:jpg, 256",
+            width=160,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color=Theme.BG_TERTIARY,
+            border_color=Theme.BORDER,
+            corner_radius=6
+        )
+        self.renditions_entry.pack(side="right")
+    
+    def _create_workers_control(self, parent):
+        self.workers_var = ctk.StringVar(value="Auto")
+        
+        menu = ctk.CTkOptionMenu(
+            parent,
+            values=["Auto", "1", "2", "4", "8"],
+            variable=self.workers_var,
+            width=80,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color=Theme.BG_TERTIARY,
+            button_color=Theme.BG_TERTIARY,
+            button_hover_color=Theme.BORDER,
+            dropdown_fg_color=Theme.BG_SECONDARY,
+            corner_radius=6
+        )
+        menu.pack(side="right")
+    
     def _on_quality_change(self, value):
         self.quality_label.configure(text=f"{int(value)}%")
         self.options.quality = int(value)
@@ -549,6 +769,11 @@ class OptionsCard(ctk.CTkFrame):
     def get_options(self) -> ConversionOptions:
         self.options.quality = int(self.quality_slider.get())
         self.options.bitrate_audio = self.bitrate_var.get()
+        self.options.compression_level = self.COMPRESSION_LEVELS[self.compression_var.get()]
+        self.options.merge_pdf = self.merge_pdf_var.get()
+        # ValueError si la saisie est invalide (signalée par _convert)
+        spec = self.renditions_entry.get() if self.renditions_entry is not None else ""
+        self.options.renditions = parse_renditions(spec)
         
         resize = self.resize_var.get()
         if resize != "Original" and "×" in resize:
@@ -560,6 +785,11 @@ class OptionsCard(ctk.CTkFrame):
             self.options.resize_height = None
         
         return self.options
+    
+    def get_workers(self) -> Optional[int]:
+        """Nombre de conversions simultanées (None = un par cœur)"""
+        value = self.workers_var.get()
+        return int(value) if value.isdigit() else None
 
 
 class ProgressModal(ctk.CTkToplevel):
@@ -575,6 +805,9 @@ class ProgressModal(ctk.CTkToplevel):
         
         self.total = total
         self.cancelled = False
+        self.done = 0
+        # Fraction déjà encodée des fichiers en cours
+        self.partial: Dict[str, float] = {}
         
         # Centrer
         self.transient(master)
@@ -647,10 +880,28 @@ class ProgressModal(ctk.CTkToplevel):
         )
         self.cancel_btn.pack(pady=(20, 0))
     
-    def update_progress(self, current: int, filename: str):
-        progress = current / self.total
+    def update_progress(self, current: Optional[int], filename: str, fraction: Optional[float] = None,
+                        speed: Optional[float] = None, eta: Optional[float] = None):
+        """Avancement global ; fraction/speed/eta pour un fichier en cours (ffmpeg)
+        
+        current : nombre de fichiers terminés (None = inchangé).
+        """
+        if current is not None:
+            self.done = current
+            self.partial.pop(filename, None)
+        elif fraction is not None:
+            self.partial[filename] = fraction
+        
+        progress = min(1.0, (self.done + sum(self.partial.values())) / self.total)
         self.progress.set(progress)
-        self.percent_label.configure(text=f"{int(progress * 100)}%")
+        
+        details = f"{int(progress * 100)}%"
+        if speed:
+            details += f" • {speed:.1f}×"
+        if eta is not None and current is None:
+            minutes, seconds = divmod(int(eta), 60)
+            details += f" • {minutes} min {seconds:02d} s" if minutes else f" • {seconds} s"
+        self.percent_label.configure(text=details)
         self.file_label.configure(text=filename[:40] + ("..." if len(filename) > 40 else ""))
         self.update()
     
@@ -708,11 +959,19 @@ class FormatConverterApp(ctk.CTk):
         self.configure(fg_color=Theme.BG_PRIMARY)
         
         # État
-        self.files: List[str] = []
+        self.files = FileQueue()
         self.selected_format = ctk.StringVar(value="pdf")
         self.output_folder = Path.home() / "Downloads"
-        self.file_items: Dict[str, FileItem] = {}
         self.selected_file: Optional[str] = None
+        # Base d'historique ouverte au premier usage (voir history)
+        self._history: Optional[ConversionHistory] = None
+        self._history_lock = threading.Lock()
+        self._history_window = None
+        self.watcher = None
+        self._watch_thread: Optional[threading.Thread] = None
+        # Mesures du dernier lot ; profilage activé pour le lot suivant
+        self.metrics: Optional[MetricsCollector] = None
+        self.profile_next = ctk.BooleanVar(value=False)
         
         # Raccourcis
         self.bind("<Command-o>", lambda e: self._browse())
@@ -721,6 +980,29 @@ class FormatConverterApp(ctk.CTk):
         
         # Interface
         self._create_layout()
+        
+        # Options du format choisi
+        self.options.show_for(self.selected_format.get())
+        self.selected_format.trace_add("write", lambda *args: self.options.show_for(self.selected_format.get()))
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+    
+    def _on_close(self):
+        """Fermeture : surveillance arrêtée (manifeste fermé), historique écrit"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            # Le thread de surveillance ferme son manifeste en sortant
+            self._watch_thread.join(timeout=5)
+        if self._history is not None:
+            self._history.flush()
+        self.destroy()
+    
+    @property
+    def history(self) -> ConversionHistory:
+        # Conversions et dossiers surveillés y écrivent depuis leurs threads
+        with self._history_lock:
+            if self._history is None:
+                self._history = ConversionHistory()
+            return self._history
     
     def _create_layout(self):
         """Créer le layout principal"""
@@ -807,6 +1089,11 @@ class FormatConverterApp(ctk.CTk):
                 ("ZIP", "zip", ""),
                 ("Extraire", "unzip", ""),
             ]),
+            ("Données (CSV)", [
+                ("JSON", "json", ""),
+                ("XML", "xml", ""),
+                ("YAML", "yaml", ""),
+            ]),
         ]
         
         for category, items in formats:
@@ -958,23 +1245,17 @@ class FormatConverterApp(ctk.CTk):
             command=self._clear
         ).pack(side="right")
         
-        # Liste fichiers
-        self.files_list = ctk.CTkScrollableFrame(
+        # Liste fichiers (virtualisée)
+        self.files_list = VirtualFileList(
             container,
+            model=self.files,
+            on_remove=self._remove_file,
+            on_select=self._select_file,
             fg_color=Theme.BG_TERTIARY,
-            corner_radius=16,
-            scrollbar_button_color=Theme.BORDER
+            corner_radius=16
         )
         self.files_list.pack(fill="both", expand=True, pady=(0, 4))
         
-        self.empty_label = ctk.CTkLabel(
-            self.files_list,
-            text="Aucun fichier sélectionné",
-            font=ctk.CTkFont(size=14),
-            text_color=Theme.TEXT_TERTIARY
-        )
-        self.empty_label.pack(expand=True, pady=70)
-        
         # Bouton convertir
         self.convert_btn = ctk.CTkButton(
             container,
@@ -1018,6 +1299,19 @@ class FormatConverterApp(ctk.CTk):
             text_color=Theme.TEXT_TERTIARY
         ).pack(anchor="w", pady=(0, 8))
         
+        ctk.CTkButton(
+            actions,
+            text="📄  Outils PDF",
+            height=44,
+            corner_radius=10,
+            font=ctk.CTkFont(size=14),
+            fg_color=Theme.BG_TERTIARY,
+            hover_color=Theme.BORDER,
+            text_color=Theme.TEXT_PRIMARY,
+            anchor="w",
+            command=self._show_pdf_tools
+        ).pack(fill="x", pady=4)
+        
         ctk.CTkButton(
             actions,
             text="📋  Historique",
@@ -1031,6 +1325,19 @@ class FormatConverterApp(ctk.CTk):
             command=self._show_history
         ).pack(fill="x", pady=4)
         
+        ctk.CTkButton(
+            actions,
+            text="⏱️  Performances",
+            height=44,
+            corner_radius=10,
+            font=ctk.CTkFont(size=14),
+            fg_color=Theme.BG_TERTIARY,
+            hover_color=Theme.BORDER,
+            text_color=Theme.TEXT_PRIMARY,
+            anchor="w",
+            command=self._show_metrics
+        ).pack(fill="x", pady=4)
+        
         ctk.CTkButton(
             actions,
             text="🔊  Extraire audio",
@@ -1043,6 +1350,20 @@ class FormatConverterApp(ctk.CTk):
             anchor="w",
             command=self._extract_audio
         ).pack(fill="x", pady=4)
+        
+        self.watch_btn = ctk.CTkButton(
+            actions,
+            text="👁  Surveiller un dossier",
+            height=44,
+            corner_radius=10,
+            font=ctk.CTkFont(size=14),
+            fg_color=Theme.BG_TERTIARY,
+            hover_color=Theme.BORDER,
+            text_color=Theme.TEXT_PRIMARY,
+            anchor="w",
+            command=self._toggle_watch
+        )
+        self.watch_btn.pack(fill="x", pady=4)
     
     # === ACTIONS ===
     
@@ -1051,69 +1372,52 @@ class FormatConverterApp(ctk.CTk):
             title="Sélectionner des fichiers",
             filetypes=[
                 ("Tous", "*.*"),
-                ("Documents", "*.pdf *.docx *.txt *.html *.md"),
+                ("Documents", "*.pdf *.docx *.txt *.html *.md *.log"),
+                ("Données", "*.csv"),
                 ("Images", "*.png *.jpg *.jpeg *.gif *.webp *.heic"),
                 ("Audio", "*.mp3 *.wav *.aac *.flac *.m4a"),
                 ("Vidéo", "*.mp4 *.mov *.avi *.mkv"),
             ]
         )
         
-        for f in files:
-            if f not in self.files:
-                self.files.append(f)
-                self._add_file(f)
-        
-        self._update_count()
+        self._add_files(files)
+    
+    def _add_files(self, filepaths: List[str]):
+        """Ajouter des fichiers (doublons ignorés, un seul rafraîchissement)"""
+        added = self.files.add_many(filepaths)
+        if added:
+            self.files_list.refresh()
+            self._update_count()
+            self.preview.prefetch(added)
     
     def _add_file(self, filepath: str):
-        self.empty_label.pack_forget()
-        
-        item = FileItem(
-            self.files_list,
-            filepath=filepath,
-            on_remove=self._remove_file,
-            on_select=self._select_file
-        )
-        item.pack(fill="x", pady=3, padx=6)
-        self.file_items[filepath] = item
+        self._add_files([filepath])
     
-    def _remove_file(self, filepath: str):
-        if filepath in self.files:
-            self.files.remove(filepath)
-        if filepath in self.file_items:
-            self.file_items[filepath].destroy()
-            del self.file_items[filepath]
-        
-        if filepath == self.selected_file:
+    def _remove_files(self, filepaths: List[str]):
+        """Retirer des fichiers (un seul rafraîchissement)"""
+        if not self.files.remove_many(filepaths):
+            return
+        if self.selected_file and self.selected_file not in self.files:
             self.selected_file = None
+            self.files_list.select(None)
             self.preview.clear()
-        
+        self.files_list.refresh()
         self._update_count()
-        
-        if not self.files:
-            self.empty_label.pack(expand=True, pady=60)
+    
+    def _remove_file(self, filepath: str):
+        self._remove_files([filepath])
     
     def _select_file(self, filepath: str):
-        # Désélectionner l'ancien
-        if self.selected_file and self.selected_file in self.file_items:
-            self.file_items[self.selected_file].set_selected(False)
-        
-        # Sélectionner le nouveau
         self.selected_file = filepath
-        if filepath in self.file_items:
-            self.file_items[filepath].set_selected(True)
-        
+        self.files_list.select(filepath)
         self.preview.show(filepath)
     
     def _clear(self):
-        for item in self.file_items.values():
-            item.destroy()
         self.files.clear()
-        self.file_items.clear()
         self.selected_file = None
+        self.files_list.select(None)
         self.preview.clear()
         self._update_count()
-        self.empty_label.pack(expand=True, pady=60)
     
     def _update_count(self):
         n = len(self.files)
@@ -1129,157 +1433,459 @@ class FormatConverterApp(ctk.CTk):
         if not self.files:
             return
         
+        try:
+            opts = self.options.get_options()
+        except ValueError as e:
+            messagebox.showerror("Tailles", str(e))
+            return
+        
         modal = ProgressModal(self, len(self.files))
-        opts = self.options.get_options()
+        workers = self.options.get_workers()
         fmt = self.selected_format.get()
+        metrics = MetricsCollector(profile=self.profile_next.get())
         
-        thread = threading.Thread(target=self._do_convert, args=(fmt, opts, modal))
+        # FileQueue n'est lue et modifiée que depuis le thread Tk : le worker reçoit une copie des chemins
+        thread = threading.Thread(target=self._do_convert,
+                                  args=(self.files.paths(), fmt, opts, modal, workers, metrics))
         thread.start()
     
-    def _do_convert(self, fmt: str, opts: ConversionOptions, modal: ProgressModal):
-        success = errors = 0
-        
-        for i, filepath in enumerate(self.files):
-            if modal.cancelled:
-                break
-            
-            name = Path(filepath).name
-            self.after(0, lambda idx=i+1, n=name: modal.update_progress(idx, n))
-            
-            try:
-                self._convert_file(filepath, fmt, opts)
-                ConversionHistory.add(filepath, "", fmt, True)
-                success += 1
-            except Exception as e:
-                ConversionHistory.add(filepath, "", fmt, False)
-                errors += 1
+    def _do_convert(self, files: List[str], fmt: str, opts: ConversionOptions, modal: ProgressModal,
+                    workers: Optional[int] = None, metrics: Optional[MetricsCollector] = None):
+        scheduler = ConversionScheduler(self.output_folder, workers=workers, use_cache=True, metrics=metrics)
+        
+        def on_progress(done: int, filepath: str, output: Optional[str], error: Optional[BaseException]):
+            self.history.add(filepath, output or "", fmt, error is None)
+            status = DONE if error is None else ERROR
+            self.after(0, lambda: self.files.mark(filepath, status, output))
+            self.after(0, lambda idx=done, n=Path(filepath).name: modal.update_progress(idx, n))
+        
+        def on_file_progress(filepath: str, fraction: float, speed: Optional[float], eta: Optional[float]):
+            self.after(0, lambda n=Path(filepath).name: modal.update_progress(None, n, fraction, speed, eta))
+        
+        success, errors = scheduler.run(
+            files, fmt, opts,
+            on_progress=on_progress,
+            is_cancelled=lambda: modal.cancelled,
+            on_file_progress=on_file_progress
+        )
+        self.history.flush()
+        self.metrics = metrics
         
         self.after(0, lambda: modal.complete(success, errors))
-        self.after(0, self._clear)
+        # Après les mark() en attente (file des after() dans l'ordre) ; les
+        # fichiers en erreur ou non traités (annulation) restent dans la liste
+        self.after(0, lambda: self._remove_files(self.files.with_status(DONE)))
     
-    def _convert_file(self, input_path: str, fmt: str, opts: ConversionOptions):
+    def _convert_file(self, input_path: str, fmt: str, opts: ConversionOptions) -> str:
         """Convertir un fichier"""
-        path = Path(input_path)
-        ext = path.suffix.lower()[1:]
-        output = self.output_folder / f"{path.stem}.{fmt}"
-        
-        # Éviter conflits
-        c = 1
-        while output.exists():
-            output = self.output_folder / f"{path.stem} ({c}).{fmt}"
-            c += 1
-        
-        # Images
-        if fmt in ["png", "jpg", "jpeg", "gif", "tiff", "webp", "heic"]:
-            img = Image.open(input_path)
-            
-            if opts.resize_width and opts.resize_height:
-                img = img.resize((opts.resize_width, opts.resize_height), Image.Resampling.LANCZOS)
-            
-            if fmt in ["jpg", "jpeg"] and img.mode in ["RGBA", "P"]:
-                img = img.convert("RGB")
-            
-            if fmt == "heic":
-                subprocess.run(["sips", "-s", "format", "heic", input_path, "--out", str(output)],
-                             check=True, capture_output=True)
-            elif fmt in ["jpg", "jpeg"]:
-                img.save(str(output), quality=opts.quality)
-            else:
-                img.save(str(output))
-        
-        # Image → PDF
-        elif fmt == "pdf" and ext in ["png", "jpg", "jpeg", "gif", "tiff", "webp"]:
-            img = Image.open(input_path)
-            if img.mode == "RGBA":
-                img = img.convert("RGB")
-            img.save(str(output), "PDF", resolution=100.0)
-        
-        # Audio
-        elif fmt in ["mp3", "wav", "aac", "flac", "m4a"]:
-            cmd = ["ffmpeg", "-i", input_path, "-y"]
-            if fmt == "mp3":
-                cmd += ["-codec:a", "libmp3lame", "-b:a", opts.bitrate_audio]
-            elif fmt == "wav":
-                cmd += ["-codec:a", "pcm_s16le"]
-            elif fmt in ["aac", "m4a"]:
-                cmd += ["-codec:a", "aac", "-b:a", opts.bitrate_audio]
-            elif fmt == "flac":
-                cmd += ["-codec:a", "flac"]
-            cmd.append(str(output))
-            subprocess.run(cmd, check=True, capture_output=True)
-        
-        # Vidéo
-        elif fmt in ["mp4", "mov", "mkv"]:
-            cmd = ["ffmpeg", "-i", input_path, "-y"]
-            if fmt == "mp4":
-                cmd += ["-codec:v", "libx264", "-preset", "medium", "-crf", "23",
-                       "-codec:a", "aac", "-b:a", "128k"]
-            else:
-                cmd += ["-codec:v", "copy", "-codec:a", "copy"]
-            cmd.append(str(output))
-            subprocess.run(cmd, check=True, capture_output=True)
-        
-        # Archives
-        elif fmt == "zip":
-            subprocess.run(["zip", "-r", str(output), path.name],
-                         cwd=str(path.parent), check=True, capture_output=True)
-        elif fmt == "unzip":
-            out_dir = self.output_folder / path.stem
-            out_dir.mkdir(exist_ok=True)
-            if ext == "zip":
-                subprocess.run(["unzip", "-o", input_path, "-d", str(out_dir)],
-                             check=True, capture_output=True)
-            elif ext in ["tar", "gz"]:
-                subprocess.run(["tar", "-xf", input_path, "-C", str(out_dir)],
-                             check=True, capture_output=True)
-            elif ext == "7z":
-                subprocess.run(["7z", "x", input_path, f"-o{out_dir}"],
-                             check=True, capture_output=True)
-        
-        # Documents
-        elif fmt in ["pdf", "docx", "txt", "html"]:
-            soffice = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
-            if os.path.exists(soffice):
-                subprocess.run([
-                    soffice, "--headless", "--convert-to", fmt,
-                    "--outdir", str(self.output_folder), input_path
-                ], check=True, capture_output=True)
-            elif shutil.which("pandoc"):
-                subprocess.run(["pandoc", input_path, "-o", str(output)],
-                             check=True, capture_output=True)
+        return convert_file(input_path, fmt, opts, self.output_folder)
     
     def _show_history(self):
-        """Afficher l'historique"""
-        win = ctk.CTkToplevel(self)
+        """Afficher l'historique (pages de 50, filtres indexés)
+        
+        La fenêtre est construite au premier affichage ; fermée, elle est
+        seulement masquée et rafraîchie à l'affichage suivant.
+        """
+        if self._history_window is not None and self._history_window.winfo_exists():
+            self._history_window.refresh()
+            self._history_window.deiconify()
+            self._history_window.lift()
+            return
+        
+        win = self._history_window = ctk.CTkToplevel(self)
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)
         win.title("Historique")
-        win.geometry("500x400")
+        win.geometry("560x460")
         win.configure(fg_color=Theme.BG_PRIMARY)
         
-        history = ConversionHistory.load()
+        page_size = 50
+        state = {"before_id": None}
+        
+        # Filtres
+        filters = ctk.CTkFrame(win, fg_color="transparent")
+        filters.pack(fill="x", padx=20, pady=(16, 0))
+        
+        format_var = ctk.StringVar(value="Tous")
+        status_var = ctk.StringVar(value="Tous")
+        
+        count_label = ctk.CTkLabel(filters, text="", font=ctk.CTkFont(size=12),
+                                   text_color=Theme.TEXT_SECONDARY)
+        count_label.pack(side="right")
         
         scroll = ctk.CTkScrollableFrame(win, fg_color="transparent")
-        scroll.pack(fill="both", expand=True, padx=20, pady=20)
+        scroll.pack(fill="both", expand=True, padx=20, pady=(8, 0))
         
-        if not history:
-            ctk.CTkLabel(scroll, text="Aucun historique", text_color=Theme.TEXT_SECONDARY).pack(pady=50)
-            return
+        more_btn = ctk.CTkButton(
+            win,
+            text="Charger plus",
+            height=32,
+            corner_radius=16,
+            font=ctk.CTkFont(size=12),
+            fg_color="transparent",
+            hover_color=Theme.BG_TERTIARY,
+            text_color=Theme.ACCENT,
+            border_width=1,
+            border_color=Theme.ACCENT
+        )
         
-        for item in reversed(history[-20:]):
-            row = ctk.CTkFrame(scroll, fg_color=Theme.BG_CARD, corner_radius=8, height=50)
-            row.pack(fill="x", pady=3)
-            row.pack_propagate(False)
-            
-            inner = ctk.CTkFrame(row, fg_color="transparent")
-            inner.pack(fill="both", expand=True, padx=12, pady=8)
+        def current_filters():
+            fmt = format_var.get()
+            status = status_var.get()
+            return {
+                "format_out": None if fmt == "Tous" else fmt.lower(),
+                "success": {"Réussies": True, "Échecs": False}.get(status)
+            }
+        
+        def load_page():
+            items = self.history.query(limit=page_size, before_id=state["before_id"], **current_filters())
+            for item in items:
+                row = ctk.CTkFrame(scroll, fg_color=Theme.BG_CARD, corner_radius=8, height=50)
+                row.pack(fill="x", pady=3)
+                row.pack_propagate(False)
+                
+                inner = ctk.CTkFrame(row, fg_color="transparent")
+                inner.pack(fill="both", expand=True, padx=12, pady=8)
+                
+                status = "✅" if item.get("success") else "❌"
+                ctk.CTkLabel(inner, text=status, width=24).pack(side="left")
+                
+                name = Path(item.get("input", "")).name[:30]
+                ctk.CTkLabel(inner, text=name, font=ctk.CTkFont(size=12)).pack(side="left", padx=8)
+                
+                fmt = item.get("format", "").upper()
+                ctk.CTkLabel(inner, text=f"→ {fmt}", text_color=Theme.TEXT_SECONDARY).pack(side="right")
+                
+                date = item.get("timestamp", "")[:16].replace("T", " ")
+                ctk.CTkLabel(inner, text=date, font=ctk.CTkFont(size=11),
+                             text_color=Theme.TEXT_TERTIARY).pack(side="right", padx=8)
             
-            status = "✅" if item.get("success") else "❌"
-            ctk.CTkLabel(inner, text=status, width=24).pack(side="left")
+            if items:
+                state["before_id"] = items[-1]["id"]
+            if len(items) == page_size:
+                more_btn.pack(pady=12)
+            else:
+                more_btn.pack_forget()
+        
+        def reload(*args):
+            for child in scroll.winfo_children():
+                child.destroy()
+            state["before_id"] = None
+            total = self.history.count(**current_filters())
+            count_label.configure(text=f"{total} entrée{'s' if total > 1 else ''}")
+            if not total:
+                ctk.CTkLabel(scroll, text="Aucun historique", text_color=Theme.TEXT_SECONDARY).pack(pady=50)
+            load_page()
+        
+        more_btn.configure(command=load_page)
+        
+        menus = []
+        for var, values in [
+            (format_var, ["Tous"] + [f.upper() for f in self.history.formats()]),
+            (status_var, ["Tous", "Réussies", "Échecs"]),
+        ]:
+            menu = ctk.CTkOptionMenu(
+                filters,
+                values=values,
+                variable=var,
+                command=reload,
+                width=110,
+                height=28,
+                font=ctk.CTkFont(size=12),
+                fg_color=Theme.BG_TERTIARY,
+                button_color=Theme.BG_TERTIARY,
+                button_hover_color=Theme.BORDER,
+                dropdown_fg_color=Theme.BG_SECONDARY,
+                corner_radius=6
+            )
+            menu.pack(side="left", padx=(0, 8))
+            menus.append(menu)
+        
+        # Rotation : entrées gardées (réglage conservé dans la base, partagé avec le CLI)
+        def keep_label(count: Optional[int]) -> str:
+            return "Tout garder" if not count else f"{count:,} dernières".replace(",", " ")
+        
+        keep_choices = {keep_label(n): n for n in (None, 1000, 10000, 100000)}
+        
+        def set_keep(label: str):
+            self.history.set_max_entries(keep_choices[label])
+            reload()
+        
+        keep_var = ctk.StringVar()
+        keep_menu = ctk.CTkOptionMenu(
+            filters,
+            variable=keep_var,
+            command=set_keep,
+            width=140,
+            height=28,
+            font=ctk.CTkFont(size=12),
+            fg_color=Theme.BG_TERTIARY,
+            button_color=Theme.BG_TERTIARY,
+            button_hover_color=Theme.BORDER,
+            dropdown_fg_color=Theme.BG_SECONDARY,
+            corner_radius=6
+        )
+        keep_menu.pack(side="left", padx=(0, 8))
+        
+        def show_keep():
+            # Valeur réglée depuis le CLI (--history-max) : ajoutée aux choix
+            current = self.history.max_entries
+            keep_choices.setdefault(keep_label(current), current)
+            keep_menu.configure(values=list(keep_choices))
+            keep_var.set(keep_label(current))
+        
+        def refresh():
+            # De nouveaux formats ont pu apparaître depuis la construction
+            menus[0].configure(values=["Tous"] + [f.upper() for f in self.history.formats()])
+            show_keep()
+            reload()
+        
+        win.refresh = refresh
+        show_keep()
+        reload()
+    
+    def _show_metrics(self):
+        """Durée des étapes du dernier lot, exports et profilage"""
+        win = ctk.CTkToplevel(self)
+        win.title("Performances")
+        win.geometry("560x460")
+        win.configure(fg_color=Theme.BG_PRIMARY)
+        
+        ctk.CTkSwitch(
+            win,
+            text="Profiler le prochain lot (cProfile + tracemalloc)",
+            variable=self.profile_next,
+            font=ctk.CTkFont(size=12),
+            progress_color=Theme.ACCENT
+        ).pack(anchor="w", padx=20, pady=(16, 0))
+        
+        scroll = ctk.CTkScrollableFrame(win, fg_color="transparent")
+        scroll.pack(fill="both", expand=True, padx=20, pady=(8, 0))
+        
+        metrics = self.metrics
+        summary = metrics.summary() if metrics else {}
+        if not summary:
+            ctk.CTkLabel(scroll, text="Aucune conversion mesurée", text_color=Theme.TEXT_SECONDARY).pack(pady=50)
+        
+        # Étapes triées par temps total ; "job" (durée des tâches) en référence
+        job_total = summary.get(JOB_STAGE, {}).get("total") or 0
+        columns = [("Étape", 110), ("Nb", 50), ("Total", 80), ("Moy.", 80), ("p95", 80), ("Mo", 60)]
+        if summary:
+            header = ctk.CTkFrame(scroll, fg_color="transparent")
+            header.pack(fill="x")
+            for title, width in columns:
+                ctk.CTkLabel(header, text=title, width=width, anchor="w", font=ctk.CTkFont(size=11, weight="bold"),
+                             text_color=Theme.TEXT_TERTIARY).pack(side="left")
+        
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+            row = ctk.CTkFrame(scroll, fg_color=Theme.BG_CARD, corner_radius=8, height=34)
+            row.pack(fill="x", pady=2)
+            share = f" {stats['total'] / job_total:.0%}" if job_total and name != JOB_STAGE else ""
+            values = [
+                name, str(stats["count"]), f"{stats['total']:.2f} s{share}",
+                f"{stats['mean'] * 1000:.0f} ms", f"{stats['p95'] * 1000:.0f} ms",
+                f"{stats['bytes'] / (1024 * 1024):.1f}" if stats["bytes"] else "-",
+            ]
+            for value, (_, width) in zip(values, columns):
+                ctk.CTkLabel(row, text=value, width=width, anchor="w", font=ctk.CTkFont(size=12)).pack(side="left")
+        
+        if metrics and metrics.peak_alloc:
+            peak = max(metrics.peak_alloc.values()) / (1024 * 1024)
+            ctk.CTkLabel(scroll, text=f"Pic d'allocation Python (tracemalloc) : {peak:.1f} Mo",
+                         text_color=Theme.TEXT_SECONDARY).pack(anchor="w", pady=(8, 0))
+        
+        # Exports
+        exports = ctk.CTkFrame(win, fg_color="transparent")
+        exports.pack(fill="x", padx=20, pady=12)
+        
+        def export(kind: str, extension: str):
+            output = filedialog.asksaveasfilename(defaultextension=extension, initialdir=str(self.output_folder),
+                                                  initialfile=f"mesures{extension}", parent=win)
+            if not output:
+                return
+            try:
+                if kind == "profile":
+                    metrics.write_profile(output)
+                else:
+                    metrics.export(output, kind)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Erreur", str(e), parent=win)
+        
+        for text, kind, extension in [("JSON", "json", ".json"), ("Prometheus", "prometheus", ".prom"),
+                                      ("Chrome trace", "chrome", ".trace.json"), ("Profil", "profile", ".prof")]:
+            enabled = bool(summary) and (kind != "profile" or metrics.has_profile())
+            ctk.CTkButton(
+                exports,
+                text=text,
+                width=100,
+                height=32,
+                corner_radius=16,
+                font=ctk.CTkFont(size=12),
+                fg_color="transparent",
+                hover_color=Theme.BG_TERTIARY,
+                text_color=Theme.ACCENT,
+                border_width=1,
+                border_color=Theme.ACCENT,
+                state="normal" if enabled else "disabled",
+                command=lambda k=kind, e=extension: export(k, e)
+            ).pack(side="left", padx=(0, 8))
+    
+    def _show_pdf_tools(self):
+        """Fusionner, diviser, compresser des PDF"""
+        from pdf_tools import merge_pdfs, split_pdf, compress_pdf
+        
+        win = ctk.CTkToplevel(self)
+        win.title("Outils PDF")
+        win.geometry("520x440")
+        win.configure(fg_color=Theme.BG_PRIMARY)
+        
+        tabs = ctk.CTkTabview(win, fg_color=Theme.BG_SECONDARY,
+                              segmented_button_selected_color=Theme.ACCENT[1])
+        tabs.pack(fill="both", expand=True, padx=16, pady=16)
+        
+        def button(parent, text, command, primary=False):
+            return ctk.CTkButton(
+                parent,
+                text=text,
+                height=36,
+                corner_radius=18,
+                font=ctk.CTkFont(size=13, weight="bold" if primary else "normal"),
+                fg_color=Theme.ACCENT if primary else "transparent",
+                hover_color=Theme.ACCENT_HOVER if primary else Theme.BG_TERTIARY,
+                text_color="#FFFFFF" if primary else Theme.ACCENT,
+                border_width=0 if primary else 1,
+                border_color=Theme.ACCENT,
+                command=command
+            )
+        
+        def file_list(parent, files: List[str]):
+            box = ctk.CTkTextbox(parent, height=170, font=ctk.CTkFont(size=12), fg_color=Theme.BG_CARD)
+            box.pack(fill="x", pady=(4, 8))
+            box.configure(state="disabled")
             
-            name = Path(item.get("input", "")).name[:30]
-            ctk.CTkLabel(inner, text=name, font=ctk.CTkFont(size=12)).pack(side="left", padx=8)
+            def add():
+                chosen = filedialog.askopenfilenames(filetypes=[("PDF", "*.pdf")])
+                files.extend(f for f in chosen if f not in files)
+                box.configure(state="normal")
+                box.delete("1.0", "end")
+                box.insert("end", "\n".join(Path(f).name for f in files))
+                box.configure(state="disabled")
+            return add
+        
+        def run(task, describe):
+            """Exécuter hors du thread de l'interface, résultat en boîte de dialogue"""
+            def worker():
+                try:
+                    message = describe(task())
+                    self.after(0, lambda: messagebox.showinfo("Outils PDF", message, parent=win))
+                except Exception as e:
+                    self.after(0, lambda e=e: messagebox.showerror("Erreur", str(e), parent=win))
+            threading.Thread(target=worker, daemon=True).start()
+        
+        # Fusionner
+        merge_tab = tabs.add("Fusionner")
+        merge_files: List[str] = []
+        ctk.CTkLabel(merge_tab, text="Fusionner plusieurs PDF en un seul",
+                     text_color=Theme.TEXT_SECONDARY).pack(anchor="w")
+        add_merge = file_list(merge_tab, merge_files)
+        
+        def merge():
+            if len(merge_files) < 2:
+                return
+            output = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF", "*.pdf")],
+                                                  initialdir=str(self.output_folder), parent=win)
+            if output:
+                run(lambda: merge_pdfs(list(merge_files), Path(output)), lambda out: f"PDF fusionné :\n{out}")
+        
+        row = ctk.CTkFrame(merge_tab, fg_color="transparent")
+        row.pack(fill="x")
+        button(row, "Ajouter des PDF", add_merge).pack(side="left")
+        button(row, "Fusionner", merge, primary=True).pack(side="right")
+        
+        # Diviser
+        split_tab = tabs.add("Diviser")
+        split_files: List[str] = []
+        ctk.CTkLabel(split_tab, text="Un fichier par plage (ex. 1-3; 4-10; 11-), ou par page si vide",
+                     text_color=Theme.TEXT_SECONDARY).pack(anchor="w")
+        add_split = file_list(split_tab, split_files)
+        ranges_entry = ctk.CTkEntry(split_tab, placeholder_text="1-3; 4-10; 11-", height=32)
+        ranges_entry.pack(fill="x", pady=(0, 8))
+        
+        def split():
+            if not split_files:
+                return
+            ranges = [r for r in ranges_entry.get().split(";") if r.strip()]
+            workers = self.options.get_workers()
+            run(lambda: [out for f in split_files for out in split_pdf(f, self.output_folder, ranges, workers)],
+                lambda outs: f"{len(outs)} fichier(s) créé(s) dans {self.output_folder.name}")
+        
+        row = ctk.CTkFrame(split_tab, fg_color="transparent")
+        row.pack(fill="x")
+        button(row, "Ajouter des PDF", add_split).pack(side="left")
+        button(row, "Diviser", split, primary=True).pack(side="right")
+        
+        # Compresser
+        compress_tab = tabs.add("Compresser")
+        compress_files: List[str] = []
+        ctk.CTkLabel(compress_tab, text="Réduire les images trop grandes",
+                     text_color=Theme.TEXT_SECONDARY).pack(anchor="w")
+        add_compress = file_list(compress_tab, compress_files)
+        
+        def compress():
+            if not compress_files:
+                return
+            quality = self.options.get_options().quality
+            workers = self.options.get_workers()
             
-            fmt = item.get("format", "").upper()
-            ctk.CTkLabel(inner, text=f"→ {fmt}", text_color=Theme.TEXT_SECONDARY).pack(side="right")
+            def task():
+                reserved = set()
+                before = after = 0
+                for f in compress_files:
+                    output = output_path_for(f, "pdf", self.output_folder, reserved)
+                    old, new = compress_pdf(f, output, quality=quality, workers=workers)
+                    before, after = before + old, after + new
+                return before, after
+            run(task, lambda sizes: f"{sizes[0] // 1024} Ko → {sizes[1] // 1024} Ko")
+        
+        row = ctk.CTkFrame(compress_tab, fg_color="transparent")
+        row.pack(fill="x")
+        button(row, "Ajouter des PDF", add_compress).pack(side="left")
+        button(row, "Compresser", compress, primary=True).pack(side="right")
+    
+    def _toggle_watch(self):
+        """Surveiller un dossier : conversion des fichiers nouveaux ou modifiés"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = self._watch_thread = None
+            self.watch_btn.configure(text="👁  Surveiller un dossier")
+            return
+        
+        folder = filedialog.askdirectory(title="Dossier à surveiller")
+        if not folder:
+            return
+        
+        from watch import FolderWatcher
+        fmt = self.selected_format.get()
+        
+        def on_progress(done: int, filepath: str, output: Optional[str], error: Optional[BaseException]):
+            self.history.add(filepath, output or "", fmt, error is None)
+            self.history.flush()
+        
+        watcher = FolderWatcher(
+            [folder], fmt, self.options.get_options(), self.output_folder,
+            workers=self.options.get_workers(), on_progress=on_progress
+        )
+        
+        def run():
+            # Manifeste fermé une fois la dernière conversion enregistrée
+            try:
+                watcher.run()
+            finally:
+                watcher.manifest.close()
+        
+        self.watcher = watcher
+        self._watch_thread = threading.Thread(target=run, daemon=True)
+        self._watch_thread.start()
+        self.watch_btn.configure(text=f"⏹  Arrêter ({Path(folder).name} → {fmt.upper()})")
     
     def _extract_audio(self):
         """Extraire audio d'une vidéo"""
@@ -1303,9 +1909,32 @@ class FormatConverterApp(ctk.CTk):
             messagebox.showerror("Erreur", str(e))
 
 
+# Budget de démarrage (secondes) : chargement des modules + premier affichage
+STARTUP_BUDGET = 1.5
+
+
 def main():
+    # --startup-check : écrire les temps de démarrage en JSON puis quitter
+    # (code de retour 1 hors budget) ; sinon, simple avertissement si lent
+    check = "--startup-check" in sys.argv[1:]
+    imported = time.perf_counter() - _IMPORT_START
     app = FormatConverterApp()
+    startup = {"import": round(imported, 3), "budget": STARTUP_BUDGET}
+    
+    def first_paint():
+        startup["first_paint"] = round(time.perf_counter() - _IMPORT_START, 3)
+        startup["within_budget"] = startup["first_paint"] <= STARTUP_BUDGET
+        if check:
+            print(json.dumps(startup))
+            app.destroy()
+        elif not startup["within_budget"]:
+            print(f"Démarrage lent : {startup['first_paint']:.2f} s (budget {STARTUP_BUDGET} s)", file=sys.stderr)
+    
+    # Une fois la fenêtre dessinée (tâches d'affichage en attente traitées)
+    app.after_idle(lambda: app.after(0, first_paint))
     app.mainloop()
+    if check and not startup.get("within_budget"):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
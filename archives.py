@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Archives
+Création ZIP (compression parallèle par blocs) et extraction ZIP / TAR en Python, entrée par entrée
+"""
+
+import fnmatch
+import os
+import subprocess
+import sys
+import tarfile
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+# Niveau zlib par défaut (0 = stockage sans compression, 9 = maximum)
+DEFAULT_LEVEL = 6
+# Taille des blocs compressés en parallèle
+BLOCK_SIZE = 1024 * 1024
+# Les blocs compressés sont écrits par des attributs internes de zipfile.ZipFile
+# (fp, start_dir, _didModify, NameToInfo, filelist) : l'API publique ne reçoit
+# pas de données déjà compressées. Versions vérifiées par test_archives :
+# CPython 3.9 à 3.13 ; ailleurs, ZipFile.write() sur un seul cœur
+PARALLEL_DEFLATE = sys.implementation.name == "cpython" and (3, 9) <= sys.version_info[:2] <= (3, 13)
+
+# on_entry(entrées traitées, total, nom de l'entrée)
+EntryCallback = Callable[[int, int, str], None]
+
+
+def _check_cancel(cancel_event: Optional[threading.Event]):
+    if cancel_event is not None and cancel_event.is_set():
+        raise InterruptedError("Conversion annulée")
+
+
+def archive_members(source: Path) -> List[Tuple[Path, str]]:
+    """(fichier ou dossier, nom dans l'archive) pour un fichier ou une arborescence"""
+    source = Path(source)
+    if not source.is_dir():
+        return [(source, source.name)]
+
+    members = [(source, source.name + "/")]
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        base = Path(root)
+        rel = base.relative_to(source.parent).as_posix()
+        for d in dirs:
+            members.append((base / d, f"{rel}/{d}/"))
+        for f in sorted(files):
+            members.append((base / f, f"{rel}/{f}"))
+    return members
+
+
+def _deflate_block(data: bytes, level: int, zdict: Optional[bytes], last: bool) -> bytes:
+    """Compresser un bloc en flux deflate brut, enchaînable au bloc suivant
+
+    Chaque bloc est amorcé avec les 32 Ko qui le précèdent (même taux de
+    compression qu'un flux unique) et terminé par un vidage synchrone :
+    les blocs mis bout à bout forment un seul flux deflate valide.
+    zlib libère le GIL, les blocs se compressent vraiment en parallèle.
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _write_file(zf: zipfile.ZipFile, path: Path, arcname: str, level: int, pool: ThreadPoolExecutor,
+                window_size: int, cancel_event: Optional[threading.Event]):
+    """Ajouter un fichier à l'archive, compressé par blocs sur plusieurs cœurs
+
+    L'en-tête local est écrit d'abord puis réécrit une fois CRC et tailles
+    connus : au plus window_size blocs en mémoire, quelle que soit la
+    taille du fichier. Seulement si PARALLEL_DEFLATE.
+    """
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED if level > 0 else zipfile.ZIP_STORED
+    # Même marge que zipfile : la taille peut encore bouger pendant la lecture
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    zinfo.CRC = zinfo.compress_size = 0
+
+    fp = zf.fp
+    zinfo.header_offset = fp.tell()
+    fp.write(zinfo.FileHeader(zip64))
+    data_start = fp.tell()
+
+    crc = size = 0
+    window: deque = deque()
+    with open(path, "rb") as f:
+        block = f.read(BLOCK_SIZE)
+        zdict = None
+        while True:
+            _check_cancel(cancel_event)
+            following = f.read(BLOCK_SIZE) if block else b""
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            if level > 0:
+                window.append(pool.submit(_deflate_block, block, level, zdict, not following))
+                zdict = block[-32 * 1024:]
+            else:
+                fp.write(block)
+            while len(window) >= window_size or (window and not following):
+                fp.write(window.popleft().result())
+            if not following:
+                break
+            block = following
+
+    end = fp.tell()
+    zinfo.CRC, zinfo.file_size, zinfo.compress_size = crc, size, end - data_start
+    fp.seek(zinfo.header_offset)
+    fp.write(zinfo.FileHeader(zip64))
+    fp.seek(end)
+
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    # Le répertoire central est écrit par ZipFile.close() à partir de start_dir
+    zf.start_dir = end
+    zf._didModify = True
+
+
+def create_zip(sources: Iterable[Path], output: Path, level: int = DEFAULT_LEVEL,
+               workers: Optional[int] = None, on_entry: Optional[EntryCallback] = None,
+               cancel_event: Optional[threading.Event] = None) -> Path:
+    """Créer une archive ZIP en compressant sur plusieurs cœurs
+
+    Les fichiers sont découpés en blocs compressés en parallèle puis
+    écrits dans l'ordre : même un fichier unique profite de tous les
+    cœurs, et la mémoire reste bornée (2 blocs par worker). Sans
+    PARALLEL_DEFLATE, chaque fichier passe par ZipFile.write().
+    """
+    members = [m for source in sources for m in archive_members(Path(source))]
+    level = max(0, min(9, level))
+    workers = max(1, workers or os.cpu_count() or 1)
+    total = len(members)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="deflate") as pool, \
+            zipfile.ZipFile(output, "w", allowZip64=True) as zf:
+        for i, (path, arcname) in enumerate(members, 1):
+            _check_cancel(cancel_event)
+            if arcname.endswith("/"):
+                zf.write(path, arcname)
+            elif not PARALLEL_DEFLATE:
+                zf.write(path, arcname, zipfile.ZIP_DEFLATED if level > 0 else zipfile.ZIP_STORED,
+                         level if level > 0 else None)
+            else:
+                _write_file(zf, path, arcname, level, pool, 2 * workers, cancel_event)
+            if on_entry:
+                on_entry(i, total, arcname)
+
+    return output
+
+
+def _matches(name: str, patterns: Sequence[str]) -> bool:
+    """Filtre glob sur le chemin complet ou le nom seul ('*.jpg', 'photos/*')"""
+    if not patterns:
+        return True
+    base = name.rstrip("/").rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(base, p) for p in patterns)
+
+
+def archive_stem(path: Path) -> str:
+    """Nom de l'archive sans ses extensions ('photos.tar.gz' → 'photos')"""
+    name = path.name
+    for ext in (".tar.gz", ".tar.bz2", ".tar.xz", ".tgz", ".tbz2", ".txz"):
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return path.stem
+
+
+def _extract_zip(archive: Path, out_dir: Path, patterns: Sequence[str],
+                 on_entry: Optional[EntryCallback], cancel_event: Optional[threading.Event]) -> int:
+    with zipfile.ZipFile(archive) as zf:
+        # Seules les entrées retenues sont décompressées
+        members = [info for info in zf.infolist() if _matches(info.filename, patterns)]
+        for i, info in enumerate(members, 1):
+            _check_cancel(cancel_event)
+            zf.extract(info, out_dir)
+            if on_entry:
+                on_entry(i, len(members), info.filename)
+    return len(members)
+
+
+def _safe_member(member: tarfile.TarInfo, out_dir: Path) -> bool:
+    """Refuser les chemins hors du dossier et les fichiers spéciaux"""
+    target = os.path.realpath(os.path.join(out_dir, member.name))
+    if not target.startswith(os.path.realpath(out_dir) + os.sep):
+        return False
+    if member.issym() or member.islnk():
+        # Lien symbolique : relatif à son dossier ; lien physique : à la racine de l'archive
+        base = os.path.dirname(target) if member.issym() else out_dir
+        link = os.path.realpath(os.path.join(base, member.linkname))
+        return link.startswith(os.path.realpath(out_dir) + os.sep)
+    return member.isfile() or member.isdir()
+
+
+def _extract_tar(archive: Path, out_dir: Path, patterns: Sequence[str],
+                 on_entry: Optional[EntryCallback], cancel_event: Optional[threading.Event]) -> int:
+    # Lecture en flux : une seule passe, sans index préalable de l'archive
+    count = 0
+    with tarfile.open(archive, "r|*") as tf:
+        for member in tf:
+            _check_cancel(cancel_event)
+            if not _matches(member.name, patterns) or not _safe_member(member, out_dir):
+                continue
+            if hasattr(tarfile, "data_filter"):
+                tf.extract(member, out_dir, filter="data")
+            else:
+                tf.extract(member, out_dir)
+            count += 1
+            if on_entry:
+                # Total inconnu avant la fin du flux
+                on_entry(count, 0, member.name)
+    return count
+
+
+def extract_archive(archive: Path, out_dir: Path, patterns: Sequence[str] = (),
+                    on_entry: Optional[EntryCallback] = None,
+                    cancel_event: Optional[threading.Event] = None) -> int:
+    """Extraire une archive (ZIP, TAR, TAR.GZ/BZ2/XZ, 7z) ; renvoie le nombre d'entrées
+
+    patterns : globs des entrées à extraire (toutes si vide). Le type est
+    reconnu au contenu, pas à l'extension. 7z passe par le binaire 7z.
+    """
+    archive = Path(archive)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if zipfile.is_zipfile(archive):
+        return _extract_zip(archive, out_dir, patterns, on_entry, cancel_event)
+    if tarfile.is_tarfile(archive):
+        return _extract_tar(archive, out_dir, patterns, on_entry, cancel_event)
+    if archive.suffix.lower() == ".7z":
+        subprocess.run(["7z", "x", str(archive), f"-o{out_dir}", "-y"] + list(patterns),
+                       check=True, capture_output=True)
+        return 0
+    raise ValueError(f"Archive non reconnue : {archive.name}")
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Lots vectorisés (NumPy)
+Miniatures de même taille : décodées dans un même tableau, réduites par
+blocs (ou, transparentes et sans redimensionnement, aplaties sur le fond)
+en quelques opérations NumPy pour tout le paquet, au lieu d'une série
+d'appels Pillow par image
+
+NumPy est facultatif : sans lui, et pour les images qui ne forment pas
+de paquet, le chemin image par image s'applique. Le dernier pas du
+redimensionnement (LANCZOS, facteur non entier) et l'encodage restent
+faits par Pillow, image par image. Pas un gain de vitesse en général :
+la réduction de Pillow (Image.reduce, en C) est déjà rapide, et sur des
+PNG la décompression domine ; à mesurer avec benchmark.py.
+"""
+
+import math
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cache import get_cache
+from converter import (DRAFT_GAP, ConversionOptions, convert_file, default_output_path, image_target_size,
+                       open_image, save_image)
+from metrics import stage
+from tiled import needs_tiling
+
+# Pixels empilés par paquet (octets) ; aplatissement et réduction en occupent deux fois plus
+BATCH_BYTES = 32 * 1024 * 1024
+# En dessous, le paquet ne rapporte rien : images converties une à une
+BATCH_MIN = 4
+
+# Formats cibles encodés image par image après le paquet
+BATCH_FORMATS = ["jpg", "jpeg", "png", "webp", "tiff"]
+# Modes empilés : nombre de canaux
+_CHANNELS = {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+# Résultat par fichier : (sortie, erreur)
+Results = List[Tuple[Optional[str], Optional[BaseException]]]
+
+
+def numpy_available() -> bool:
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _flattens(fmt: str) -> bool:
+    return fmt in ["jpg", "jpeg"]
+
+
+def _stack_key(input_path: str, fmt: str, opts: ConversionOptions) -> Optional[tuple]:
+    """(taille décodée, mode) d'une image empilable, d'après son en-tête ; None sinon
+
+    Exclues : animations, images géantes, modes à palette ou 16 bits, et
+    images transparentes gardées transparentes (Pillow les redimensionne
+    en alpha prémultiplié).
+    """
+    try:
+        if needs_tiling(input_path, fmt, opts):
+            return None
+        # draft() fixe déjà la taille décodée des JPEG
+        with open_image(input_path, image_target_size(fmt, opts)) as img:
+            if getattr(img, "n_frames", 1) > 1 or img.mode not in _CHANNELS:
+                return None
+            if img.mode in ("LA", "RGBA") and not _flattens(fmt):
+                return None
+            return img.size, img.mode
+    except Exception:
+        # Fichier illisible : le chemin habituel signalera l'erreur
+        return None
+
+
+def plan_stacks(files: List[str], fmt: str, opts: ConversionOptions, workers: int = 1) -> List[List[str]]:
+    """Paquets d'images de même taille et même mode, répartis sur les workers
+
+    Seulement pour les images opaques à réduire d'un facteur entier, ou
+    transparentes à aplatir (JPEG) sans redimensionnement : sinon, il n'y
+    a rien à vectoriser sans s'écarter du chemin image par image.
+    """
+    if fmt not in BATCH_FORMATS or opts.renditions:
+        return []
+    target = image_target_size(fmt, opts)
+    groups: Dict[tuple, List[str]] = {}
+    for filepath in files:
+        key = _stack_key(filepath, fmt, opts)
+        if key is None:
+            continue
+        size, mode = key
+        if mode in ("LA", "RGBA"):
+            # Image.resize filtre la transparence en alpha prémultiplié, sans
+            # réduction par blocs : en paquet, l'aplatissement seul
+            stackable = not target or target == size
+        else:
+            # JPEG déjà réduit par draft() : souvent plus de réduction entière à faire
+            stackable = bool(target) and reduce_factors(size, target) != (1, 1)
+        if stackable:
+            groups.setdefault(key, []).append(filepath)
+
+    stacks = []
+    for ((width, height), mode), group in groups.items():
+        per_stack = max(1, BATCH_BYTES // (width * height * _CHANNELS[mode]))
+        # Assez de paquets pour occuper tous les workers
+        per_stack = min(per_stack, max(BATCH_MIN, math.ceil(len(group) / max(1, workers))))
+        for i in range(0, len(group), per_stack):
+            if len(group[i:i + per_stack]) >= BATCH_MIN:
+                stacks.append(group[i:i + per_stack])
+    return stacks
+
+
+# === OPÉRATIONS SUR LE PAQUET ===
+
+def flatten_stack(stack, background: Tuple[int, int, int]):
+    """(N, H, W, 2 ou 4) → (N, H, W, 3) composé sur le fond, arrondi comme Image.alpha_composite"""
+    import numpy as np
+    planes = np.moveaxis(stack, -1, 0)
+    alpha = planes[-1].astype(np.uint16)
+    inverse = 255 - alpha
+    flat = np.empty(stack.shape[:-1] + (3,), np.uint8)
+    # Canal par canal, en place sur 16 bits : 255 × 255 au plus avant division
+    for channel, value in enumerate(background):
+        # LA : le canal gris sert aux trois canaux du fond
+        total = planes[min(channel, len(planes) - 2)] * alpha
+        total += inverse * np.uint16(value)
+        # Division par 255 arrondie, exacte sur cet intervalle
+        total += 128
+        total += total >> 8
+        total >>= 8
+        flat[..., channel] = total
+    return flat
+
+
+def reduce_stack(stack, factor_x: int, factor_y: int):
+    """Moyenne par blocs factor_x × factor_y, comme Image.reduce (blocs partiels en bordure compris)"""
+    import numpy as np
+    count, height, width, channels = stack.shape
+    out_height, out_width = -(-height // factor_y), -(-width // factor_x)
+    # uint16 suffit tant que la somme d'un bloc tient sur 16 bits
+    dtype = np.uint16 if factor_x * factor_y <= 257 else np.uint32
+    # Sommes séparables : lignes (tranches contiguës), puis colonnes sur
+    # un tableau déjà factor_y fois plus petit ; tout le paquet à la fois
+    rows = np.zeros((count, out_height, width, channels), dtype)
+    for dy in range(factor_y):
+        part = stack[:, dy::factor_y]
+        rows[:, :part.shape[1]] += part
+    sums = np.zeros((count, out_height, out_width, channels), dtype)
+    for dx in range(factor_x):
+        part = rows[:, :, dx::factor_x]
+        sums[:, :, :part.shape[2]] += part
+    del rows
+    block_rows = np.minimum(factor_y, height - np.arange(out_height) * factor_y)
+    block_cols = np.minimum(factor_x, width - np.arange(out_width) * factor_x)
+    pixels = (block_rows[:, None] * block_cols[None, :])[None, :, :, None].astype(np.uint64)
+    # Division en virgule fixe de Pillow (Reduce.c) : résultat identique au pixel près
+    multiplier = (np.float32(2 ** 32) / (256 * pixels).astype(np.float32)).astype(np.uint64)
+    return (((sums + pixels // 2) * multiplier) >> 24).astype(np.uint8)
+
+
+def reduce_factors(size: Tuple[int, int], target: Tuple[int, int]) -> Tuple[int, int]:
+    """Réduction entière préalable de resize_image (reducing_gap de Pillow)"""
+    gap = DRAFT_GAP + 1
+    return int(size[0] / target[0] / gap) or 1, int(size[1] / target[1] / gap) or 1
+
+
+# === CONVERSION ===
+
+def convert_stack(files: List[str], fmt: str, opts: ConversionOptions, outputs: List[Path],
+                  output_folder: Path, cache_settings: Optional[tuple] = None) -> Results:
+    """Convertir un paquet d'images de même taille ; un (sortie, erreur) par fichier
+
+    Même résultat que le chemin image par image. Une image qui n'a pas la
+    taille attendue est convertie seule, comme tout le paquet s'il est
+    transparent et à redimensionner (voir plan_stacks).
+    """
+    import numpy as np
+    from PIL import Image
+
+    results: Results = [(None, None)] * len(files)
+    keys: List[Optional[str]] = [None] * len(files)
+    todo = []
+    for i, filepath in enumerate(files):
+        hit, keys[i] = _cache_lookup(cache_settings, filepath, fmt, opts, outputs[i])
+        if hit:
+            results[i] = (hit, None)
+        else:
+            todo.append(i)
+
+    stack = None
+    stacked: List[int] = []
+    for i in todo:
+        try:
+            with stage("open", Path(files[i])):
+                img = open_image(files[i], image_target_size(fmt, opts))
+            with stage("decode"):
+                img.load()
+                pixels = np.asarray(img).reshape(img.height, img.width, -1)
+            if stack is None:
+                stack = np.empty((len(todo),) + pixels.shape, np.uint8)
+            if pixels.shape != stack.shape[1:]:
+                # En-tête trompeur (draft, rotation...) : hors paquet
+                results[i] = (convert_file(files[i], fmt, opts, output_folder, outputs[i]), None)
+                _cache_store(cache_settings, keys[i], outputs[i])
+                continue
+            stack[len(stacked)] = pixels
+            stacked.append(i)
+        except Exception as e:
+            results[i] = (None, e)
+    if not stacked:
+        return results
+    stack = stack[:len(stacked)]
+
+    height, width = stack.shape[1:3]
+    target = image_target_size(fmt, opts)
+    if target == (width, height):
+        target = None
+    if stack.shape[3] in (2, 4) and _flattens(fmt):
+        if target:
+            # Aplatie après un redimensionnement en alpha prémultiplié : hors paquet
+            del stack
+            for i in stacked:
+                try:
+                    results[i] = (convert_file(files[i], fmt, opts, output_folder, outputs[i]), None)
+                    _cache_store(cache_settings, keys[i], outputs[i])
+                except Exception as e:
+                    results[i] = (None, e)
+            return results
+        with stage("convert"):
+            stack = flatten_stack(stack, tuple(opts.background))
+    box = None
+    if target:
+        factor_x, factor_y = reduce_factors((width, height), target)
+        if factor_x > 1 or factor_y > 1:
+            with stage("reduce"):
+                stack = reduce_stack(stack, factor_x, factor_y)
+        box = (0, 0, width / factor_x, height / factor_y)
+
+    for index, i in enumerate(stacked):
+        try:
+            pixels = stack[index]
+            img = Image.fromarray(pixels[..., 0] if pixels.shape[2] == 1 else pixels)
+            if target and (img.size != target or box != (0, 0) + img.size):
+                with stage("resize"):
+                    img = img.resize(target, Image.Resampling.LANCZOS, box=box)
+            with stage("save", outputs[i]):
+                save_image(img, str(outputs[i]), fmt, opts)
+            results[i] = (str(outputs[i]), None)
+            _cache_store(cache_settings, keys[i], outputs[i])
+        except Exception as e:
+            results[i] = (None, e)
+    return results
+
+
+def _cache_lookup(cache_settings: Optional[tuple], filepath: str, fmt: str, opts: ConversionOptions,
+                  output: Path) -> Tuple[Optional[str], Optional[str]]:
+    if cache_settings is None:
+        return None, None
+    try:
+        with stage("cache-lookup"):
+            cache = get_cache(*cache_settings)
+            key = cache.key(filepath, fmt, opts)
+            return cache.fetch(key, output, default_output_path(filepath, fmt, output.parent, opts)), key
+    except (OSError, sqlite3.Error):
+        return None, None
+
+
+def _cache_store(cache_settings: Optional[tuple], key: Optional[str], output: Path):
+    if key is None:
+        return
+    try:
+        with stage("cache-store"):
+            get_cache(*cache_settings).store(key, output)
+    except (OSError, sqlite3.Error):
+        pass
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Banc d'essai
+Débit des conversions sur un corpus synthétique reproductible
+
+    python3 benchmark.py                         # tout, 1 / 2 / 4 workers
+    python3 benchmark.py --only image-jpg zip --workers 1 8
+    python3 benchmark.py --gui --compare benchmark-2.0.json
+
+Chaque mesure tourne dans un processus neuf (pic de mémoire isolé).
+Résultats : fichiers/s, Mo/s et pic RSS, écrits en JSON (--output)
+pour comparer deux versions (--compare).
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import struct
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import wave
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path.home() / ".format_converter_cache" / "benchmark"
+CORPUS_VERSION = 3
+SEED = 1234
+
+IMAGE_SIZES = {"small": (640, 480), "medium": (1920, 1080), "large": (4000, 3000)}
+# Mode PIL → extension du fichier source
+IMAGE_MODES = {"RGB": "jpg", "RGBA": "png", "L": "png", "P": "gif"}
+# Lot de vignettes de même taille (paquets NumPy contre Pillow image par image)
+THUMBNAIL_SIZE = (960, 720)
+THUMBNAIL_COUNT = 48
+
+# Cas mesurés : nom → (dossier du corpus, format, outil requis, options)
+CASES: Dict[str, tuple] = {
+    "image-png": ("images", "png", "pillow", {}),
+    "image-jpg": ("images", "jpg", "pillow", {}),
+    "image-webp": ("images", "webp", "pillow", {}),
+    "image-jpg-resize": ("images", "jpg", "pillow", {"resize_width": 1280, "resize_height": 720}),
+    "image-heic": ("images", "heic", "sips", {}),
+    "image-pdf": ("images", "pdf", "pillow", {}),
+    "image-pdf-merge": ("images", "pdf", "pillow", {"merge_pdf": True}),
+    "image-thumbs": ("thumbnails", "jpg", "pillow", {"resize_width": 120, "resize_height": 90}),
+    "image-thumbs-numpy": ("thumbnails", "jpg", "numpy", {"resize_width": 120, "resize_height": 90}),
+    "audio-mp3": ("audio", "mp3", "ffmpeg", {}),
+    "audio-flac": ("audio", "flac", "ffmpeg", {}),
+    "audio-aac": ("audio", "aac", "ffmpeg", {}),
+    "video-mkv": ("video", "mkv", "ffmpeg", {}),
+    "video-mov": ("video", "mov", "ffmpeg", {}),
+    "video-mp4": ("video", "mp4", "ffmpeg", {}),
+    "zip": ("trees", "zip", None, {}),
+    "unzip": ("archives", "unzip", None, {}),
+    "document-html": ("documents", "html", "documents", {}),
+    "document-pdf": ("documents", "pdf", "documents", {}),
+    "document-docx": ("documents", "docx", "documents", {}),
+}
+# Réglages du planificateur propres à un cas
+SCHEDULER_OPTIONS: Dict[str, dict] = {"image-thumbs-numpy": {"vectorize": True}}
+# Mesures hors conversion : nom → outil requis
+MICRO_CASES = {"history-add": None, "cli-startup": None,
+               "gui-startup": "gui", "gui-fileitem": "gui", "gui-preview": "gui"}
+
+# Démarrage à froid du CLI (interpréteur compris) ; celui de l'interface
+# est mesuré par FormatConverterApp.py --startup-check (STARTUP_BUDGET)
+CLI_STARTUP_BUDGET = 0.5
+
+DEFAULT_WORKERS = [1, 2, 4]
+
+
+# === CORPUS ===
+
+def _write_image(path: Path, size, mode: str, rng: random.Random):
+    """Dégradé + bruit : contenu réaliste à compresser, identique d'un lancement à l'autre"""
+    from PIL import Image
+    w, h = size
+    base = Image.linear_gradient("L").resize(size).convert("RGB")
+    noise = Image.frombytes("RGB", (w // 4, h // 4), rng.randbytes((w // 4) * (h // 4) * 3)).resize(size)
+    img = Image.blend(base, noise, 0.35)
+    if mode == "RGBA":
+        img.putalpha(Image.radial_gradient("L").resize(size))
+    elif mode != "RGB":
+        img = img.convert(mode)
+    img.save(path, quality=90) if path.suffix == ".jpg" else img.save(path)
+
+
+def _write_wav(path: Path, seconds: float, rate: int = 44100):
+    """Sinusoïde stéréo 16 bits"""
+    frames = int(seconds * rate)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        chunk = []
+        for i in range(frames):
+            v = int(12000 * math.sin(2 * math.pi * 440 * i / rate))
+            chunk.append(struct.pack("<hh", v, v))
+            if len(chunk) == rate:
+                w.writeframes(b"".join(chunk))
+                chunk = []
+        w.writeframes(b"".join(chunk))
+
+
+def _write_text(path: Path, paragraphs: int, rng: random.Random, markdown: bool):
+    words = ["format", "conversion", "fichier", "image", "document", "archive", "audio",
+             "vidéo", "qualité", "rapide", "parallèle", "mémoire", "cache", "page"]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(paragraphs):
+            if markdown and i % 10 == 0:
+                f.write(f"## Section {i // 10 + 1}\n\n")
+            f.write(" ".join(rng.choice(words) for _ in range(80)).capitalize() + ".\n\n")
+
+
+def build_corpus(root: Path, scale: int = 1) -> Path:
+    """Créer (une seule fois par version et échelle) le corpus synthétique"""
+    corpus = root / f"corpus-v{CORPUS_VERSION}-x{scale}"
+    if (corpus / ".complete").exists():
+        return corpus
+    shutil.rmtree(corpus, ignore_errors=True)
+    rng = random.Random(SEED)
+    for name in ("images", "thumbnails", "audio", "video", "trees", "archives", "documents"):
+        (corpus / name).mkdir(parents=True, exist_ok=True)
+
+    if tool_available("pillow"):
+        for label, size in IMAGE_SIZES.items():
+            for mode, ext in IMAGE_MODES.items():
+                for i in range(scale * (1 if label == "large" else 2)):
+                    _write_image(corpus / "images" / f"{label}_{mode}_{i}.{ext}", size, mode, rng)
+        # TIFF opaques non compressés : à réduire par blocs, décodage peu coûteux
+        # (sur des PNG, la décompression masquerait l'écart entre les deux chemins)
+        for i in range(THUMBNAIL_COUNT * scale):
+            _write_image(corpus / "thumbnails" / f"thumb_{i}.tif", THUMBNAIL_SIZE, "RGB", rng)
+
+    for i in range(2 * scale):
+        _write_wav(corpus / "audio" / f"tone_{i}.wav", 10)
+
+    if tool_available("ffmpeg"):
+        for i in range(scale):
+            subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "testsrc=duration=5:size=1280x720:rate=30",
+                            "-f", "lavfi", "-i", "sine=frequency=440:duration=5",
+                            "-codec:v", "libx264", "-codec:a", "aac", "-shortest", "-y",
+                            str(corpus / "video" / f"clip_{i}.mp4")], check=True, capture_output=True)
+
+    for i in range(4 * scale):
+        _write_text(corpus / "documents" / f"doc_{i}.{'md' if i % 2 else 'txt'}", 200, rng, markdown=bool(i % 2))
+
+    # Arborescences : de nombreux petits fichiers + quelques gros
+    for t in range(2 * scale):
+        tree = corpus / "trees" / f"tree_{t}"
+        for d in range(5):
+            (tree / f"dir_{d}").mkdir(parents=True)
+            for f in range(40):
+                _write_text(tree / f"dir_{d}" / f"file_{f}.txt", 3, rng, markdown=False)
+        (tree / "blob.bin").write_bytes(rng.randbytes(4 * 1024 * 1024))
+        (tree / "log.txt").write_text("ligne de journal répétitive\n" * 200000, encoding="utf-8")
+
+        with zipfile.ZipFile(corpus / "archives" / f"tree_{t}.zip", "w", zipfile.ZIP_DEFLATED) as zf:
+            for path in sorted(tree.rglob("*")):
+                zf.write(path, path.relative_to(tree.parent))
+        with tarfile.open(corpus / "archives" / f"tree_{t}.tar.gz", "w:gz") as tf:
+            tf.add(tree, tree.name)
+
+    (corpus / ".complete").touch()
+    return corpus
+
+
+def tool_available(tool: Optional[str]) -> bool:
+    if tool is None:
+        return True
+    # Modules cherchés sans être importés : le parent ne paie pas leur chargement
+    if tool == "pillow":
+        return importlib.util.find_spec("PIL") is not None
+    if tool == "numpy":
+        from batch import numpy_available
+        return tool_available("pillow") and numpy_available()
+    if tool == "documents":
+        from documents import find_soffice
+        return bool(find_soffice() or shutil.which("pandoc"))
+    if tool == "gui":
+        if importlib.util.find_spec("customtkinter") is None:
+            return False
+        return sys.platform == "darwin" or bool(os.environ.get("DISPLAY"))
+    return shutil.which(tool) is not None
+
+
+# === MESURES (processus enfant) ===
+
+def peak_rss_mb() -> float:
+    """Pic RSS du processus et du plus gros de ses enfants (workers, ffmpeg...)"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_conversion(corpus: Path, case: str, workers: int) -> dict:
+    from converter import ConversionOptions, ConversionScheduler
+
+    folder, fmt, _, overrides = CASES[case]
+    files = sorted(str(p) for p in (corpus / folder).iterdir() if p.is_file() or folder == "trees")
+    opts = ConversionOptions()
+    for key, value in overrides.items():
+        setattr(opts, key, value)
+
+    size = sum(_tree_size(Path(f)) for f in files)
+    with tempfile.TemporaryDirectory(dir=BENCH_DIR) as out:
+        scheduler = ConversionScheduler(Path(out), workers=workers, subprocess_workers=workers,
+                                        **SCHEDULER_OPTIONS.get(case, {}))
+        start = time.perf_counter()
+        success, errors = scheduler.run(files, fmt, opts)
+        elapsed = time.perf_counter() - start
+    return _result(case, workers, len(files), size, elapsed, errors)
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def _result(case: str, workers: int, count: int, size: int, elapsed: float, errors: int = 0) -> dict:
+    return {
+        "case": case,
+        "workers": workers,
+        "files": count,
+        "bytes": size,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "files_per_sec": round(count / elapsed, 2) if elapsed else None,
+        "mb_per_sec": round(size / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_history(count: int = 20000) -> dict:
+    from history import ConversionHistory
+
+    with tempfile.TemporaryDirectory(dir=BENCH_DIR) as tmp:
+        history = ConversionHistory(path=Path(tmp) / "history.db")
+        start = time.perf_counter()
+        for i in range(count):
+            history.add(f"/tmp/in/file_{i}.jpg", f"/tmp/out/file_{i}.png", "png", i % 10 != 0)
+        history.flush()
+        elapsed = time.perf_counter() - start
+        history.close()
+    return _result("history-add", 1, count, 0, elapsed)
+
+
+def run_gui(corpus: Path, case: str) -> dict:
+    import customtkinter as ctk
+    from FormatConverterApp import FileItem, PreviewCard
+    from file_queue import FileEntry
+
+    root = ctk.CTk()
+    root.withdraw()
+    images = sorted(str(p) for p in (corpus / "images").iterdir())
+    try:
+        if case == "gui-fileitem":
+            count = 200
+            start = time.perf_counter()
+            for i in range(count):
+                item = FileItem(root, on_remove=lambda p: None, on_select=lambda p: None)
+                item.show_row(FileEntry(images[i % len(images)]), selected=False)
+                item.pack()
+            root.update_idletasks()
+            elapsed = time.perf_counter() - start
+            return _result(case, 1, count, 0, elapsed)
+
+        # Aperçu : du clic à la miniature affichée (cache vide, puis cache chaud)
+        card = PreviewCard(root)
+        card.pack()
+        size = sum(os.path.getsize(p) for p in images)
+        start = time.perf_counter()
+        for _ in range(2):
+            for path in images:
+                card.show(path)
+                while card.preview_content.cget("text") == "Chargement...":
+                    root.update()
+                    time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        return _result(case, 1, 2 * len(images), 2 * size, elapsed)
+    finally:
+        root.destroy()
+
+
+def run_startup(case: str, runs: int = 5) -> dict:
+    """Meilleur temps de démarrage sur quelques lancements, comparé au budget"""
+    here = Path(__file__).parent
+    timings = []
+    for _ in range(runs):
+        if case == "cli-startup":
+            start = time.perf_counter()
+            subprocess.run([sys.executable, str(here / "cli.py"), "--help"], check=True, capture_output=True)
+            timings.append(time.perf_counter() - start)
+            budget = CLI_STARTUP_BUDGET
+        else:
+            proc = subprocess.run([sys.executable, str(here / "FormatConverterApp.py"), "--startup-check"],
+                                  capture_output=True, text=True)
+            startup = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings.append(startup["first_paint"])
+            budget = startup["budget"]
+    result = _result(case, 1, runs, 0, sum(timings))
+    result.update(best=round(min(timings), 4), budget=budget, within_budget=min(timings) <= budget)
+    return result
+
+
+def run_case(corpus: Path, case: str, workers: int) -> dict:
+    if case == "history-add":
+        return run_history()
+    if case.endswith("-startup"):
+        return run_startup(case)
+    if case in MICRO_CASES:
+        return run_gui(corpus, case)
+    return run_conversion(corpus, case, workers)
+
+
+# === ORCHESTRATION ===
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "corpus_version": CORPUS_VERSION,
+    }
+
+
+def compare(results: List[dict], baseline_path: str) -> List[str]:
+    """Écarts de fichiers/s par rapport à un fichier de résultats précédent"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["workers"]): r for r in json.load(f).get("results", [])}
+    lines = []
+    for r in results:
+        old = baseline.get((r["case"], r["workers"]))
+        if old and old.get("files_per_sec") and r.get("files_per_sec"):
+            change = (r["files_per_sec"] / old["files_per_sec"] - 1) * 100
+            flag = "  ⚠️ régression" if change < -10 else ""
+            lines.append(f"{r['case']:<20} {r['workers']:>2}w  {change:+6.1f} %{flag}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Banc d'essai des conversions")
+    parser.add_argument("--only", nargs="+", choices=list(CASES) + list(MICRO_CASES), help="cas à mesurer")
+    parser.add_argument("--workers", nargs="+", type=int, default=DEFAULT_WORKERS,
+                        help="nombres de workers à comparer (défaut : 1 2 4)")
+    parser.add_argument("--scale", type=int, default=1, help="taille du corpus (multiplicateur)")
+    parser.add_argument("--gui", action="store_true", help="inclure les mesures d'interface (Tk)")
+    parser.add_argument("--output", default=None, help="fichier JSON (défaut : benchmark-<date>.json)")
+    parser.add_argument("--compare", default=None, metavar="JSON", help="résultats de référence")
+    # Usage interne : une mesure dans un processus neuf
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--build-corpus", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    BENCH_DIR.mkdir(parents=True, exist_ok=True)
+    if args.run_case:
+        print(json.dumps(run_case(Path(args.corpus), args.run_case, args.workers[0])))
+        return 0
+
+    if args.build_corpus:
+        print(build_corpus(BENCH_DIR, args.scale))
+        return 0
+
+    # Corpus préparé dans un processus à part : sous Linux, le pic RSS
+    # du parent serait hérité par chaque mesure lancée ensuite
+    print("Préparation du corpus...", file=sys.stderr)
+    corpus = Path(subprocess.run([sys.executable, __file__, "--build-corpus", "--scale", str(args.scale)],
+                                 check=True, capture_output=True, text=True).stdout.strip())
+
+    cases = args.only or list(CASES) + [c for c in MICRO_CASES if args.gui or not c.startswith("gui-")]
+    results, skipped = [], []
+    for case in cases:
+        tool = CASES[case][2] if case in CASES else MICRO_CASES[case]
+        if not tool_available(tool):
+            skipped.append({"case": case, "reason": f"{tool} indisponible"})
+            continue
+        for workers in (args.workers if case in CASES else [1]):
+            proc = subprocess.run(
+                [sys.executable, __file__, "--run-case", case, "--workers", str(workers), "--corpus", str(corpus)],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                skipped.append({"case": case, "workers": workers, "reason": proc.stderr.strip()[-500:]})
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{case:<20} {workers:>2}w  {result['files_per_sec'] or 0:>9.2f} fichiers/s  "
+                  f"{result['mb_per_sec'] or 0:>8.2f} Mo/s  {result['peak_rss_mb']:>7.1f} Mo RSS"
+                  + (f"  ({result['errors']} erreurs)" if result["errors"] else "")
+                  + (f"  démarrage {result['best']:.3f} s / budget {result['budget']} s"
+                     + ("" if result["within_budget"] else "  ⚠️ dépassé") if "budget" in result else ""),
+                  file=sys.stderr)
+
+    report = {"environment": environment(), "results": results, "skipped": skipped}
+    output = args.output or f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Résultats : {output}", file=sys.stderr)
+
+    if args.compare:
+        for line in compare(results, args.compare):
+            print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
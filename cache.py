@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Cache de conversions
+Résultats indexés par contenu source + format + options, éviction LRU par taille
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+CACHE_DIR = Path.home() / ".format_converter_cache" / "conversions"
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+# À incrémenter quand le résultat d'une conversion change à options égales
+CACHE_VERSION = 1
+
+# Options sans effet sur le contenu converti (nom de fichier uniquement)
+_NAMING_OPTIONS = {"prefix", "suffix"}
+# Formats dont la sortie contient le nom du fichier source : entrée d'archive
+# ZIP, <title> HTML (texte en flux, soffice) ; ce nom fait partie de la clé
+NAMED_FORMATS = ["zip", "html"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    last_output TEXT,
+    last_output_mtime INTEGER,
+    last_output_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+
+def options_fingerprint(opts) -> str:
+    """Options de conversion sérialisées (ordre stable)"""
+    values = {k: v for k, v in sorted(vars(opts).items()) if k not in _NAMING_OPTIONS}
+    return json.dumps(values, sort_keys=True, default=str)
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Empreinte BLAKE2b du contenu, lu par blocs"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ConversionCache:
+    """Cache des fichiers convertis
+
+    Clé = empreinte du contenu source + format cible + options. Sur un
+    succès du cache, la sortie précédente est réutilisée si elle est
+    toujours là, intacte et sous le nom attendu ; sinon elle est recréée
+    depuis le cache (lien physique si link=True, copie sinon). Les
+    empreintes sont mémorisées par (chemin, date, taille) pour ne pas
+    relire les sources inchangées.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES, link: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Partagé entre threads et processus de conversion : attente plutôt qu'erreur
+        self._conn = sqlite3.connect(str(self.directory / "index.db"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _blob(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _count(self, name: str):
+        self._conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", (name,))
+
+    def source_digest(self, input_path: str) -> str:
+        """Empreinte du fichier source (relue seulement s'il a changé)"""
+        st = os.stat(input_path)
+        path = os.path.abspath(input_path)
+        with self._lock:
+            row = self._conn.execute("SELECT mtime, size, digest FROM sources WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+            return row[2]
+
+        digest = file_digest(input_path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, mtime, size, digest) VALUES (?, ?, ?, ?)",
+                (path, st.st_mtime_ns, st.st_size, digest)
+            )
+        return digest
+
+    def key(self, input_path: str, fmt: str, opts) -> str:
+        name = os.path.basename(input_path) if fmt in NAMED_FORMATS else ""
+        raw = f"{CACHE_VERSION}|{self.source_digest(input_path)}|{fmt}|{name}|{options_fingerprint(opts)}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=20).hexdigest()
+
+    def fetch(self, key: str, output: Path, name: Optional[Path] = None) -> Optional[str]:
+        """Sortie tirée du cache, ou None (échec du cache)
+
+        output : chemin réservé pour cette conversion ; name : chemin qu'elle
+        aurait sans le (n) ajouté en cas de conflit. La sortie précédente
+        n'est réutilisée que si elle porte l'un de ces deux chemins : une
+        autre source au même contenu, ou un autre préfixe / suffixe, reçoit
+        sa propre copie.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, last_output, last_output_mtime, last_output_size FROM entries WHERE key = ?",
+                (key,)
+            ).fetchone()
+        blob = self._blob(key)
+        if row is None or not blob.is_file() or blob.stat().st_size != row[0]:
+            with self._lock, self._conn:
+                self._count("misses")
+            return None
+
+        size, last_output, last_mtime, last_size = row
+        result = None
+        # Sortie précédente intacte, sous le nom attendu : rien à écrire
+        if last_output and Path(last_output) in (output, name):
+            try:
+                st = os.stat(last_output)
+                if st.st_mtime_ns == last_mtime and st.st_size == last_size:
+                    result = last_output
+            except OSError:
+                pass
+
+        if result is None:
+            self._materialize(blob, output)
+            result = str(output)
+
+        st = os.stat(result)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET last_used = ?, last_output = ?, last_output_mtime = ?, last_output_size = ? "
+                "WHERE key = ?",
+                (time.time(), result, st.st_mtime_ns, st.st_size, key)
+            )
+            self._count("hits")
+        return result
+
+    def _materialize(self, blob: Path, output: Path):
+        if self.link:
+            try:
+                os.link(blob, output)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(blob, output)
+
+    def store(self, key: str, output: Path):
+        """Mémoriser une sortie fraîchement convertie (fichiers uniquement)"""
+        if not output.is_file():
+            return
+        blob = self._blob(key)
+        blob.parent.mkdir(exist_ok=True)
+        tmp = blob.with_suffix(".tmp")
+        # Copie indépendante : modifier la sortie ne corrompt pas le cache
+        shutil.copyfile(output, tmp)
+        os.replace(tmp, blob)
+
+        st = os.stat(output)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, size, last_used, last_output, last_output_mtime, last_output_size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, st.st_size, time.time(), str(output), st.st_mtime_ns, st.st_size)
+            )
+        self.evict()
+
+    def moved(self, source: Path, target: Path):
+        """Suivre une sortie renommée après coup (ex. : remplacement par la surveillance)
+
+        Les entrées dont la dernière sortie était source pointent désormais
+        vers target : un succès ultérieur ne vise plus un fichier disparu.
+        """
+        st = os.stat(target)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE entries SET last_output = ?, last_output_mtime = ?, last_output_size = ? "
+                "WHERE last_output = ?",
+                (str(target), st.st_mtime_ns, st.st_size, str(source))
+            )
+
+    def evict(self):
+        """Supprimer les entrées les moins récemment utilisées au-delà de max_bytes"""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= size
+            with self._conn:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+                self._conn.execute("UPDATE stats SET value = value + ? WHERE name = 'evictions'", (len(victims),))
+        for key in victims:
+            try:
+                self._blob(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, float]:
+        """Succès, échecs, évictions, taille et taux de succès du cache"""
+        with self._lock:
+            values = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = values.get("hits", 0) + values.get("misses", 0)
+        values.update({
+            "entries": entries,
+            "bytes": size,
+            "hit_rate": round(values.get("hits", 0) / lookups, 3) if lookups else 0.0
+        })
+        return values
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("UPDATE stats SET value = 0")
+        for child in self.directory.iterdir():
+            if child.is_dir():
+                shutil.rmtree(child, ignore_errors=True)
+
+
+_caches: Dict[tuple, ConversionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(directory: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES, link: bool = False) -> ConversionCache:
+    """Instance partagée dans le processus courant (threads et workers)"""
+    key = (str(directory), max_bytes, link)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ConversionCache(directory, max_bytes, link)
+        return _caches[key]
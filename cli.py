@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Ligne de commande
+Conversion par lots sans interface graphique (serveurs, cron, scripts)
+
+    python3 cli.py -t webp -o ~/Exports "photos/*.jpg"
+    python3 cli.py -t pdf -r Documents/ --jobs 4
+    python3 cli.py -t webp -o ~/Exports --watch ~/Dépôt
+    python3 cli.py -t webp --renditions 2048,2048:jpg,1024,256:jpg:70 "photos/*.jpg"
+    python3 cli.py -t jpg --resize 1920x1080 --pipeline --max-decoded 4 /mnt/nas/photos/
+    python3 cli.py -t jpg --resize 320x240 --vectorize "scans/*.tif"
+    python3 cli.py pdf merge -o ~/Exports/tout.pdf a.pdf b.pdf
+    python3 cli.py pdf split --ranges 1-3 --ranges 4- rapport.pdf
+    python3 cli.py pdf compress -o ~/Exports "scans/*.pdf"
+    python3 cli.py -t png --metrics etapes.trace.json --profile lot.prof "photos/*.jpg"
+
+Un résumé JSON est écrit sur la sortie standard. Code de retour :
+0 = tout converti, 1 = au moins une erreur, 2 = aucun fichier à convertir.
+En mode --watch, une ligne JSON est écrite par fichier converti, jusqu'à Ctrl+C.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+# Pas de customtkinter ni de Pillow ici : démarrage rapide
+from converter import FORMATS, TILED_THRESHOLD, ConversionOptions, ConversionScheduler, parse_renditions
+from history import ConversionHistory
+from file_queue import FileQueue
+from cache import get_cache
+from metrics import MetricsCollector
+
+
+def collect_files(inputs: List[str], recursive: bool = False) -> List[str]:
+    """Résoudre fichiers, globs et dossiers (sans doublons, ordre conservé)"""
+    files = FileQueue()
+
+    def add(path: Path):
+        files.add(str(path))
+
+    for pattern in inputs:
+        pattern = os.path.expanduser(pattern)
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in sorted(matches):
+            path = Path(match)
+            if path.is_dir():
+                children = path.rglob("*") if recursive else path.iterdir()
+                for child in sorted(children):
+                    if child.is_file() and not child.name.startswith("."):
+                        add(child)
+            elif path.is_file():
+                add(path)
+
+    return files.paths()
+
+
+def parse_size(value: str):
+    """'1280x720' ou '1280×720' → (1280, 720)"""
+    try:
+        w, h = value.lower().replace("×", "x").split("x")
+        return int(w), int(h)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"taille invalide : {value} (attendu LARGEURxHAUTEUR)")
+
+
+def parse_count(value: str) -> int:
+    """'500' → 500 ; entier positif ou nul"""
+    try:
+        count = int(value)
+    except ValueError:
+        count = -1
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"nombre invalide : {value} (entier, 0 ou plus)")
+    return count
+
+
+def parse_rendition_spec(value: str):
+    """'2048,1024:jpg:80,256' → liste de Rendition"""
+    try:
+        renditions = parse_renditions(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if not renditions:
+        raise argparse.ArgumentTypeError("aucune déclinaison")
+    return renditions
+
+
+def parse_color(value: str):
+    """'white', '#202020', 'rgb(32,32,32)' → (r, g, b)"""
+    from PIL import ImageColor
+    try:
+        return ImageColor.getrgb(value)[:3]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"couleur invalide : {value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="formatconverter",
+        description="Convertir des fichiers sans interface graphique"
+    )
+    parser.add_argument("inputs", nargs="+", help="fichiers, globs ou dossiers")
+    parser.add_argument("-t", "--to", dest="format", required=True, choices=FORMATS,
+                        help="format de sortie")
+    parser.add_argument("-o", "--output", default=str(Path.home() / "Downloads"),
+                        help="dossier de sortie (défaut : ~/Downloads)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="parcourir les dossiers récursivement")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="conversions simultanées (défaut : un par cœur)")
+    parser.add_argument("--batch-size", type=int, default=20,
+                        help="documents par appel soffice (défaut : 20)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="images : lecture, décodage et écriture en étages (disque lent ou réseau)")
+    parser.add_argument("--max-decoded", type=int, default=None, metavar="N",
+                        help="avec --pipeline : images décodées en mémoire à la fois (défaut : --jobs)")
+    parser.add_argument("--vectorize", action="store_true",
+                        help="images de même taille : réduction par blocs (ou aplatissement seul) par paquets "
+                             "(NumPy, si installé) ; pas plus rapide sur des PNG, dont le décodage domine, "
+                             "ni en général que Pillow image par image : à mesurer avec benchmark.py")
+
+    group = parser.add_argument_group("options de conversion")
+    group.add_argument("--quality", type=int, default=85, help="qualité JPEG (10-100)")
+    group.add_argument("--resize", type=parse_size, default=None, metavar="LxH",
+                       help="redimensionner les images, ex. 1280x720")
+    group.add_argument("--renditions", type=parse_rendition_spec, default=[], metavar="TAILLE[:FMT[:Q]],...",
+                       help="images : plusieurs tailles (grand côté) et formats depuis un seul décodage, "
+                            "ex. 2048,2048:jpg,1024:webp:75,256")
+    group.add_argument("--tiled-threshold", type=float, default=TILED_THRESHOLD / 1e6, metavar="MPX",
+                       help="images PNG / TIFF plus grandes (mégapixels) traitées par bandes, "
+                            f"mémoire bornée (défaut : {TILED_THRESHOLD // 1_000_000}, 0 = jamais)")
+    group.add_argument("--background", type=parse_color, default=(255, 255, 255), metavar="COULEUR",
+                       help="fond des images transparentes converties en JPEG ou PDF, ex. white, #202020 "
+                            "(défaut : blanc)")
+    group.add_argument("--dedupe-frames", action="store_true",
+                       help="animations : fusionner les images identiques consécutives (durées additionnées)")
+    group.add_argument("--bitrate", default="256k", help="bitrate audio (ex. 192k)")
+    group.add_argument("--level", type=int, default=6, choices=range(10), metavar="0-9",
+                       help="niveau de compression ZIP (0 = aucune, 9 = maximale ; défaut : 6)")
+    group.add_argument("--include", action="append", default=[], metavar="GLOB",
+                       help="extraction : n'extraire que les entrées correspondantes (répétable)")
+    group.add_argument("--merge-pdf", action="store_true",
+                       help="images → un seul PDF multipage, dans l'ordre des fichiers")
+    group.add_argument("--no-passthrough", action="store_true",
+                       help="PDF : réencoder les JPEG au lieu de les recopier tels quels")
+    group.add_argument("--prefix", default="", help="préfixe des fichiers de sortie")
+    group.add_argument("--suffix", default="", help="suffixe des fichiers de sortie")
+
+    parser.add_argument("--watch", action="store_true",
+                        help="surveiller les dossiers et convertir les fichiers nouveaux ou modifiés")
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="secondes sans modification avant de convertir un fichier surveillé (défaut : 2)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="reconvertir même les fichiers déjà convertis")
+    parser.add_argument("--cache-link", action="store_true",
+                        help="sorties issues du cache en liens physiques plutôt qu'en copies")
+    parser.add_argument("--no-history", action="store_true",
+                        help="ne pas enregistrer dans l'historique")
+    parser.add_argument("--history-max", type=parse_count, default=None, metavar="N",
+                        help="historique : garder les N dernières entrées, réglage conservé "
+                             "pour les lancements suivants et l'interface (0 = illimité)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="ne pas afficher la progression sur stderr")
+
+    group = parser.add_argument_group("mesures")
+    group.add_argument("--metrics", default=None, metavar="FICHIER",
+                       help="durée de chaque étape : .json, .prom (Prometheus) ou .trace.json (Chrome trace)")
+    group.add_argument("--profile", default=None, metavar="FICHIER.prof",
+                       help="profil cProfile du lot (et pic mémoire tracemalloc dans --metrics)")
+    return parser
+
+
+def describe_error(error: BaseException) -> str:
+    """Message d'erreur, complété par la fin de stderr pour les outils externes"""
+    message = str(error) or type(error).__name__
+    stderr = getattr(error, "stderr", None)
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode(errors="replace")
+    if stderr and stderr.strip():
+        message += f" : {stderr.strip().splitlines()[-1]}"
+    return message
+
+
+def options_from_args(args: argparse.Namespace) -> ConversionOptions:
+    opts = ConversionOptions()
+    opts.quality = max(10, min(100, args.quality))
+    if args.resize:
+        opts.resize_width, opts.resize_height = args.resize
+    opts.bitrate_audio = args.bitrate
+    opts.compression_level = args.level
+    opts.extract_patterns = args.include
+    opts.merge_pdf = args.merge_pdf
+    opts.jpeg_passthrough = not args.no_passthrough
+    opts.prefix = args.prefix
+    opts.suffix = args.suffix
+    opts.renditions = args.renditions
+    opts.tiled_threshold = int(args.tiled_threshold * 1e6)
+    opts.drop_duplicate_frames = args.dedupe_frames
+    opts.background = args.background
+    return opts
+
+
+def open_history(args: argparse.Namespace) -> Optional[ConversionHistory]:
+    if args.no_history:
+        return None
+    history = ConversionHistory()
+    if args.history_max is not None:
+        history.set_max_entries(args.history_max)
+    return history
+
+
+def watch(args: argparse.Namespace) -> int:
+    """Mode surveillance : une ligne JSON par fichier, jusqu'à Ctrl+C"""
+    from watch import FolderWatcher
+
+    directories = [os.path.expanduser(d) for d in args.inputs]
+    missing = [d for d in directories if not os.path.isdir(d)]
+    if missing:
+        print(f"dossier introuvable : {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    history = open_history(args)
+
+    def on_progress(done: int, filepath: str, output: Optional[str], error: Optional[BaseException]):
+        if history:
+            history.add(filepath, output or "", args.format, error is None)
+            history.flush()
+        print(json.dumps({
+            "input": filepath,
+            "output": output,
+            "success": error is None,
+            "error": None if error is None else describe_error(error)
+        }, ensure_ascii=False), flush=True)
+
+    watcher = FolderWatcher(directories, args.format, options_from_args(args),
+                            Path(os.path.expanduser(args.output)), workers=args.jobs,
+                            recursive=args.recursive, settle=args.settle,
+                            use_cache=not args.no_cache, cache_link=args.cache_link,
+                            on_progress=on_progress)
+    if not args.quiet:
+        print(f"Surveillance de {', '.join(directories)} (Ctrl+C pour arrêter)", file=sys.stderr)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+    finally:
+        watcher.manifest.close()
+        if history:
+            history.close()
+    return 0
+
+
+def build_pdf_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="formatconverter pdf",
+        description="Fusionner, diviser ou compresser des PDF"
+    )
+    tools = parser.add_subparsers(dest="tool", required=True)
+
+    merge = tools.add_parser("merge", help="fusionner des PDF, dans l'ordre")
+    merge.add_argument("inputs", nargs="+", help="PDF ou globs")
+    merge.add_argument("-o", "--output", required=True, help="PDF de sortie")
+
+    split = tools.add_parser("split", help="un PDF par plage de pages (ou par page)")
+    split.add_argument("inputs", nargs="+", help="PDF ou globs")
+    split.add_argument("--ranges", action="append", default=[], metavar="PLAGE",
+                       help="une sortie par plage, répétable : --ranges 1-3 --ranges 11- --ranges 1,3,5")
+
+    compress = tools.add_parser("compress", help="réduire les images des PDF")
+    compress.add_argument("inputs", nargs="+", help="PDF ou globs")
+    compress.add_argument("--max-size", type=int, default=1600,
+                          help="côté le plus long des images, en pixels (défaut : 1600)")
+    compress.add_argument("--quality", type=int, default=75, help="qualité JPEG des images (défaut : 75)")
+
+    for tool in (split, compress):
+        tool.add_argument("-o", "--output", default=str(Path.home() / "Downloads"),
+                          help="dossier de sortie (défaut : ~/Downloads)")
+    for tool in (split, compress):
+        tool.add_argument("-j", "--jobs", type=int, default=None,
+                          help="processus simultanés (défaut : un par cœur)")
+    return parser
+
+
+def pdf_main(argv: List[str]) -> int:
+    """Outils PDF en lot : un résumé JSON, mêmes codes de retour que la conversion"""
+    from converter import output_path_for
+    from pdf_tools import compress_pdf, merge_pdfs, split_pdf
+
+    args = build_pdf_parser().parse_args(argv)
+    files = [f for f in collect_files(args.inputs) if f.lower().endswith(".pdf")]
+    summary = {"tool": args.tool, "total": len(files), "success": 0, "errors": 0, "elapsed": 0.0, "files": []}
+    if not files:
+        print(json.dumps(summary, ensure_ascii=False))
+        return 2
+
+    start = time.perf_counter()
+    if args.tool == "merge":
+        output = Path(os.path.expanduser(args.output))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        jobs = [(files, lambda: {"output": str(merge_pdfs(files, output))})]
+    else:
+        folder = Path(os.path.expanduser(args.output))
+        folder.mkdir(parents=True, exist_ok=True)
+        reserved = set()
+
+        def job(path: str):
+            if args.tool == "split":
+                return {"outputs": split_pdf(path, folder, args.ranges, args.jobs)}
+            output = output_path_for(path, "pdf", folder, reserved)
+            before, after = compress_pdf(path, output, args.max_size, max(10, min(100, args.quality)), args.jobs)
+            return {"output": str(output), "size_before": before, "size_after": after}
+        jobs = [([path], partial(job, path)) for path in files]
+
+    for inputs, task in jobs:
+        entry = {"inputs": inputs, "success": True, "error": None}
+        try:
+            entry.update(task())
+            summary["success"] += len(inputs)
+        except Exception as e:
+            entry.update(success=False, error=describe_error(e))
+            summary["errors"] += len(inputs)
+        summary["files"].append(entry)
+    summary["elapsed"] = round(time.perf_counter() - start, 3)
+
+    print(json.dumps(summary, ensure_ascii=False))
+    return 1 if summary["errors"] else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["pdf"]:
+        return pdf_main(argv[1:])
+    args = build_parser().parse_args(argv)
+    if args.watch:
+        return watch(args)
+
+    files = collect_files(args.inputs, args.recursive)
+    output_folder = Path(os.path.expanduser(args.output))
+
+    summary = {
+        "format": args.format,
+        "output_folder": str(output_folder),
+        "total": len(files),
+        "success": 0,
+        "errors": 0,
+        "elapsed": 0.0,
+        "files": []
+    }
+
+    if not files:
+        print(json.dumps(summary, ensure_ascii=False))
+        return 2
+    output_folder.mkdir(parents=True, exist_ok=True)
+
+    history = open_history(args)
+
+    def on_progress(done: int, filepath: str, output: Optional[str], error: Optional[BaseException]):
+        if history:
+            history.add(filepath, output or "", args.format, error is None)
+        summary["files"].append({
+            "input": filepath,
+            "output": output,
+            "success": error is None,
+            "error": None if error is None else describe_error(error)
+        })
+        if not args.quiet:
+            status = "ok" if error is None else "erreur"
+            print(f"[{done}/{len(files)}] {status} {filepath}", file=sys.stderr)
+
+    metrics = MetricsCollector(profile=bool(args.profile)) if args.metrics or args.profile else None
+
+    start = time.perf_counter()
+    scheduler = ConversionScheduler(output_folder, workers=args.jobs,
+                                    document_batch_size=args.batch_size,
+                                    use_cache=not args.no_cache, cache_link=args.cache_link,
+                                    metrics=metrics, pipeline=args.pipeline,
+                                    max_decoded=args.max_decoded, vectorize=args.vectorize)
+    summary["success"], summary["errors"] = scheduler.run(
+        files, args.format, options_from_args(args), on_progress=on_progress
+    )
+    summary["elapsed"] = round(time.perf_counter() - start, 3)
+    if not args.no_cache:
+        summary["cache"] = get_cache().stats()
+    if history:
+        history.close()
+    if metrics is not None:
+        summary["stages"] = metrics.summary()
+        if args.metrics:
+            metrics.export(os.path.expanduser(args.metrics))
+        if args.profile and metrics.has_profile():
+            metrics.write_profile(os.path.expanduser(args.profile))
+
+    print(json.dumps(summary, ensure_ascii=False))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Moteur de conversion
+Logique de conversion indépendante de l'interface graphique
+"""
+
+import importlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from functools import partial
+from pathlib import Path
+# ProcessPoolExecutor (et multiprocessing) importé au premier pool de processus
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import TYPE_CHECKING, List, Dict, Optional, Callable, Set, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+from documents import convert_document, convert_documents_batch, batching_available, plan_batches
+from media import ProgressCallback, convert_video, run_ffmpeg
+from cache import CACHE_DIR, CACHE_MAX_BYTES, get_cache
+from archives import DEFAULT_LEVEL, archive_stem, create_zip, extract_archive
+from pdf_tools import images_to_pdf
+from metrics import MetricsCollector, measured, run_process, stage
+from text_stream import DATA_FORMATS, can_stream, convert_text
+
+IMAGE_FORMATS = ["png", "jpg", "jpeg", "gif", "tiff", "webp", "heic"]
+PDF_IMAGE_SOURCES = ["png", "jpg", "jpeg", "gif", "tiff", "webp"]
+DOCUMENT_FORMATS = ["pdf", "docx", "txt", "html"]
+FORMATS = IMAGE_FORMATS + ["pdf", "docx", "txt", "html", "mp3", "wav", "aac", "flac", "m4a",
+                           "mp4", "mov", "mkv", "zip", "unzip"] + DATA_FORMATS
+
+
+# Images de plus de TILED_THRESHOLD pixels : lues et écrites par bandes (tiled.py).
+# Sous le seuil d'alerte de Pillow (89 Mpx), pour ne jamais l'atteindre
+TILED_THRESHOLD = 80_000_000
+
+
+class ConversionOptions:
+    """Options de conversion"""
+    def __init__(self):
+        self.quality = 85
+        self.resize_width = None
+        self.resize_height = None
+        self.keep_aspect_ratio = True
+        self.bitrate_audio = "256k"
+        self.prefix = ""
+        self.suffix = ""
+        self.compression_level = DEFAULT_LEVEL
+        self.extract_patterns: List[str] = []
+        # Image → PDF : toutes les images dans un seul PDF, JPEG recopiés tels quels
+        self.merge_pdf = False
+        self.jpeg_passthrough = True
+        # Images : plusieurs tailles / formats depuis un seul décodage
+        self.renditions: List[Rendition] = []
+        # Seuil du traitement par bandes, en pixels (0 : jamais)
+        self.tiled_threshold = TILED_THRESHOLD
+        # Animations : images identiques consécutives fusionnées
+        self.drop_duplicate_frames = False
+        # Fond des images transparentes enregistrées sans transparence (JPEG, PDF)
+        self.background: Tuple[int, int, int] = (255, 255, 255)
+
+
+class Rendition:
+    """Cible d'un export multi-résolution
+
+    size : grand côté en pixels (jamais agrandi), fmt : format (None =
+    format de la conversion), quality : qualité JPEG / WebP (None =
+    qualité de la conversion pour le JPEG, défaut Pillow pour le WebP).
+    """
+    def __init__(self, size: int, fmt: Optional[str] = None, quality: Optional[int] = None):
+        self.size = size
+        self.fmt = fmt
+        self.quality = quality
+
+    @property
+    def tag(self) -> str:
+        """Suffixe du fichier de sortie"""
+        return f"_{self.size}"
+
+    def __repr__(self) -> str:
+        # Forme texte de parse_renditions : sert aussi d'empreinte pour le cache
+        return ":".join(str(v) for v in (self.size, self.fmt or "", self.quality or "")).rstrip(":")
+
+
+def parse_renditions(spec: str) -> List[Rendition]:
+    """Lire des déclinaisons TAILLE[:FORMAT[:QUALITÉ]] séparées par des virgules
+
+    Exemple : 2048,1024:jpg:80,256:webp
+    """
+    renditions = []
+    for item in spec.replace(" ", "").split(","):
+        if not item:
+            continue
+        parts = item.split(":")
+        if len(parts) > 3 or not parts[0].isdigit() or int(parts[0]) < 1:
+            raise ValueError(f"Déclinaison invalide : {item} (attendu TAILLE[:FORMAT[:QUALITÉ]])")
+        fmt = parts[1].lower() if len(parts) > 1 and parts[1] else None
+        if fmt is not None and fmt not in PILLOW_SAVE_FORMATS:
+            raise ValueError(f"Format de déclinaison non géré : {fmt}")
+        quality = parts[2] if len(parts) > 2 else ""
+        if quality and not (quality.isdigit() and 1 <= int(quality) <= 100):
+            raise ValueError(f"Qualité invalide : {item} (1-100)")
+        renditions.append(Rendition(int(parts[0]), fmt, int(quality) if quality else None))
+    return renditions
+
+
+def default_output_path(input_path: str, fmt: str, output_folder: Path,
+                        opts: Optional[ConversionOptions] = None, tag: str = "") -> Path:
+    """Chemin de sortie avant résolution des conflits (nom, préfixe, suffixe, déclinaison)"""
+    path = Path(input_path)
+    stem = f"{opts.prefix}{path.stem}{opts.suffix}{tag}" if opts else f"{path.stem}{tag}"
+    return output_folder / f"{stem}.{fmt}"
+
+
+def output_path_for(input_path: str, fmt: str, output_folder: Path, reserved: Optional[Set[Path]] = None,
+                    opts: Optional[ConversionOptions] = None, tag: str = "") -> Path:
+    """Chemin de sortie libre (ajoute (n) en cas de conflit) ; tag : suffixe d'une déclinaison"""
+    output = default_output_path(input_path, fmt, output_folder, opts, tag)
+    stem = output.stem
+
+    # Éviter conflits
+    c = 1
+    while output.exists() or (reserved is not None and output in reserved):
+        output = output_folder / f"{stem} ({c}).{fmt}"
+        c += 1
+
+    if reserved is not None:
+        reserved.add(output)
+    return output
+
+
+# Plugin Pillow de chaque format. Les importer un par un évite Image.init(),
+# qui charge la quarantaine de plugins dès qu'un format sort des 5 de base
+PILLOW_PLUGINS = {
+    "png": "PngImagePlugin", "jpg": "JpegImagePlugin", "jpeg": "JpegImagePlugin",
+    "gif": "GifImagePlugin", "tiff": "TiffImagePlugin", "tif": "TiffImagePlugin",
+    "webp": "WebPImagePlugin", "bmp": "BmpImagePlugin", "pdf": "PdfImagePlugin",
+}
+
+
+def load_pillow_plugins(*formats: str):
+    """Charger les plugins Pillow des formats donnés (extensions sans point)
+
+    Un format inconnu est ignoré : Image.open() / save() chargent alors
+    tous les plugins d'eux-mêmes, comme avant.
+    """
+    for fmt in formats:
+        name = PILLOW_PLUGINS.get(fmt.lower())
+        if name:
+            try:
+                importlib.import_module(f"PIL.{name}")
+            except ImportError:
+                # Plugin sans son module natif (WebP) : Pillow gérera l'erreur
+                pass
+
+
+# Marge de décodage réduit : on décode au moins à 2× la taille cible,
+# le rééchantillonnage LANCZOS final garde ainsi toute sa qualité
+DRAFT_GAP = 2.0
+
+
+def open_image(input_path: str, target_size: Optional[Tuple[int, int]] = None,
+               data: Optional[bytes] = None):
+    """Ouvrir une image, décodée à taille réduite si la cible est bien plus petite
+
+    Pour les JPEG, draft() laisse libjpeg décoder directement à 1/2, 1/4
+    ou 1/8 de la résolution : moins de pixels décodés, moins de mémoire.
+    data : contenu déjà lu (pipeline), input_path ne sert alors qu'au format.
+    """
+    # Import tardif : le CLI ne paie Pillow que s'il convertit des images
+    from PIL import Image
+    load_pillow_plugins(Path(input_path).suffix[1:])
+    img = Image.open(io.BytesIO(data) if data is not None else input_path)
+    if target_size:
+        w, h = target_size
+        if img.width >= w * DRAFT_GAP and img.height >= h * DRAFT_GAP:
+            img.draft(None, (int(w * DRAFT_GAP), int(h * DRAFT_GAP)))
+    return img
+
+
+def resize_image(img, size: Tuple[int, int]):
+    """Redimensionnement LANCZOS, précédé d'une réduction rapide par blocs"""
+    from PIL import Image
+    # reducing_gap : réduction entière (reduce) avant le filtre final
+    return img.resize(size, Image.Resampling.LANCZOS, reducing_gap=DRAFT_GAP + 1)
+
+
+def image_target_size(fmt: str, opts: ConversionOptions) -> Optional[Tuple[int, int]]:
+    """Taille demandée (largeur et hauteur) ; l'image → PDF garde sa taille"""
+    if fmt in IMAGE_FORMATS and opts.resize_width and opts.resize_height:
+        return (opts.resize_width, opts.resize_height)
+    return None
+
+
+def prepare_image(img, fmt: str, opts: ConversionOptions):
+    """Redimensionner et convertir le mode pour le format cible"""
+    size = image_target_size(fmt, opts)
+    if size:
+        with stage("resize"):
+            img = resize_image(img, size)
+    return flatten_for_format(img, fmt, opts)
+
+
+def flatten_image(img, background: Tuple[int, int, int]):
+    """Image RGB composée sur un fond uni (la transparence n'est pas simplement ignorée)"""
+    from PIL import Image
+    if not img.has_transparency_data:
+        return img.convert("RGB")
+    img = img.convert("RGBA")
+    return Image.alpha_composite(Image.new("RGBA", img.size, background + (255,)), img).convert("RGB")
+
+
+def flatten_for_format(img, fmt: str, opts: ConversionOptions):
+    """JPEG et PDF n'ont pas de transparence : image aplatie sur opts.background"""
+    if (fmt in ["jpg", "jpeg"] and img.mode in ["RGBA", "LA", "P"]) or (fmt == "pdf" and img.mode == "RGBA"):
+        with stage("convert"):
+            img = flatten_image(img, tuple(opts.background))
+    return img
+
+
+# Encodeur Pillow par format cible (nécessaire pour écrire dans un BytesIO)
+PILLOW_SAVE_FORMATS = {
+    "jpg": "JPEG", "jpeg": "JPEG", "png": "PNG", "gif": "GIF",
+    "tiff": "TIFF", "webp": "WEBP", "pdf": "PDF",
+}
+
+
+def save_image(img, target, fmt: str, opts: ConversionOptions, quality: Optional[int] = None):
+    """Encoder vers un chemin ou un fichier ouvert (BytesIO)
+
+    quality : remplace opts.quality (JPEG) ; pour le WebP, seulement si donnée.
+    """
+    load_pillow_plugins(fmt)
+    if fmt in ["jpg", "jpeg"]:
+        img.save(target, "JPEG", quality=quality or opts.quality)
+    elif fmt == "pdf":
+        img.save(target, "PDF", resolution=100.0)
+    elif fmt == "webp" and quality:
+        img.save(target, "WEBP", quality=quality)
+    else:
+        img.save(target, PILLOW_SAVE_FORMATS[fmt])
+
+
+def fit_size(width: int, height: int, size: int) -> Tuple[int, int]:
+    """Dimensions dont le grand côté vaut au plus size (proportions gardées)"""
+    scale = size / max(width, height)
+    if scale >= 1:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def rendition_outputs(input_path: str, fmt: str, opts: ConversionOptions, output_folder: Path,
+                      reserved: Optional[Set[Path]] = None) -> List[Path]:
+    """Une sortie par déclinaison, dans l'ordre de opts.renditions"""
+    return [output_path_for(input_path, r.fmt or fmt, output_folder, reserved, opts, r.tag)
+            for r in opts.renditions]
+
+
+def convert_renditions(input_path: str, fmt: str, opts: ConversionOptions, outputs: List[Path],
+                       cancel_event: Optional[threading.Event] = None) -> str:
+    """Écrire toutes les déclinaisons d'une image décodée une seule fois
+
+    Les tailles sont produites de la plus grande à la plus petite, chacune
+    réduite depuis la précédente (moins de pixels à filtrer à chaque pas) ;
+    les déclinaisons de même taille partagent la réduction. Renvoie la
+    première sortie ; en cas d'erreur ou d'annulation (cancel_event, vérifié
+    entre deux déclinaisons), les sorties déjà écrites sont supprimées.
+    """
+    path = Path(input_path)
+    targets = sorted(zip(opts.renditions, outputs), key=lambda t: t[0].size, reverse=True)
+    largest = targets[0][0].size
+    written: List[Path] = []
+    try:
+        with stage("open", path):
+            img = open_image(input_path, (largest, largest))
+        with stage("decode"):
+            img.load()
+        # Proportions de la source : img.size peut être réduit par draft()
+        width, height = img.size
+        for rendition, output in targets:
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Conversion annulée")
+            size = fit_size(width, height, rendition.size)
+            if size != img.size:
+                with stage("resize"):
+                    img = resize_image(img, size)
+            target_fmt = rendition.fmt or fmt
+            frame = flatten_for_format(img, target_fmt, opts)
+            with stage("save", output):
+                save_image(frame, str(output), target_fmt, opts, rendition.quality)
+            written.append(output)
+    except BaseException:
+        # Pas de jeu de déclinaisons incomplet sur le disque
+        for output in written:
+            if output.is_file():
+                output.unlink()
+        raise
+    return str(outputs[0])
+
+
+def is_pillow_job(input_path: str, fmt: str) -> bool:
+    """La conversion se fait-elle entièrement avec Pillow (CPU) ?"""
+    ext = Path(input_path).suffix.lower()[1:]
+    if fmt in IMAGE_FORMATS:
+        return fmt != "heic"
+    return fmt == "pdf" and ext in PDF_IMAGE_SOURCES
+
+
+def is_document_job(input_path: str, fmt: str) -> bool:
+    """La conversion passe-t-elle par soffice / pandoc ?"""
+    return fmt in DOCUMENT_FORMATS and not is_pillow_job(input_path, fmt) and not can_stream(input_path, fmt)
+
+
+def convert_file(input_path: str, fmt: str, opts: ConversionOptions, output_folder: Path,
+                 output: Optional[Path] = None, on_progress: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None) -> str:
+    """Convertir un fichier ; renvoie le chemin de sortie
+
+    on_progress / cancel_event ne servent qu'aux conversions ffmpeg, aux
+    archives, au texte en flux et aux images géantes (avancement en continu,
+    interruption en cours de fichier) ; cancel_event aussi aux déclinaisons
+    et aux documents convertis par soffice.
+    """
+    path = Path(input_path)
+    if output is None:
+        output = output_path_for(input_path, fmt, output_folder, opts=opts)
+    # Import tardif : tiled et frames importent ce module
+    from frames import keeps_frames, save_frames
+    from tiled import convert_tiled, needs_tiling
+
+    # Images (et image → PDF)
+    if fmt == "heic":
+        run_process(["sips", "-s", "format", "heic", input_path, "--out", str(output)])
+
+    elif opts.renditions and fmt in IMAGE_FORMATS:
+        return convert_renditions(input_path, fmt, opts, rendition_outputs(input_path, fmt, opts, output_folder),
+                                  cancel_event)
+
+    elif is_pillow_job(input_path, fmt) and needs_tiling(input_path, fmt, opts):
+        convert_tiled(input_path, fmt, opts, output, on_progress, cancel_event)
+
+    elif is_pillow_job(input_path, fmt):
+        with stage("open", path):
+            img = open_image(input_path, image_target_size(fmt, opts))
+        with stage("decode"):
+            img.load()
+        if keeps_frames(img, fmt):
+            # Animation ou multipage : toutes les images, une à la fois
+            with stage("save", output):
+                save_frames(img, str(output), fmt, opts)
+        else:
+            img = prepare_image(img, fmt, opts)
+            with stage("save", output):
+                save_image(img, str(output), fmt, opts)
+
+    # Audio
+    elif fmt in ["mp3", "wav", "aac", "flac", "m4a"]:
+        cmd = ["ffmpeg", "-i", input_path, "-y"]
+        if fmt == "mp3":
+            cmd += ["-codec:a", "libmp3lame", "-b:a", opts.bitrate_audio]
+        elif fmt == "wav":
+            cmd += ["-codec:a", "pcm_s16le"]
+        elif fmt in ["aac", "m4a"]:
+            cmd += ["-codec:a", "aac", "-b:a", opts.bitrate_audio]
+        elif fmt == "flac":
+            cmd += ["-codec:a", "flac"]
+        cmd.append(str(output))
+        run_ffmpeg(cmd, on_progress=on_progress, cancel_event=cancel_event)
+
+    # Vidéo : copie des flux si possible, sinon réencodage
+    elif fmt in ["mp4", "mov", "mkv"]:
+        convert_video(input_path, str(output), fmt, on_progress=on_progress, cancel_event=cancel_event)
+
+    # Archives : avancement entrée par entrée
+    elif fmt in ["zip", "unzip"]:
+        def on_entry(done: int, total: int, name: str):
+            if on_progress and total:
+                on_progress(done / total, None, None)
+
+        if fmt == "zip":
+            with stage("compress", output):
+                create_zip([path], output, level=opts.compression_level,
+                           on_entry=on_entry, cancel_event=cancel_event)
+        else:
+            output = output_folder / archive_stem(path)
+            with stage("extract", path):
+                extract_archive(path, output, opts.extract_patterns,
+                                on_entry=on_entry, cancel_event=cancel_event)
+
+    # Texte simple (txt, md, html, csv) : en flux, sans outil externe
+    elif can_stream(input_path, fmt):
+        with stage("stream", output):
+            convert_text(input_path, fmt, output, on_progress=on_progress, cancel_event=cancel_event)
+
+    elif fmt in DATA_FORMATS:
+        raise ValueError(f"{fmt.upper()} : seuls les fichiers CSV sont pris en charge")
+
+    # Documents
+    elif fmt in DOCUMENT_FORMATS:
+        with stage("document", path):
+            output = convert_document(input_path, fmt, output, output_folder, cancel_event)
+
+    return str(output)
+
+
+def convert_cached(cache_settings: Optional[tuple], input_path: str, fmt: str, opts: ConversionOptions,
+                   output_folder: Path, output: Path, on_progress: Optional[ProgressCallback] = None,
+                   cancel_event: Optional[threading.Event] = None) -> str:
+    """convert_file précédé d'une recherche dans le cache de conversions
+
+    cache_settings = (dossier, taille max, liens physiques) ou None.
+    Un cache illisible ne bloque jamais la conversion.
+    """
+    # Déclinaisons : plusieurs sorties, le cache n'en garde qu'une
+    if cache_settings is None or fmt == "unzip" or (opts.renditions and fmt in IMAGE_FORMATS):
+        return convert_file(input_path, fmt, opts, output_folder, output, on_progress, cancel_event)
+
+    try:
+        with stage("cache-lookup"):
+            cache = get_cache(*cache_settings)
+            key = cache.key(input_path, fmt, opts)
+            hit = cache.fetch(key, output, default_output_path(input_path, fmt, output.parent, opts))
+    except (OSError, sqlite3.Error):
+        cache = hit = None
+    if hit:
+        return hit
+
+    result = convert_file(input_path, fmt, opts, output_folder, output, on_progress, cancel_event)
+    if cache is not None:
+        try:
+            with stage("cache-store"):
+                cache.store(key, Path(result))
+        except (OSError, sqlite3.Error):
+            pass
+    return result
+
+
+class ConversionScheduler:
+    """Planificateur de conversions parallèles
+
+    Les conversions Pillow (CPU) partent dans un pool de processus,
+    les appels ffmpeg / soffice / pandoc dans un pool de threads borné.
+    Sans pool LibreOffice, les documents sont convertis par lots de
+    document_batch_size fichiers par appel soffice. Avec un
+    MetricsCollector, chaque tâche relève la durée de ses étapes.
+    Avec pipeline=True, les lots d'images passent plutôt par un
+    ImagePipeline (lecture, décodage, écriture recouverts ; au plus
+    max_decoded images décodées à la fois). Avec vectorize=True (et
+    NumPy), les images de même taille à réduire ou aplatir sont
+    converties par paquets (batch.py).
+    """
+
+    def __init__(self, output_folder: Path, workers: Optional[int] = None,
+                 subprocess_workers: Optional[int] = None, document_batch_size: int = 20,
+                 use_cache: bool = False, cache_link: bool = False,
+                 metrics: Optional[MetricsCollector] = None, pipeline: bool = False,
+                 max_decoded: Optional[int] = None, vectorize: bool = False):
+        self.output_folder = Path(output_folder)
+        self.metrics = metrics
+        self.pipeline = pipeline
+        self.max_decoded = max_decoded
+        self.vectorize = vectorize
+        # Réglages transmis tels quels aux workers (la connexion SQLite ne se sérialise pas)
+        self.cache_settings = (CACHE_DIR, CACHE_MAX_BYTES, cache_link) if use_cache else None
+        self.document_batch_size = max(1, document_batch_size)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # ffmpeg est déjà multi-thread : inutile d'en lancer autant que de cœurs
+        self.subprocess_workers = max(1, subprocess_workers or min(self.workers, 2))
+        self._process_pool: Optional["ProcessPoolExecutor"] = None
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+
+    def _get_process_pool(self) -> "ProcessPoolExecutor":
+        if self._process_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn : pas de fork d'un processus qui fait tourner Tk
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.subprocess_workers,
+                thread_name_prefix="convert"
+            )
+        return self._thread_pool
+
+    def _submit(self, pool, func: Callable, *args) -> Future:
+        if self.metrics is None:
+            return pool.submit(func, *args)
+        return pool.submit(measured, self.metrics.profile, time.time(), func, *args)
+
+    def run(self, files: List[str], fmt: str, opts: ConversionOptions,
+            on_progress: Optional[Callable[[int, str, Optional[str], Optional[BaseException]], None]] = None,
+            is_cancelled: Optional[Callable[[], bool]] = None,
+            on_file_progress: Optional[Callable[[str, float, Optional[float], Optional[float]], None]] = None
+            ) -> Tuple[int, int]:
+        """Convertir tous les fichiers ; renvoie (succès, erreurs)
+
+        on_progress(terminés, fichier, sortie, erreur) est appelé depuis le
+        thread appelant à chaque fichier terminé, dans l'ordre d'achèvement.
+        on_file_progress(fichier, fraction, vitesse, eta) est appelé depuis
+        les threads de conversion pendant les encodages ffmpeg.
+        """
+        success = errors = done = 0
+        cancel_event = threading.Event()
+        # future → (fichiers et sorties, conversion groupée ?)
+        pending: Dict[Future, Tuple[List[Tuple[str, Path]], bool]] = {}
+        reserved: Set[Path] = set()
+
+        # Images → un seul PDF : une tâche pour toutes les pages
+        pages = [f for f in files if is_pillow_job(f, fmt)] if fmt == "pdf" and opts.merge_pdf else []
+        merge_pages = len(pages) > 1
+
+        # Un pool de processus ne vaut le coût de démarrage qu'à partir de 2 images
+        pillow_jobs = 0 if merge_pages else sum(1 for f in files if is_pillow_job(f, fmt))
+        # Déclinaisons : une tâche par source, toutes ses sorties d'un coup
+        use_renditions = bool(opts.renditions) and fmt in IMAGE_FORMATS
+        use_pipeline = self.pipeline and pillow_jobs > 1 and not use_renditions
+        use_processes = not use_pipeline and self.workers > 1 and pillow_jobs > 1
+        image_pipeline = None
+        # Futures du pipeline : résultat direct, étapes relevées par le pipeline lui-même
+        direct: Set[Future] = set()
+
+        # Paquets NumPy : images de même taille, une tâche par paquet
+        stacks: List[List[str]] = []
+        if self.vectorize and pillow_jobs > 1 and not use_renditions and not use_pipeline:
+            from batch import numpy_available, plan_stacks
+            if numpy_available():
+                stacks = plan_stacks([f for f in files if is_pillow_job(f, fmt)], fmt, opts, self.workers)
+        stacked = {f for stack in stacks for f in stack}
+
+        documents = [f for f in files if is_document_job(f, fmt)]
+        use_batches = self.document_batch_size > 1 and len(documents) > 1 and batching_available()
+
+        try:
+            singles = [f for f in files if not (use_batches and is_document_job(f, fmt))
+                       and not (merge_pages and is_pillow_job(f, fmt)) and f not in stacked]
+            pipelined: List[Tuple[str, Path]] = []
+            for filepath in singles:
+                if use_renditions and is_pillow_job(filepath, fmt):
+                    outputs = rendition_outputs(filepath, fmt, opts, self.output_folder, reserved)
+                    if use_processes:
+                        future = self._submit(self._get_process_pool(), convert_renditions, filepath, fmt, opts, outputs)
+                    else:
+                        # Interruption entre deux déclinaisons (l'événement ne passe pas aux processus)
+                        future = self._submit(self._get_thread_pool(), convert_renditions, filepath, fmt, opts,
+                                              outputs, cancel_event)
+                    pending[future] = ([(filepath, outputs[0])], False)
+                    continue
+                # Sorties réservées ici : les workers ne se marchent pas dessus
+                output = output_path_for(filepath, fmt, self.output_folder, reserved, opts)
+                if use_pipeline and is_pillow_job(filepath, fmt):
+                    pipelined.append((filepath, output))
+                    continue
+                if use_processes and is_pillow_job(filepath, fmt):
+                    future = self._submit(
+                        self._get_process_pool(), convert_cached, self.cache_settings, filepath, fmt, opts, self.output_folder, output
+                    )
+                else:
+                    progress = partial(on_file_progress, filepath) if on_file_progress else None
+                    future = self._submit(
+                        self._get_thread_pool(), convert_cached, self.cache_settings, filepath, fmt, opts, self.output_folder, output,
+                        progress, cancel_event
+                    )
+                pending[future] = ([(filepath, output)], False)
+
+            if pipelined:
+                from pipeline import ImagePipeline
+                image_pipeline = ImagePipeline(
+                    fmt, opts, self.max_decoded or self.workers,
+                    cache_settings=self.cache_settings, metrics=self.metrics
+                )
+                for entry, future in zip(pipelined, image_pipeline.start(pipelined, cancel_event)):
+                    pending[future] = ([entry], False)
+                    direct.add(future)
+
+            if stacks:
+                from batch import convert_stack
+                pool = self._get_process_pool() if use_processes else self._get_thread_pool()
+                for stack in stacks:
+                    entries = [(f, output_path_for(f, fmt, self.output_folder, reserved, opts)) for f in stack]
+                    future = self._submit(
+                        pool, convert_stack, stack, fmt, opts, [o for _, o in entries], self.output_folder,
+                        self.cache_settings
+                    )
+                    pending[future] = (entries, True)
+
+            if use_batches:
+                for indices in plan_batches(documents, self.document_batch_size):
+                    entries = [
+                        (documents[i], output_path_for(documents[i], fmt, self.output_folder, reserved, opts))
+                        for i in indices
+                    ]
+                    future = self._submit(
+                        self._get_thread_pool(), convert_documents_batch,
+                        [f for f, _ in entries], fmt, [o for _, o in entries], self.output_folder, cancel_event
+                    )
+                    pending[future] = (entries, True)
+
+            if merge_pages:
+                output = output_path_for(pages[0], fmt, self.output_folder, reserved, opts)
+                size = (opts.resize_width, opts.resize_height) if opts.resize_width and opts.resize_height else None
+
+                # Plugins des pages chargés ici, une fois pour tout le PDF
+                load_pillow_plugins(*{Path(f).suffix[1:] for f in pages})
+
+                def on_page(done: int, total: int):
+                    if on_file_progress:
+                        on_file_progress(pages[0], done / total, None, None)
+
+                future = self._submit(
+                    self._get_thread_pool(), images_to_pdf, pages, output, opts.quality, opts.jpeg_passthrough, size,
+                    on_page, cancel_event, tuple(opts.background)
+                )
+                pending[future] = ([(f, output) for f in pages], True)
+
+            while pending:
+                if is_cancelled and is_cancelled():
+                    # En attente : annulés ; ffmpeg en cours : interrompu
+                    cancel_event.set()
+                    for future in pending:
+                        future.cancel()
+
+                finished, _ = wait(list(pending), timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    entries, batched = pending.pop(future)
+                    if future.cancelled():
+                        continue
+
+                    error = future.exception()
+                    value = future.result() if error is None else None
+                    if self.metrics is not None and future not in direct:
+                        measurement = getattr(error, "measurement", None)
+                        if error is None:
+                            value, measurement = value
+                        if measurement is not None:
+                            self.metrics.add([f for f, _ in entries], fmt, measurement)
+
+                    if isinstance(error, InterruptedError):
+                        # Interrompu par l'annulation : ni succès ni erreur
+                        for _, output in entries:
+                            if output.is_file():
+                                output.unlink()
+                        continue
+                    if error is not None:
+                        results = [(None, error)] * len(entries)
+                    elif batched:
+                        results = value
+                    else:
+                        results = [(value, None)]
+
+                    for (filepath, _), (result, error) in zip(entries, results):
+                        if error is None:
+                            success += 1
+                        else:
+                            errors += 1
+                        done += 1
+                        if on_progress:
+                            on_progress(done, filepath, result, error)
+        finally:
+            if image_pipeline is not None:
+                # Sortie sur exception : arrêter les étages avant de les attendre
+                if pending:
+                    cancel_event.set()
+                image_pipeline.join()
+            self.shutdown()
+            if self.metrics is not None:
+                self.metrics.finish()
+
+        return success, errors
+
+    def shutdown(self):
+        """Arrêter les pools (les tâches en attente sont annulées)"""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True, cancel_futures=True)
+            self._thread_pool = None
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Conversion de documents
+Pool de processus LibreOffice persistants pilotés par UNO
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+SOFFICE = "/Applications/LibreOffice.app/Contents/MacOS/soffice"
+
+# Filtres d'export LibreOffice selon le type de document source
+EXPORT_FILTERS = {
+    "pdf": {
+        "com.sun.star.text.TextDocument": "writer_pdf_Export",
+        "com.sun.star.sheet.SpreadsheetDocument": "calc_pdf_Export",
+        "com.sun.star.presentation.PresentationDocument": "impress_pdf_Export",
+        "com.sun.star.drawing.DrawingDocument": "draw_pdf_Export",
+    },
+    "docx": {"com.sun.star.text.TextDocument": "MS Word 2007 XML"},
+    "txt": {"com.sun.star.text.TextDocument": "Text"},
+    "html": {
+        "com.sun.star.text.TextDocument": "HTML (StarWriter)",
+        "com.sun.star.sheet.SpreadsheetDocument": "HTML (StarCalc)",
+    },
+}
+
+# Délai par document (s) : au-delà, soffice est tué ; un lot dispose d'autant de fois ce délai
+DOCUMENT_TIMEOUT = 120.0
+# Intervalle de vérification de l'annulation pendant un lot (s)
+CANCEL_POLL = 0.2
+
+# Une seule instance soffice ponctuelle à la fois : le profil utilisateur est partagé
+_soffice_lock = threading.Lock()
+
+
+def find_soffice() -> Optional[str]:
+    """Chemin de l'exécutable LibreOffice, s'il est installé"""
+    if os.path.exists(SOFFICE):
+        return SOFFICE
+    return shutil.which("soffice") or shutil.which("libreoffice")
+
+
+def uno_available() -> bool:
+    """Le module uno (Python de LibreOffice) est-il importable ?"""
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _property(name: str, value):
+    from com.sun.star.beans import PropertyValue
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class SofficeWorker:
+    """Processus soffice persistant avec son propre profil utilisateur"""
+
+    def __init__(self, soffice: str, index: int, startup_timeout: float = 30.0):
+        self.soffice = soffice
+        self.pipe_name = f"format_converter_{os.getpid()}_{index}"
+        self.profile_dir = Path(tempfile.mkdtemp(prefix=f"fc_soffice_{index}_"))
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.desktop = None
+
+    def start(self):
+        """Lancer soffice en écoute et s'y connecter"""
+        import uno
+
+        self.process = subprocess.Popen([
+            self.soffice, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+            f"-env:UserInstallation={self.profile_dir.as_uri()}",
+            f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local
+        )
+        url = f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+
+        # Le premier démarrage (création du profil) peut prendre plusieurs secondes
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"soffice s'est arrêté au démarrage (code {self.process.returncode})")
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.kill()
+                    raise TimeoutError("soffice ne répond pas")
+                time.sleep(0.25)
+
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+    def is_healthy(self) -> bool:
+        """Processus vivant et pont UNO fonctionnel"""
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getComponents()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, input_path: str, fmt: str, output: Path):
+        """Charger le document, l'exporter, le fermer"""
+        import uno
+
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(input_path)), "_blank", 0,
+            (_property("Hidden", True), _property("ReadOnly", True))
+        )
+        if doc is None:
+            raise RuntimeError(f"LibreOffice ne peut pas ouvrir {input_path}")
+        try:
+            filters = EXPORT_FILTERS.get(fmt, {})
+            filter_name = next((f for service, f in filters.items() if doc.supportsService(service)), None)
+            if filter_name is None:
+                raise ValueError(f"Export {fmt} non pris en charge pour {Path(input_path).name}")
+            doc.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(str(output))),
+                (_property("FilterName", filter_name), _property("Overwrite", True))
+            )
+        finally:
+            try:
+                doc.close(True)
+            except Exception:
+                pass
+
+    def kill(self):
+        self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self.process = None
+
+    def stop(self):
+        """Arrêt propre puis suppression du profil"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self.kill()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class SofficePool:
+    """Pool de processus LibreOffice persistants
+
+    Chaque worker garde son instance et son profil entre deux documents :
+    le coût de démarrage n'est payé qu'une fois. Un worker planté ou
+    bloqué au-delà du délai par document est tué puis relancé.
+    """
+
+    def __init__(self, size: int = 2, timeout: float = DOCUMENT_TIMEOUT, soffice: Optional[str] = None):
+        self.soffice = soffice or find_soffice()
+        self.timeout = timeout
+        self._workers: List[SofficeWorker] = [SofficeWorker(self.soffice, i) for i in range(max(1, size))]
+        self._idle: "queue.Queue[SofficeWorker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def convert(self, input_path: str, fmt: str, output: Path) -> str:
+        """Convertir un document avec le premier worker libre"""
+        worker = self._idle.get()
+        try:
+            if not worker.is_healthy():
+                worker.kill()
+                worker.start()
+
+            # Délai par document : soffice est tué s'il ne répond plus
+            timed_out = threading.Event()
+
+            def on_timeout():
+                timed_out.set()
+                worker.kill()
+
+            timer = threading.Timer(self.timeout, on_timeout)
+            timer.start()
+            try:
+                worker.convert(input_path, fmt, output)
+            except Exception:
+                if timed_out.is_set():
+                    raise TimeoutError(f"Conversion de {Path(input_path).name} interrompue après {self.timeout:.0f} s")
+                # Pont UNO cassé : le worker sera relancé au prochain document
+                if not worker.is_healthy():
+                    worker.kill()
+                raise
+            finally:
+                timer.cancel()
+            return str(output)
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+
+
+_pool: Optional[SofficePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size: int = 2) -> Optional[SofficePool]:
+    """Pool partagé, ou None si LibreOffice/uno n'est pas disponible"""
+    global _pool
+    with _pool_lock:
+        if _pool is None and find_soffice() and uno_available():
+            _pool = SofficePool(size)
+            atexit.register(_pool.close)
+        return _pool
+
+
+def batching_available() -> bool:
+    """Conversions groupées possibles : soffice présent mais pas de pool UNO"""
+    return find_soffice() is not None and get_pool() is None
+
+
+def plan_batches(inputs: List[str], batch_size: int) -> List[List[int]]:
+    """Découper les documents en lots (indices), sans deux noms identiques par lot
+
+    soffice nomme ses sorties d'après le nom du fichier source : deux
+    « rapport.docx » dans un même appel s'écraseraient.
+    """
+    batches: List[List[int]] = []
+    stems: List[set] = []
+    for i, input_path in enumerate(inputs):
+        stem = Path(input_path).stem
+        for batch, seen in zip(batches, stems):
+            if len(batch) < batch_size and stem not in seen:
+                batch.append(i)
+                seen.add(stem)
+                break
+        else:
+            batches.append([i])
+            stems.append({stem})
+    return batches
+
+
+def _kill_session(proc: subprocess.Popen):
+    """Tuer un soffice ponctuel et ses processus enfants"""
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except OSError:
+        pass
+    try:
+        proc.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+def convert_documents_batch(inputs: List[str], fmt: str, outputs: List[Path], output_folder: Path,
+                            cancel_event: Optional[threading.Event] = None
+                            ) -> List[Tuple[Optional[str], Optional[BaseException]]]:
+    """Convertir plusieurs documents en un seul appel soffice
+
+    Les sorties sont produites dans un dossier temporaire puis renommées
+    vers les chemins réservés (renommage « (n) » compris). Renvoie
+    (sortie, erreur) pour chaque document, dans l'ordre des entrées.
+    soffice est tué au-delà de DOCUMENT_TIMEOUT secondes par document
+    (TimeoutError) ou à l'annulation (InterruptedError).
+    """
+    soffice = find_soffice()
+    if soffice is None:
+        raise RuntimeError("LibreOffice n'est pas installé")
+
+    results: List[Tuple[Optional[str], Optional[BaseException]]] = []
+    timeout = DOCUMENT_TIMEOUT * len(inputs)
+    # Dossier temporaire sur le même disque : renommage atomique
+    with tempfile.TemporaryDirectory(prefix=".fc_batch_", dir=str(output_folder)) as tmp:
+        # stderr dans un fichier : un processus enfant survivant ne bloque pas l'attente
+        with _soffice_lock, tempfile.TemporaryFile() as errors:
+            # Session à part : le script soffice et soffice.bin sont tués ensemble
+            proc = subprocess.Popen(
+                [soffice, "--headless", "--convert-to", fmt, "--outdir", tmp] + list(inputs),
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=errors,
+                start_new_session=os.name == "posix"
+            )
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    proc.wait(timeout=CANCEL_POLL)
+                    break
+                except subprocess.TimeoutExpired:
+                    cancelled = cancel_event is not None and cancel_event.is_set()
+                    if not cancelled and time.monotonic() < deadline:
+                        continue
+                    # Verrou rendu seulement une fois soffice arrêté
+                    _kill_session(proc)
+                    if cancelled:
+                        raise InterruptedError("Conversion annulée")
+                    raise TimeoutError(f"Conversion de {len(inputs)} document(s) interrompue après {timeout:.0f} s")
+            errors.seek(0)
+            stderr = errors.read()
+        details = stderr.decode(errors="ignore").strip().splitlines()[-1:] or [f"code {proc.returncode}"]
+
+        # soffice renvoie 0 même si certains fichiers échouent : on vérifie chaque sortie
+        for input_path, output in zip(inputs, outputs):
+            produced = Path(tmp) / f"{Path(input_path).stem}.{fmt}"
+            if produced.exists():
+                os.replace(produced, output)
+                results.append((str(output), None))
+            else:
+                results.append((None, RuntimeError(f"Échec de conversion de {Path(input_path).name} : {details[0]}")))
+    return results
+
+
+def convert_document(input_path: str, fmt: str, output: Path, output_folder: Path,
+                     cancel_event: Optional[threading.Event] = None) -> Path:
+    """Convertir un document (pool LibreOffice, soffice ponctuel ou pandoc)"""
+    pool = get_pool()
+
+    if pool is not None:
+        pool.convert(input_path, fmt, output)
+    elif find_soffice():
+        (_, error), = convert_documents_batch([input_path], fmt, [output], output_folder, cancel_event)
+        if error is not None:
+            raise error
+    elif shutil.which("pandoc"):
+        subprocess.run(["pandoc", input_path, "-o", str(output)],
+                     check=True, capture_output=True)
+    return output
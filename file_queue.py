@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - File d'attente des fichiers
+Ordonnée et indexée par chemin : ajout, doublon, retrait en O(1)
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+
+def _key(path: str) -> str:
+    """Clé de dédoublonnage : chemin absolu normalisé"""
+    return os.path.normpath(os.path.abspath(path))
+
+
+class FileEntry:
+    """Entrée compacte : chemin, extension, taille (lue à la demande), état"""
+    __slots__ = ("path", "ext", "size", "status", "output")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ext = os.path.splitext(path)[1].lower()
+        self.size: Optional[int] = None
+        self.status = PENDING
+        self.output: Optional[str] = None
+
+    def get_size(self) -> Optional[int]:
+        if self.size is None:
+            try:
+                self.size = os.stat(self.path).st_size
+            except OSError:
+                self.size = -1
+        return self.size if self.size >= 0 else None
+
+
+class FileQueue:
+    """File de fichiers ordonnée, indexée par chemin
+
+    Le dictionnaire garde l'ordre d'insertion ; la vue par position
+    (pour l'affichage) est reconstruite une seule fois après une série
+    de modifications.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._entries: Dict[str, FileEntry] = {}
+        self._order: Optional[List[FileEntry]] = None
+        self.add_many(paths)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return _key(path) in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([entry.path for entry in self._entries.values()])
+
+    def __getitem__(self, index: int) -> FileEntry:
+        if self._order is None:
+            self._order = list(self._entries.values())
+        return self._order[index]
+
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self._entries.get(_key(path))
+
+    def paths(self) -> List[str]:
+        """Copie des chemins, dans l'ordre"""
+        return [entry.path for entry in self._entries.values()]
+
+    def add(self, path: str) -> bool:
+        """Ajouter un fichier ; False s'il est déjà dans la file"""
+        key = _key(path)
+        if key in self._entries:
+            return False
+        self._entries[key] = FileEntry(path)
+        self._order = None
+        return True
+
+    def add_many(self, paths: Iterable[str]) -> List[str]:
+        """Ajouter plusieurs fichiers ; renvoie ceux réellement ajoutés"""
+        return [path for path in paths if self.add(path)]
+
+    def remove(self, path: str) -> bool:
+        if self._entries.pop(_key(path), None) is None:
+            return False
+        self._order = None
+        return True
+
+    def remove_many(self, paths: Iterable[str]) -> int:
+        return sum(1 for path in paths if self.remove(path))
+
+    def clear(self):
+        self._entries.clear()
+        self._order = None
+
+    def mark(self, path: str, status: str, output: Optional[str] = None):
+        """Noter le résultat de conversion d'un fichier"""
+        entry = self.get(path)
+        if entry is not None:
+            entry.status = status
+            entry.output = output
+
+    def with_status(self, status: str) -> List[str]:
+        return [entry.path for entry in self._entries.values() if entry.status == status]
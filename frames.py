@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Images animées et multipages
+GIF / WebP / PNG animés, TIFF multipages : toutes les images converties,
+une à la fois, au lieu de la seule première
+
+Chaque image est extraite, redimensionnée et convertie au fil de
+l'encodage ; durées et nombre de boucles sont gardés. Les images
+identiques consécutives peuvent être fusionnées (durées additionnées).
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+from converter import PILLOW_SAVE_FORMATS, ConversionOptions, image_target_size, load_pillow_plugins, prepare_image
+from metrics import stage
+
+# Formats cibles qui gardent toutes les images (les autres : la première seulement)
+MULTIFRAME_FORMATS = ["gif", "webp", "png", "tiff", "pdf"]
+# Formats cibles animés (durées, boucles)
+ANIMATION_FORMATS = ["gif", "webp", "png"]
+# Formats dont l'encodeur Pillow consomme les images au fil de l'eau
+STREAMED_FORMATS = ["gif", "pdf"]
+
+# Animations d'au moins FRAME_POOL_MIN images redimensionnées par un pool de threads
+FRAME_POOL_MIN = 8
+FRAME_WORKERS = 4
+
+
+def is_multiframe(img) -> bool:
+    """Plusieurs images (animation ou pages) ?"""
+    return getattr(img, "n_frames", 1) > 1
+
+
+def keeps_frames(img, fmt: str) -> bool:
+    """La conversion doit-elle passer par save_frames() ?"""
+    return fmt in MULTIFRAME_FORMATS and is_multiframe(img)
+
+
+def _prepare_frame(frame, fmt: str, opts: ConversionOptions):
+    # Palette : redimensionnée en plus proche voisin par Pillow, et les
+    # images suivantes d'un GIF sont déjà en RGB(A) ; même filtre pour toutes
+    if frame.mode == "P" and image_target_size(fmt, opts):
+        frame = frame.convert("RGBA" if "transparency" in frame.info else "RGB")
+    return prepare_image(frame, fmt, opts)
+
+
+def iter_frames(img, fmt: str, opts: ConversionOptions, workers: Optional[int] = None) -> Iterator:
+    """Images redimensionnées et converties, dans l'ordre, une à la fois
+
+    L'extraction est séquentielle (les images d'un GIF dépendent des
+    précédentes) ; avec un redimensionnement et au moins FRAME_POOL_MIN
+    images, la transformation passe par un pool de threads, avec au plus
+    2 × workers images en cours.
+    """
+    count = getattr(img, "n_frames", 1)
+    if workers is None:
+        workers = min(FRAME_WORKERS, os.cpu_count() or 1)
+
+    def extract(index: int):
+        with stage("decode"):
+            img.seek(index)
+            return img.copy()
+
+    if count < FRAME_POOL_MIN or workers < 2 or not image_target_size(fmt, opts):
+        for index in range(count):
+            yield _prepare_frame(extract(index), fmt, opts)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="frames") as pool:
+        window: deque = deque()
+        for index in range(count):
+            window.append(pool.submit(_prepare_frame, extract(index), fmt, opts))
+            if len(window) >= 2 * workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def merge_duplicates(frames: Iterator) -> Iterator:
+    """Fusionner les images identiques consécutives ; la durée de l'image gardée s'allonge"""
+    kept = kept_bytes = None
+    for frame in frames:
+        data = frame.tobytes()
+        if kept is not None and frame.mode == kept.mode and frame.size == kept.size and data == kept_bytes:
+            kept.info["duration"] = kept.info.get("duration", 0) + frame.info.get("duration", 0)
+            continue
+        if kept is not None:
+            yield kept
+        kept, kept_bytes = frame, data
+    if kept is not None:
+        yield kept
+
+
+def _same_mode(frames: list) -> list:
+    """APNG : un seul mode pour toutes les images (un GIF commence en palette, continue en RGB)"""
+    modes = {frame.mode for frame in frames}
+    if len(modes) == 1:
+        return frames
+    alpha = any(frame.has_transparency_data for frame in frames)
+    mode = "RGBA" if alpha else "RGB"
+    with stage("convert"):
+        return [frame if frame.mode == mode else frame.convert(mode) for frame in frames]
+
+
+def save_frames(img, target, fmt: str, opts: ConversionOptions):
+    """Encoder toutes les images vers un chemin ou un fichier ouvert (BytesIO)
+
+    Les images sont produites au fil de l'encodage pour GIF et PDF ; WebP,
+    PNG (APNG) et TIFF ont besoin de la liste complète.
+    """
+    load_pillow_plugins(fmt)
+    # Lu avant d'avancer : chaque image peut porter ses propres infos
+    loop = img.info.get("loop")
+    frames = iter_frames(img, fmt, opts)
+    if opts.drop_duplicate_frames and fmt in ANIMATION_FORMATS:
+        frames = merge_duplicates(frames)
+
+    if fmt not in STREAMED_FORMATS:
+        frames = list(frames)
+    params = {}
+    if fmt == "webp":
+        # Durées passées en liste : le WebP ne lit pas celles des images
+        params["duration"] = [frame.info.get("duration", 0) for frame in frames]
+    elif fmt == "png":
+        frames = _same_mode(frames)
+    elif fmt == "pdf":
+        params["resolution"] = 100.0
+    if fmt in ANIMATION_FORMATS and (loop is not None or fmt != "gif"):
+        # Sans boucle dans la source : une seule lecture (WebP et APNG bouclent par défaut)
+        params["loop"] = 1 if loop is None else loop
+
+    frames = iter(frames)
+    first = next(frames)
+    rest = frames if fmt in STREAMED_FORMATS else list(frames)
+    with stage("encode"):
+        first.save(target, PILLOW_SAVE_FORMATS[fmt], save_all=True, append_images=rest, **params)
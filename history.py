@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Historique des conversions
+Stockage SQLite en ajout seul, écritures groupées et requêtes indexées
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional
+
+HISTORY_DB = Path.home() / ".format_converter_history.db"
+# Ancien format (JSON réécrit à chaque fichier), importé une seule fois
+LEGACY_HISTORY_FILE = Path.home() / ".format_converter_history.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    input TEXT NOT NULL,
+    output TEXT NOT NULL,
+    format TEXT NOT NULL,
+    success INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_format ON history (format, id);
+CREATE INDEX IF NOT EXISTS idx_history_success ON history (success, id);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value INTEGER
+);
+"""
+
+
+class ConversionHistory:
+    """Gestionnaire d'historique
+
+    add() met les entrées en tampon ; elles sont écrites par lots
+    (batch_size entrées ou flush_interval secondes). Rétention illimitée
+    par défaut, max_entries active la rotation des plus anciennes ; sans
+    max_entries, le réglage enregistré par set_max_entries() s'applique.
+    """
+
+    def __init__(self, path: Path = HISTORY_DB, batch_size: int = 100,
+                 flush_interval: float = 1.0, max_entries: Optional[int] = None):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if max_entries is None:
+            row = self._conn.execute("SELECT value FROM settings WHERE name = 'max_entries'").fetchone()
+            self.max_entries = row[0] if row else None
+        self._import_legacy()
+
+    def _import_legacy(self):
+        """Reprendre l'ancien historique JSON si la base est vide"""
+        if not LEGACY_HISTORY_FILE.exists() or self.count() > 0:
+            return
+        try:
+            with open(LEGACY_HISTORY_FILE, 'r') as f:
+                legacy = json.load(f)
+        except:
+            return
+        rows = [
+            (str(item.get("timestamp", "")), str(item.get("input", "")), str(item.get("output", "")),
+             str(item.get("format", "")), 1 if item.get("success") else 0)
+            for item in legacy if isinstance(item, dict)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO history (timestamp, input, output, format, success) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def add(self, input_file: str, output_file: str, format_out: str, success: bool):
+        """Ajouter une entrée (écrite au prochain lot)"""
+        with self._lock:
+            self._pending.append(
+                (datetime.now().isoformat(), input_file, output_file, format_out, 1 if success else 0)
+            )
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Écrire les entrées en attente en une seule transaction"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO history (timestamp, input, output, format, success) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._rotate()
+
+    def _rotate(self):
+        # Appelé verrou pris, dans une transaction
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?",
+                (self.max_entries,)
+            )
+
+    def set_max_entries(self, max_entries: Optional[int]):
+        """Garder au plus max_entries entrées (None ou 0 : illimité) ; réglage conservé dans la base"""
+        self.flush()
+        with self._lock, self._conn:
+            self.max_entries = max_entries or None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO settings (name, value) VALUES ('max_entries', ?)",
+                (self.max_entries,)
+            )
+            self._rotate()
+
+    @staticmethod
+    def _where(format_out: Optional[str], success: Optional[bool],
+               since: Optional[str], until: Optional[str], before_id: Optional[int] = None):
+        clauses, params = [], []
+        if format_out:
+            clauses.append("format = ?")
+            params.append(format_out)
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(1 if success else 0)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: int = 50, before_id: Optional[int] = None, format_out: Optional[str] = None,
+              success: Optional[bool] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> List[Dict]:
+        """Entrées les plus récentes d'abord
+
+        Pagination par clé : passer l'id de la dernière entrée reçue
+        comme before_id pour obtenir la page suivante.
+        """
+        self.flush()
+        where, params = self._where(format_out, success, since, until, before_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, timestamp, input, output, format, success FROM history{where} "
+                "ORDER BY id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [
+            {"id": r[0], "timestamp": r[1], "input": r[2], "output": r[3],
+             "format": r[4], "success": bool(r[5])}
+            for r in rows
+        ]
+
+    def count(self, format_out: Optional[str] = None, success: Optional[bool] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> int:
+        self.flush()
+        where, params = self._where(format_out, success, since, until)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+    def formats(self) -> List[str]:
+        """Formats présents dans l'historique"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT format FROM history ORDER BY format").fetchall()
+        return [r[0] for r in rows]
+
+    def load(self) -> List[Dict]:
+        """Historique complet, du plus ancien au plus récent"""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, input, output, format, success FROM history ORDER BY id"
+            ).fetchall()
+        return [
+            {"timestamp": r[0], "input": r[1], "output": r[2], "format": r[3], "success": bool(r[4])}
+            for r in rows
+        ]
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Audio / vidéo
+Exécution de ffmpeg avec suivi de progression, analyse ffprobe et copie de flux
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, List, Optional, Tuple
+
+from metrics import stage
+
+# Lignes de stderr conservées pour les rapports d'erreur
+STDERR_LINES = 200
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+# Stratégies de conversion vidéo, de la plus rapide à la plus lente
+REMUX = "remux"            # flux copiés tels quels, nouveau conteneur
+AUDIO_ONLY = "audio"       # vidéo copiée, audio réencodé
+TRANSCODE = "transcode"    # tout réencoder
+
+# Codecs acceptés tels quels par chaque conteneur
+CONTAINER_CODECS = {
+    "mp4": {
+        "video": {"h264", "hevc", "mpeg4", "av1"},
+        "audio": {"aac", "mp3", "alac", "ac3", "eac3"},
+    },
+    "mov": {
+        "video": {"h264", "hevc", "prores", "mpeg4", "mjpeg"},
+        "audio": {"aac", "mp3", "alac", "pcm_s16le", "pcm_s24le", "ac3"},
+    },
+    # Matroska accepte pratiquement tout
+    "mkv": {"video": None, "audio": None},
+}
+
+TRANSCODE_ARGS = ["-codec:v", "libx264", "-preset", "medium", "-crf", "23",
+                  "-codec:a", "aac", "-b:a", "128k"]
+
+# on_progress(fraction 0-1, vitesse (x temps réel), secondes restantes)
+ProgressCallback = Callable[[float, Optional[float], Optional[float]], None]
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    """'1.53x' → 1.53"""
+    try:
+        return float(value.strip().rstrip("x"))
+    except ValueError:
+        return None
+
+
+def run_ffmpeg(cmd: List[str], duration: Optional[float] = None,
+               on_progress: Optional[ProgressCallback] = None,
+               cancel_event: Optional[threading.Event] = None):
+    """Lancer ffmpeg avec -progress et lire l'avancement au fil de l'eau
+
+    La durée de la source est lue dans l'en-tête de stderr si elle n'est
+    pas fournie. stderr n'est gardé que dans un tampon circulaire de
+    STDERR_LINES lignes, joint à l'exception en cas d'échec.
+    """
+    cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+    with stage("spawn"):
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, text=True, errors="replace")
+
+    stderr_tail: deque = deque(maxlen=STDERR_LINES)
+    state = {"duration": duration}
+
+    def drain_stderr():
+        # Toujours vider stderr, sinon ffmpeg se bloque sur un tuyau plein
+        for line in proc.stderr:
+            stderr_tail.append(line.rstrip())
+            if state["duration"] is None:
+                match = _DURATION_RE.search(line)
+                if match:
+                    h, m, sec = match.groups()
+                    state["duration"] = int(h) * 3600 + int(m) * 60 + float(sec)
+
+    reader = threading.Thread(target=drain_stderr, daemon=True)
+    reader.start()
+
+    out_time = 0.0
+    speed: Optional[float] = None
+    # ffmpeg -progress : la taille relevée est celle de la sortie
+    with stage("run", cmd[-1]):
+        try:
+            for line in proc.stdout:
+                if cancel_event is not None and cancel_event.is_set():
+                    proc.terminate()
+                    break
+
+                key, _, value = line.strip().partition("=")
+                if key in ("out_time_us", "out_time_ms"):
+                    # out_time_ms est lui aussi en microsecondes (historique ffmpeg)
+                    try:
+                        out_time = max(0, int(value)) / 1_000_000
+                    except ValueError:
+                        pass
+                elif key == "speed":
+                    speed = _parse_speed(value)
+                elif key == "progress" and on_progress is not None:
+                    total = state["duration"]
+                    if value == "end":
+                        on_progress(1.0, speed, 0.0)
+                    elif total:
+                        fraction = min(1.0, out_time / total)
+                        eta = (total - out_time) / speed if speed else None
+                        on_progress(fraction, speed, eta)
+        finally:
+            proc.wait()
+            reader.join(timeout=5)
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise InterruptedError("Conversion annulée")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr="\n".join(stderr_tail))
+
+
+class MediaInfo:
+    """Résultat de ffprobe : durée et codecs des flux"""
+
+    def __init__(self, duration: Optional[float], video_codecs: List[str], audio_codecs: List[str]):
+        self.duration = duration
+        self.video_codecs = video_codecs
+        self.audio_codecs = audio_codecs
+
+
+_probe_cache: "OrderedDict[Tuple[str, int, int], Optional[MediaInfo]]" = OrderedDict()
+_probe_lock = threading.Lock()
+PROBE_CACHE_SIZE = 1024
+
+
+def probe(path: str) -> Optional[MediaInfo]:
+    """Analyser un fichier avec ffprobe (résultat mis en cache par fichier)
+
+    Renvoie None si ffprobe est absent ou ne reconnaît pas le fichier.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _probe_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
+
+    info = None
+    if shutil.which("ffprobe"):
+        try:
+            result = subprocess.run(
+                ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+                check=True, capture_output=True, text=True, errors="replace"
+            )
+            data = json.loads(result.stdout)
+            streams = data.get("streams", [])
+            # Les pochettes (attached_pic) ne sont pas de la vidéo
+            video = [stream.get("codec_name", "") for stream in streams
+                     if stream.get("codec_type") == "video"
+                     and not stream.get("disposition", {}).get("attached_pic")]
+            audio = [stream.get("codec_name", "") for stream in streams if stream.get("codec_type") == "audio"]
+            try:
+                duration = float(data.get("format", {}).get("duration"))
+            except (TypeError, ValueError):
+                duration = None
+            info = MediaInfo(duration, video, audio)
+        except (subprocess.CalledProcessError, ValueError):
+            info = None
+
+    with _probe_lock:
+        _probe_cache[key] = info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return info
+
+
+def plan_video(info: Optional[MediaInfo], fmt: str) -> str:
+    """Choisir remux, réencodage audio seul ou réencodage complet"""
+    if info is None:
+        # Pas de ffprobe : comportement historique
+        return TRANSCODE if fmt == "mp4" else REMUX
+
+    allowed = CONTAINER_CODECS.get(fmt)
+    if allowed is None:
+        return TRANSCODE
+
+    def compatible(codecs: List[str], accepted: Optional[set]) -> bool:
+        return accepted is None or all(c in accepted for c in codecs)
+
+    if not compatible(info.video_codecs, allowed["video"]):
+        return TRANSCODE
+    if not compatible(info.audio_codecs, allowed["audio"]):
+        return AUDIO_ONLY
+    return REMUX
+
+
+def video_args(strategy: str, info: Optional[MediaInfo], fmt: str) -> List[str]:
+    """Options ffmpeg de codage pour une stratégie"""
+    if strategy == TRANSCODE:
+        return list(TRANSCODE_ARGS)
+
+    args = ["-codec:v", "copy"]
+    # HEVC copié dans MP4/MOV : étiquette hvc1 pour la lecture sur macOS/iOS
+    if info is not None and "hevc" in info.video_codecs and fmt in ("mp4", "mov"):
+        args += ["-tag:v", "hvc1"]
+    if strategy == AUDIO_ONLY:
+        args += ["-codec:a", "aac", "-b:a", "128k"]
+    else:
+        args += ["-codec:a", "copy"]
+    return args
+
+
+def convert_video(input_path: str, output: str, fmt: str,
+                  on_progress: Optional[ProgressCallback] = None,
+                  cancel_event: Optional[threading.Event] = None) -> str:
+    """Convertir une vidéo en copiant les flux dès que le conteneur le permet
+
+    En cas d'échec d'une copie de flux, on retombe automatiquement sur
+    l'étape suivante (audio seul, puis réencodage complet). Renvoie la
+    stratégie finalement utilisée.
+    """
+    with stage("probe"):
+        info = probe(input_path)
+    strategy = plan_video(info, fmt)
+    duration = info.duration if info else None
+    fallbacks = {REMUX: [REMUX, AUDIO_ONLY, TRANSCODE], AUDIO_ONLY: [AUDIO_ONLY, TRANSCODE]}
+
+    for attempt in fallbacks.get(strategy, [TRANSCODE]):
+        cmd = ["ffmpeg", "-i", input_path, "-y"] + video_args(attempt, info, fmt) + [output]
+        try:
+            run_ffmpeg(cmd, duration=duration, on_progress=on_progress, cancel_event=cancel_event)
+            return attempt
+        except subprocess.CalledProcessError:
+            if attempt == TRANSCODE:
+                raise
+    return strategy
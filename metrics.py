@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Mesures
+Durée et volume de chaque étape de conversion (ouverture, décodage,
+redimensionnement, encodage, lancement / exécution des outils externes)
+
+Export JSON, Prometheus (texte) ou Chrome trace (chrome://tracing,
+Perfetto) ; profilage cProfile / tracemalloc sur demande.
+"""
+
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Étapes relevées dans le thread courant (liste active pendant measured())
+_local = threading.local()
+
+# Étape englobant toute la tâche (sert de référence au temps non attribué)
+JOB_STAGE = "job"
+# Attente entre la soumission et le début de la tâche (démarrage du pool compris)
+QUEUE_STAGE = "queue"
+
+
+@contextmanager
+def stage(name: str, path: Optional[Path] = None):
+    """Mesurer une étape ; path : fichier dont la taille est relevée à la fin
+
+    Sans relevé en cours (measured), ne coûte qu'une lecture d'attribut.
+    """
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        yield
+        return
+    start = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - t0
+        try:
+            nbytes = os.path.getsize(path) if path is not None else None
+        except OSError:
+            nbytes = None
+        spans.append((name, start, duration, nbytes, threading.get_ident()))
+
+
+@contextmanager
+def recording():
+    """Relever les étapes du thread courant hors measured() ; renvoie la liste des étapes
+
+    Pour les threads qui traitent un même fichier par morceaux (pipeline).
+    """
+    previous = getattr(_local, "spans", None)
+    _local.spans = spans = []
+    try:
+        yield spans
+    finally:
+        _local.spans = previous
+
+
+def run_process(cmd: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run(check=True, capture_output=True) en deux étapes : lancement puis exécution"""
+    with stage("spawn"):
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+    with stage("run"):
+        stdout, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+
+def measured(profile: bool, submitted: float, func: Callable, *args, **kwargs):
+    """Exécuter func en relevant ses étapes ; renvoie (résultat, relevé)
+
+    Fonction de premier niveau : passe telle quelle dans un pool de
+    processus. En cas d'erreur, le relevé est joint à l'exception
+    (attribut measurement). Avec profile, cProfile et le pic tracemalloc
+    sont relevés pour la tâche (pic approximatif si plusieurs threads).
+    """
+    start = time.time()
+    if profile:
+        # Outils de profilage importés seulement quand ils servent
+        import cProfile
+        import tracemalloc
+    _local.spans = spans = [(QUEUE_STAGE, submitted, max(0.0, start - submitted), None, threading.get_ident())]
+    profiler = None
+    if profile:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ : un seul profileur actif à la fois par processus
+            profiler = None
+
+    t0 = time.perf_counter()
+    result = error = None
+    try:
+        result = func(*args, **kwargs)
+    except BaseException as e:
+        error = e
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        spans.append((JOB_STAGE, start, time.perf_counter() - t0, None, threading.get_ident()))
+        _local.spans = None
+
+    measurement = {
+        "pid": os.getpid(),
+        "spans": spans,
+        "peak_alloc": tracemalloc.get_traced_memory()[1] if profile else None,
+        "profile": None,
+    }
+    if profiler is not None:
+        profiler.create_stats()
+        measurement["profile"] = profiler.stats
+    if error is not None:
+        error.measurement = measurement
+        raise error
+    return result, measurement
+
+
+class _StatsHolder:
+    """Adaptateur : pstats.Stats accepte tout objet doté de create_stats() et stats"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def _tracing() -> bool:
+    import tracemalloc
+    return tracemalloc.is_tracing()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsCollector:
+    """Relevés d'un lot de conversions
+
+    Alimenté par ConversionScheduler (une entrée par tâche terminée) ;
+    thread-safe. Un collecteur par lot : le profil et les résumés
+    portent sur ce lot seulement.
+    """
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.started = time.time()
+        self._lock = threading.Lock()
+        # Une entrée par étape : stage, file, format, start, duration, bytes, pid, tid
+        self.spans: List[dict] = []
+        self.peak_alloc: Dict[str, int] = {}
+        self._stats = None
+        # tracemalloc démarré par le lot (threads du processus courant) : arrêté par finish()
+        self._was_tracing = profile and _tracing()
+
+    def add(self, files: List[str], fmt: str, measurement: dict):
+        """Ajouter le relevé d'une tâche (plusieurs fichiers pour un lot groupé)"""
+        label = files[0] if len(files) == 1 else f"{Path(files[0]).name} (+{len(files) - 1})"
+        with self._lock:
+            for name, start, duration, nbytes, tid in measurement["spans"]:
+                self.spans.append({
+                    "stage": name, "file": label, "format": fmt, "start": start,
+                    "duration": duration, "bytes": nbytes, "pid": measurement["pid"], "tid": tid,
+                })
+            if measurement.get("peak_alloc") is not None:
+                self.peak_alloc[label] = measurement["peak_alloc"]
+            if measurement.get("profile"):
+                import pstats
+                stats = pstats.Stats(_StatsHolder(measurement["profile"]))
+                if self._stats is None:
+                    self._stats = stats
+                else:
+                    self._stats.add(stats)
+
+    def finish(self):
+        """Fin du lot : arrêter tracemalloc s'il a été démarré pour lui"""
+        if self.profile and not self._was_tracing and _tracing():
+            import tracemalloc
+            tracemalloc.stop()
+
+    def summary(self) -> Dict[str, dict]:
+        """Par étape : nombre, durée totale / moyenne / p50 / p95 / max, octets"""
+        with self._lock:
+            spans = list(self.spans)
+        durations: Dict[str, List[float]] = {}
+        volumes: Dict[str, int] = {}
+        for span in spans:
+            durations.setdefault(span["stage"], []).append(span["duration"])
+            if span["bytes"]:
+                volumes[span["stage"]] = volumes.get(span["stage"], 0) + span["bytes"]
+
+        summary = {}
+        for name, values in durations.items():
+            total = sum(values)
+            summary[name] = {
+                "count": len(values),
+                "total": round(total, 6),
+                "mean": round(total / len(values), 6),
+                "p50": round(_percentile(values, 0.5), 6),
+                "p95": round(_percentile(values, 0.95), 6),
+                "max": round(max(values), 6),
+                "bytes": volumes.get(name, 0),
+            }
+        return summary
+
+    # === EXPORTS ===
+
+    def to_json(self) -> str:
+        with self._lock:
+            spans = list(self.spans)
+            peak_alloc = dict(self.peak_alloc)
+        return json.dumps({
+            "started": self.started,
+            "summary": self.summary(),
+            "peak_alloc": peak_alloc,
+            "spans": spans,
+        }, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Format texte Prometheus (node_exporter textfile, pushgateway)"""
+        totals: Dict[tuple, List[float]] = {}
+        with self._lock:
+            for span in self.spans:
+                entry = totals.setdefault((span["stage"], span["format"]), [0, 0.0, 0])
+                entry[0] += 1
+                entry[1] += span["duration"]
+                entry[2] += span["bytes"] or 0
+            peak = max(self.peak_alloc.values(), default=None)
+
+        lines = [
+            "# HELP format_converter_stage_seconds_total Temps passé par étape de conversion",
+            "# TYPE format_converter_stage_seconds_total counter",
+        ]
+        lines += [f'format_converter_stage_seconds_total{{stage="{s}",format="{f}"}} {v[1]:.6f}'
+                  for (s, f), v in sorted(totals.items())]
+        lines += [
+            "# HELP format_converter_stage_count_total Nombre d'étapes de conversion",
+            "# TYPE format_converter_stage_count_total counter",
+        ]
+        lines += [f'format_converter_stage_count_total{{stage="{s}",format="{f}"}} {v[0]}'
+                  for (s, f), v in sorted(totals.items())]
+        lines += [
+            "# HELP format_converter_stage_bytes_total Octets lus ou écrits par étape",
+            "# TYPE format_converter_stage_bytes_total counter",
+        ]
+        lines += [f'format_converter_stage_bytes_total{{stage="{s}",format="{f}"}} {v[2]}'
+                  for (s, f), v in sorted(totals.items()) if v[2]]
+        if peak is not None:
+            lines += [
+                "# HELP format_converter_peak_alloc_bytes Pic d'allocation Python d'une tâche (tracemalloc)",
+                "# TYPE format_converter_peak_alloc_bytes gauge",
+                f"format_converter_peak_alloc_bytes {peak}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def to_chrome_trace(self) -> str:
+        """Événements complets (ph X) : une ligne par worker, étapes imbriquées"""
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            "name": span["stage"],
+            "cat": span["format"],
+            "ph": "X",
+            "ts": round((span["start"] - self.started) * 1e6, 1),
+            "dur": round(span["duration"] * 1e6, 1),
+            "pid": span["pid"],
+            "tid": span["tid"],
+            "args": {"file": span["file"], "bytes": span["bytes"]},
+        } for span in spans]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    def export(self, path: str, kind: Optional[str] = None) -> str:
+        """Écrire les mesures ; kind : json, prometheus ou chrome (sinon d'après l'extension)"""
+        if kind is None:
+            name = str(path).lower()
+            kind = "prometheus" if name.endswith((".prom", ".txt")) else \
+                "chrome" if name.endswith((".trace", ".trace.json")) else "json"
+        content = {"json": self.to_json, "prometheus": self.to_prometheus,
+                   "chrome": self.to_chrome_trace}[kind]()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def has_profile(self) -> bool:
+        return self._stats is not None
+
+    def write_profile(self, path: str) -> str:
+        """Profil cProfile cumulé du lot (pstats, snakeviz...)"""
+        if self._stats is None:
+            raise ValueError("Aucun profil : lancer le lot avec le profilage activé")
+        with self._lock:
+            self._stats.dump_stats(path)
+        return path
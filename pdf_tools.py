@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Outils PDF
+Images → PDF, fusion, découpage et compression, page par page (mémoire bornée)
+"""
+
+import io
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from metrics import stage
+
+# Résolution des pages (comme l'export Image → PDF historique)
+PDF_RESOLUTION = 100.0
+CHUNK_SIZE = 1024 * 1024
+
+# on_page(pages traitées, total)
+PageCallback = Callable[[int, int], None]
+
+
+class PdfStreamWriter:
+    """Écriture d'un PDF objet par objet, directement dans le fichier
+
+    Seuls les décalages des objets (pour la table xref) restent en
+    mémoire ; l'arbre des pages est écrit à la fin.
+    """
+
+    CATALOG = 1
+    PAGES = 2
+
+    def __init__(self, f, version: str = "1.4"):
+        self.f = f
+        self.offsets: Dict[int, int] = {}
+        self.pages: List[int] = []
+        self._next = 3
+        f.write(b"%%PDF-%s\n%%\xe2\xe3\xcf\xd3\n" % version.encode())
+
+    def reserve(self) -> int:
+        num = self._next
+        self._next += 1
+        return num
+
+    def write_object(self, num: int, body: bytes):
+        self.offsets[num] = self.f.tell()
+        self.f.write(b"%d 0 obj\n" % num + body + b"\nendobj\n")
+
+    def write_stream(self, num: int, entries: bytes, length: int, chunks: Iterable[bytes]):
+        """Objet flux dont les données arrivent par morceaux"""
+        self.offsets[num] = self.f.tell()
+        self.f.write(b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (num, entries, length))
+        for chunk in chunks:
+            self.f.write(chunk)
+        self.f.write(b"\nendstream\nendobj\n")
+
+    def add_image_page(self, width_px: int, height_px: int, image_entries: bytes, length: int,
+                       chunks: Iterable[bytes], resolution: float = PDF_RESOLUTION):
+        """Page entièrement couverte par une image"""
+        image, content, page = self.reserve(), self.reserve(), self.reserve()
+        w = width_px * 72.0 / resolution
+        h = height_px * 72.0 / resolution
+
+        self.write_stream(image, b"/Type /XObject /Subtype /Image /Width %d /Height %d %s"
+                          % (width_px, height_px, image_entries), length, chunks)
+        drawing = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (w, h)
+        self.write_stream(content, b"", len(drawing), [drawing])
+        self.write_object(page, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.4f %.4f] "
+                                b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                          % (self.PAGES, w, h, image, content))
+        self.pages.append(page)
+
+    def close(self):
+        """Écrire l'arbre des pages, le catalogue et la table xref"""
+        kids = b" ".join(b"%d 0 R" % p for p in self.pages)
+        self.write_object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.pages)))
+        self.write_object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+
+        xref = self.f.tell()
+        size = self._next
+        self.f.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for num in range(1, size):
+            self.f.write(b"%010d 00000 n \n" % self.offsets.get(num, 0))
+        self.f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                     % (size, self.CATALOG, xref))
+
+
+@contextmanager
+def _pdf_output(output: Path, version: str = "1.4"):
+    """PdfStreamWriter sur un fichier temporaire, renommé en sortie si tout s'est bien passé"""
+    tmp = output.with_name(f".{output.name}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            writer = PdfStreamWriter(f, version)
+            yield writer
+            writer.close()
+        os.replace(tmp, output)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def _file_chunks(path: str) -> Iterable[bytes]:
+    with open(path, "rb") as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+def _jpeg_passthrough(img) -> Optional[bytes]:
+    """Entrées PDF pour copier tel quel un JPEG, ou None s'il faut le décoder
+
+    Exclus : CMYK (inversion Adobe incertaine) et photos à pivoter (EXIF).
+    """
+    if img.format != "JPEG" or img.mode not in ("RGB", "L"):
+        return None
+    try:
+        if img.getexif().get(0x0112, 1) != 1:
+            return None
+    except Exception:
+        return None
+    colorspace = b"/DeviceRGB" if img.mode == "RGB" else b"/DeviceGray"
+    return b"/ColorSpace %s /BitsPerComponent 8 /Filter /DCTDecode" % colorspace
+
+
+def _add_decoded_page(writer: PdfStreamWriter, input_path: str, quality: int,
+                      size: Optional[Tuple[int, int]], background: Tuple[int, int, int]):
+    """Décoder une image et l'écrire en JPEG (un seul décodage en mémoire à la fois)
+
+    TIFF multipage, GIF animé : une page par image. La transparence est
+    aplatie sur background, comme pour une image convertie seule.
+    """
+    from PIL import ImageOps
+    from converter import flatten_image, open_image, resize_image
+
+    source = open_image(input_path, size)
+    for index in range(getattr(source, "n_frames", 1)):
+        source.seek(index)
+        img = ImageOps.exif_transpose(source)
+        if size:
+            img = resize_image(img, size)
+        if img.mode not in ("RGB", "L"):
+            img = flatten_image(img, background)
+
+        data = io.BytesIO()
+        img.save(data, "JPEG", quality=quality)
+        colorspace = b"/DeviceRGB" if img.mode == "RGB" else b"/DeviceGray"
+        writer.add_image_page(img.width, img.height,
+                              b"/ColorSpace %s /BitsPerComponent 8 /Filter /DCTDecode" % colorspace,
+                              data.tell(), [data.getbuffer()])
+
+
+def images_to_pdf(inputs: List[str], output: Path, quality: int = 85, passthrough: bool = True,
+                  size: Optional[Tuple[int, int]] = None, on_page: Optional[PageCallback] = None,
+                  cancel_event: Optional[threading.Event] = None,
+                  background: Tuple[int, int, int] = (255, 255, 255)
+                  ) -> List[Tuple[Optional[str], Optional[BaseException]]]:
+    """Assembler des images, dans l'ordre, en un seul PDF multipage
+
+    Une seule image décodée à la fois ; les JPEG sont recopiés sans
+    réencodage si passthrough (et sans redimensionnement). Les images
+    transparentes sont aplaties sur background. Une image illisible est
+    sautée : renvoie (sortie, erreur) pour chaque entrée.
+    """
+    from PIL import Image
+
+    results: List[Tuple[Optional[str], Optional[BaseException]]] = []
+    with _pdf_output(output) as writer:
+        for i, input_path in enumerate(inputs, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Conversion annulée")
+            try:
+                entries = None
+                if passthrough and size is None:
+                    # Lecture de l'en-tête seulement : rien n'est décodé
+                    with Image.open(input_path) as img:
+                        entries = _jpeg_passthrough(img)
+                        width, height = img.size
+                if entries is not None:
+                    with stage("copy", input_path):
+                        writer.add_image_page(width, height, entries,
+                                              os.path.getsize(input_path), _file_chunks(input_path))
+                else:
+                    with stage("page", input_path):
+                        _add_decoded_page(writer, input_path, quality, size, background)
+                results.append((str(output), None))
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                results.append((None, e))
+            if on_page:
+                on_page(i, len(inputs))
+
+        if not writer.pages:
+            raise ValueError("Aucune image lisible")
+    return results
+
+
+# === PDF EXISTANTS (pypdf) ===
+
+# Compression : côté le plus long des images après réduction, qualité JPEG
+COMPRESS_MAX_SIZE = 1600
+COMPRESS_QUALITY = 75
+
+# on_progress(étapes terminées, total)
+StepCallback = Callable[[int, int], None]
+
+
+def open_pdf(path: str):
+    """PdfReader (pypdf), déchiffré si le PDF n'a pas de mot de passe utilisateur"""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("pypdf requis pour les outils PDF : pip3 install pypdf")
+    reader = PdfReader(path)
+    if reader.is_encrypted:
+        reader.decrypt("")
+    return reader
+
+
+class _PageCopier:
+    """Copie de pages d'un PdfReader vers un PdfStreamWriter
+
+    Les objets sont renumérotés et écrits au fur et à mesure, page après
+    page : seul le document en cours de copie est lu. Les liens vers des
+    pages non copiées deviennent null. overrides remplace le contenu de
+    certaines images : numéro d'objet → (largeur, hauteur, JPEG).
+    """
+
+    def __init__(self, writer: PdfStreamWriter, reader,
+                 overrides: Optional[Dict[int, Tuple[int, int, bytes]]] = None):
+        self.writer = writer
+        self.reader = reader
+        self.overrides = overrides or {}
+        self._map: Dict[Tuple[int, int], Optional[int]] = {}
+        self._queue: deque = deque()
+        # Pages du document : aucune n'est copiée sauf demande explicite
+        for page in reader.pages:
+            ref = page.indirect_reference
+            self._map[(ref.idnum, ref.generation)] = None
+
+    def copy_pages(self, indices: Iterable[int], on_page: Optional[Callable[[], None]] = None):
+        pages = [self.reader.pages[i] for i in indices]
+        numbers = []
+        for page in pages:
+            ref = page.indirect_reference
+            number = self._map.get((ref.idnum, ref.generation))
+            if number is None:
+                number = self._map[(ref.idnum, ref.generation)] = self.writer.reserve()
+            numbers.append(number)
+
+        for page, number in zip(pages, numbers):
+            entries = [self._name(k) + b" " + self._serialize(page.raw_get(k))
+                       for k in page.keys() if k != "/Parent"]
+            entries.append(b"/Parent %d 0 R" % PdfStreamWriter.PAGES)
+            self.writer.write_object(number, b"<< " + b" ".join(entries) + b" >>")
+            self.writer.pages.append(number)
+            self._drain()
+            if on_page:
+                on_page()
+
+    def _ref(self, ref) -> Optional[int]:
+        key = (ref.idnum, ref.generation)
+        if key not in self._map:
+            self._map[key] = self.writer.reserve()
+            self._queue.append(ref)
+        return self._map[key]
+
+    def _drain(self):
+        """Écrire les objets rencontrés depuis la dernière page"""
+        from pypdf.generic import StreamObject
+        while self._queue:
+            ref = self._queue.popleft()
+            number = self._map[(ref.idnum, ref.generation)]
+            obj = ref.get_object()
+            if isinstance(obj, StreamObject):
+                override = self.overrides.get(ref.idnum)
+                if override is not None:
+                    width, height, data = override
+                    replaced = {"/Filter": b"/DCTDecode", "/Width": b"%d" % width,
+                                "/Height": b"%d" % height, "/BitsPerComponent": b"8"}
+                    entries = self._dict_entries(obj, skip={"/Length", "/DecodeParms", *replaced})
+                    entries += [k.encode() + b" " + v for k, v in replaced.items()]
+                else:
+                    # Données brutes (encore compressées) : aucun décodage
+                    data = obj._data
+                    entries = self._dict_entries(obj, skip={"/Length"})
+                self.writer.write_stream(number, b" ".join(entries), len(data), [data])
+            else:
+                self.writer.write_object(number, self._serialize(obj))
+
+    def _dict_entries(self, obj, skip=frozenset()) -> List[bytes]:
+        entries = []
+        for key in obj.keys():
+            if key in skip:
+                continue
+            value = obj.raw_get(key)
+            # Remontée vers l'arbre des pages d'origine : on coupe
+            if key == "/Parent" and self._is_page_tree(value):
+                continue
+            entries.append(self._name(key) + b" " + self._serialize(value))
+        return entries
+
+    @staticmethod
+    def _is_page_tree(value) -> bool:
+        from pypdf.generic import DictionaryObject
+        obj = value.get_object()
+        return isinstance(obj, DictionaryObject) and obj.get("/Type") in ("/Pages", "/Page")
+
+    @staticmethod
+    def _name(key) -> bytes:
+        from pypdf.generic import NameObject
+        buf = io.BytesIO()
+        NameObject(key).write_to_stream(buf)
+        return buf.getvalue()
+
+    def _serialize(self, obj) -> bytes:
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject
+        if isinstance(obj, IndirectObject):
+            number = self._ref(obj)
+            return b"null" if number is None else b"%d 0 R" % number
+        if isinstance(obj, DictionaryObject):
+            return b"<< " + b" ".join(self._dict_entries(obj)) + b" >>"
+        if isinstance(obj, ArrayObject):
+            return b"[" + b" ".join(self._serialize(item) for item in obj) + b"]"
+        buf = io.BytesIO()
+        obj.write_to_stream(buf)
+        return buf.getvalue()
+
+
+def merge_pdfs(inputs: Sequence[str], output: Path, on_progress: Optional[StepCallback] = None,
+               cancel_event: Optional[threading.Event] = None) -> Path:
+    """Fusionner des PDF dans l'ordre, un document ouvert à la fois
+
+    Les pages sont recopiées sans décodage ; signets et formulaires ne
+    sont pas repris.
+    """
+    with _pdf_output(output, "1.7") as writer:
+        for i, input_path in enumerate(inputs, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Conversion annulée")
+            reader = open_pdf(input_path)
+            _PageCopier(writer, reader).copy_pages(range(len(reader.pages)))
+            del reader
+            if on_progress:
+                on_progress(i, len(inputs))
+    return output
+
+
+def parse_ranges(spec: str, page_count: int) -> List[int]:
+    """'1-3,5,8-' → indices de pages (base 0) ; '-' seul = toutes"""
+    pages = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        start, dash, end = part.partition("-")
+        first = int(start) if start else 1
+        last = (int(end) if end else page_count) if dash else first
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(f"Pages invalides : {part} (le document en a {page_count})")
+        pages.extend(range(first - 1, last))
+    return pages
+
+
+def _write_pages(input_path: str, indices: List[int], output: Path) -> str:
+    """Écrire une sélection de pages dans un nouveau PDF (exécuté dans un worker)"""
+    reader = open_pdf(input_path)
+    with _pdf_output(output, "1.7") as writer:
+        _PageCopier(writer, reader).copy_pages(indices)
+    return str(output)
+
+
+def split_pdf(input_path: str, output_folder: Path, ranges: Sequence[str] = (),
+              workers: Optional[int] = None, on_progress: Optional[StepCallback] = None) -> List[str]:
+    """Découper un PDF : un fichier par plage ('1-3', '4-', ...) ou par page
+
+    Chaque sortie est écrite par un processus distinct, en parallèle.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    # Import tardif : converter importe ce module
+    from converter import output_path_for
+
+    page_count = len(open_pdf(input_path).pages)
+    if ranges:
+        jobs = [(parse_ranges(spec, page_count), spec.replace(" ", "")) for spec in ranges]
+    else:
+        jobs = [([i], str(i + 1)) for i in range(page_count)]
+
+    # Même règle que les conversions : « nom (n) » plutôt qu'écraser un fichier existant
+    reserved: Set[Path] = set()
+    outputs = [output_path_for(input_path, "pdf", Path(output_folder), reserved, tag=f"_p{label.replace(',', '_')}")
+               for _, label in jobs]
+    workers = max(1, min(len(jobs), workers or os.cpu_count() or 1))
+    if workers == 1:
+        for i, ((indices, _), output) in enumerate(zip(jobs, outputs), 1):
+            _write_pages(input_path, indices, output)
+            if on_progress:
+                on_progress(i, len(jobs))
+        return [str(o) for o in outputs]
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_write_pages, input_path, indices, output)
+                   for (indices, _), output in zip(jobs, outputs)]
+        for i, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if on_progress:
+                on_progress(i, len(jobs))
+    return [str(o) for o in outputs]
+
+
+def _decode_image(obj, max_size: int):
+    """Image PIL d'un XObject image, ou None si le format n'est pas pris en charge"""
+    from PIL import Image
+
+    if obj.get("/ImageMask") or "/Decode" in obj:
+        return None
+    filters = obj.get("/Filter")
+    filters = [filters] if isinstance(filters, str) else list(filters or [])
+    colorspace = obj.get("/ColorSpace")
+    if isinstance(colorspace, list) and colorspace and colorspace[0] == "/ICCBased":
+        components = colorspace[1].get_object().get("/N")
+        colorspace = {1: "/DeviceGray", 3: "/DeviceRGB"}.get(components)
+    # Espaces en tableau (/Indexed, /CalRGB, /Lab, /Separation...) : non pris en charge
+    mode = {"/DeviceRGB": "RGB", "/DeviceGray": "L"}.get(colorspace) if isinstance(colorspace, str) else None
+
+    if filters == ["/DCTDecode"]:
+        img = Image.open(io.BytesIO(obj._data))
+        if img.mode not in ("RGB", "L"):
+            return None
+        # Décodage JPEG directement à taille réduite
+        img.draft(img.mode, (max_size, max_size))
+        img.load()
+        return img
+    if filters in ([], ["/FlateDecode"]) and mode and obj.get("/BitsPerComponent") == 8:
+        size = (int(obj["/Width"]), int(obj["/Height"]))
+        data = obj.get_data()
+        if len(data) < size[0] * size[1] * len(mode):
+            return None
+        return Image.frombytes(mode, size, data)
+    return None
+
+
+def _downsample_images(input_path: str, numbers: List[int], max_size: int,
+                       quality: int) -> List[Tuple[int, int, int, bytes]]:
+    """Réduire et réencoder en JPEG des images d'un PDF (exécuté dans un worker)
+
+    Renvoie (numéro d'objet, largeur, hauteur, JPEG) pour les images
+    devenues plus légères.
+    """
+    from PIL import Image
+
+    reader = open_pdf(input_path)
+    results = []
+    for number in numbers:
+        obj = reader.get_object(number)
+        try:
+            img = _decode_image(obj, max_size)
+        except (OSError, ValueError):
+            img = None
+        if img is None:
+            continue
+        img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        data = io.BytesIO()
+        img.save(data, "JPEG", quality=quality, optimize=True)
+        if data.tell() < len(obj._data):
+            results.append((number, img.width, img.height, data.getvalue()))
+    return results
+
+
+def _large_images(reader, max_size: int) -> List[int]:
+    """Numéros des images (pages et formulaires imbriqués) plus grandes que max_size"""
+    from pypdf.generic import IndirectObject
+
+    found = set()
+    seen = set()
+    resources = deque(page.get("/Resources") for page in reader.pages)
+    while resources:
+        res = resources.popleft()
+        if res is None:
+            continue
+        xobjects = res.get_object().get("/XObject")
+        if xobjects is None:
+            continue
+        xobjects = xobjects.get_object()
+        for name in xobjects:
+            ref = xobjects.raw_get(name)
+            if not isinstance(ref, IndirectObject) or ref.idnum in seen:
+                continue
+            seen.add(ref.idnum)
+            obj = ref.get_object()
+            if obj.get("/Subtype") == "/Image":
+                if max(int(obj.get("/Width", 0)), int(obj.get("/Height", 0))) > max_size:
+                    found.add(ref.idnum)
+            elif obj.get("/Subtype") == "/Form":
+                resources.append(obj.get("/Resources"))
+    return sorted(found)
+
+
+def compress_pdf(input_path: str, output: Path, max_size: int = COMPRESS_MAX_SIZE,
+                 quality: int = COMPRESS_QUALITY, workers: Optional[int] = None,
+                 on_progress: Optional[StepCallback] = None) -> Tuple[int, int]:
+    """Alléger un PDF en réduisant ses images ; renvoie (taille avant, taille après)
+
+    Les images trop grandes sont réduites et réencodées sur plusieurs
+    cœurs, puis le document est recopié page par page en substituant
+    les images allégées.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    reader = open_pdf(input_path)
+    candidates = _large_images(reader, max_size)
+    workers = max(1, min(len(candidates), workers or os.cpu_count() or 1))
+    chunks = [candidates[i::workers] for i in range(workers)] if candidates else []
+
+    overrides: Dict[int, Tuple[int, int, bytes]] = {}
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_downsample_images, input_path, chunk, max_size, quality) for chunk in chunks]
+            for i, future in enumerate(futures, 1):
+                for number, width, height, data in future.result():
+                    overrides[number] = (width, height, data)
+                if on_progress:
+                    on_progress(i, len(chunks) + 1)
+    elif chunks:
+        for number, width, height, data in _downsample_images(input_path, chunks[0], max_size, quality):
+            overrides[number] = (width, height, data)
+
+    with _pdf_output(output, "1.7") as writer:
+        _PageCopier(writer, reader, overrides).copy_pages(range(len(reader.pages)))
+    if on_progress:
+        on_progress(len(chunks) + 1, len(chunks) + 1)
+    return os.path.getsize(input_path), os.path.getsize(output)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Pipeline d'images
+Lecture, décodage / transformation / encodage et écriture en étages
+séparés, reliés par des files bornées
+
+Pour les lots d'images sur disque lent ou monté en réseau : les lectures
+sont anticipées et les écritures différées pendant que les threads de
+décodage travaillent (Pillow libère le GIL pendant le décodage, le
+redimensionnement et l'encodage).
+"""
+
+import io
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from cache import get_cache
+from converter import (ConversionOptions, default_output_path, image_target_size, open_image, prepare_image,
+                       save_image)
+from frames import keeps_frames, save_frames
+from metrics import JOB_STAGE, MetricsCollector, recording, stage
+from tiled import convert_tiled, needs_tiling
+
+# Threads de lecture et d'écriture : assez pour recouvrir la latence d'un disque réseau
+READERS = 2
+WRITERS = 2
+# Fichiers en attente par thread consommateur (octets bruts ou encodés)
+QUEUE_DEPTH = 2
+# Attente maximale sur une file avant de revérifier l'annulation (secondes)
+POLL_INTERVAL = 0.1
+
+# Fin de file : un par thread consommateur
+_DONE = object()
+
+
+class _Job:
+    """Un fichier qui traverse le pipeline"""
+
+    __slots__ = ("filepath", "output", "future", "data", "key", "spans", "started", "t0", "tiled")
+
+    def __init__(self, filepath: str, output: Path):
+        self.filepath = filepath
+        self.output = output
+        self.future: Future = Future()
+        # Octets bruts puis encodés : jamais l'image décodée
+        self.data: Optional[bytes] = None
+        self.key: Optional[str] = None
+        self.spans: list = []
+        self.started = self.t0 = 0.0
+        # Image géante : lue par bandes dans l'étage de décodage, pas ici
+        self.tiled = False
+
+
+class ImagePipeline:
+    """Conversions Pillow en trois étages
+
+    lecture (readers threads) → file bornée d'octets bruts → décodage,
+    transformation et encodage (max_decoded threads : jamais plus de
+    max_decoded images décodées en mémoire) → file bornée d'octets
+    encodés → écriture (writers threads).
+
+    Les files pleines bloquent l'étage précédent : la mémoire reste bornée
+    quelle que soit la taille du lot. Chaque fichier a sa Future, résolue
+    par l'étage qui le termine ; à l'annulation, les fichiers en cours
+    reçoivent InterruptedError.
+    """
+
+    def __init__(self, fmt: str, opts: ConversionOptions, max_decoded: Optional[int] = None,
+                 readers: int = READERS, writers: int = WRITERS,
+                 cache_settings: Optional[tuple] = None, metrics: Optional[MetricsCollector] = None):
+        self.fmt = fmt
+        self.opts = opts
+        self.decoders = max(1, max_decoded or os.cpu_count() or 1)
+        self.readers = max(1, readers)
+        self.writers = max(1, writers)
+        self.cache_settings = cache_settings
+        self.metrics = metrics
+        self._todo: "queue.Queue" = queue.Queue()
+        self._raw: "queue.Queue" = queue.Queue(maxsize=QUEUE_DEPTH * self.decoders)
+        self._encoded: "queue.Queue" = queue.Queue(maxsize=QUEUE_DEPTH * self.writers)
+        self._jobs: List[_Job] = []
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, files: List[Tuple[str, Path]],
+              cancel_event: Optional[threading.Event] = None) -> List[Future]:
+        """Lancer le pipeline sur (fichier, sortie) ; renvoie une Future par fichier
+
+        Une Future annulée avant la lecture de son fichier est sautée.
+        """
+        if cancel_event is not None:
+            self._cancel = cancel_event
+        self._jobs = [_Job(filepath, output) for filepath, output in files]
+        for job in self._jobs:
+            self._todo.put(job)
+        self._thread = threading.Thread(target=self._run, name="pipeline", daemon=True)
+        self._thread.start()
+        return [job.future for job in self._jobs]
+
+    def join(self):
+        """Attendre la fin de tous les étages"""
+        if self._thread is not None:
+            self._thread.join()
+
+    # === ÉTAGES ===
+
+    def _run(self):
+        # Tous les étages tournent en même temps ; chaque file est fermée
+        # (un _DONE par consommateur) quand l'étage qui l'alimente a fini
+        stages = [
+            (self._read, self.readers, self._raw, self.decoders),
+            (self._decode, self.decoders, self._encoded, self.writers),
+            (self._write, self.writers, None, 0),
+        ]
+        running = []
+        for target, count, downstream, consumers in stages:
+            threads = [threading.Thread(target=target, name=f"pipeline{target.__name__}-{i}", daemon=True)
+                       for i in range(count)]
+            for thread in threads:
+                thread.start()
+            running.append((threads, downstream, consumers))
+        try:
+            for threads, downstream, consumers in running:
+                for thread in threads:
+                    thread.join()
+                for _ in range(consumers):
+                    if not self._put(downstream, _DONE):
+                        break
+        finally:
+            self._abandon()
+
+    def _read(self):
+        while not self._cancel.is_set():
+            try:
+                job = self._todo.get_nowait()
+            except queue.Empty:
+                return
+            if not job.future.set_running_or_notify_cancel():
+                continue
+            job.started = time.time()
+            job.t0 = time.perf_counter()
+            with recording() as spans:
+                try:
+                    hit = self._cache_lookup(job)
+                    job.tiled = not hit and needs_tiling(job.filepath, self.fmt, self.opts)
+                    if not hit and not job.tiled:
+                        with stage("read", Path(job.filepath)):
+                            with open(job.filepath, "rb") as f:
+                                job.data = f.read()
+                except Exception as e:
+                    hit, error = None, e
+                else:
+                    error = None
+            job.spans += spans
+            if error is not None:
+                self._finish(job, error=error)
+            elif hit:
+                self._finish(job, hit)
+            elif not self._put(self._raw, job):
+                return
+
+    def _decode(self):
+        while True:
+            job = self._get(self._raw)
+            if job is _DONE:
+                return
+            if job.tiled:
+                self._convert_tiled(job)
+                continue
+            with recording() as spans:
+                try:
+                    with stage("open"):
+                        img = open_image(job.filepath, image_target_size(self.fmt, self.opts), job.data)
+                    with stage("decode"):
+                        img.load()
+                    # Octets bruts libérés dès le décodage (Pillow garde les siens
+                    # pour les images suivantes d'une animation)
+                    job.data = None
+                    buffer = io.BytesIO()
+                    # Nom de la sortie : Pillow en tire le titre du PDF
+                    buffer.name = str(job.output)
+                    if keeps_frames(img, self.fmt):
+                        save_frames(img, buffer, self.fmt, self.opts)
+                    else:
+                        img = prepare_image(img, self.fmt, self.opts)
+                        with stage("encode"):
+                            save_image(img, buffer, self.fmt, self.opts)
+                    del img
+                    job.data = buffer.getvalue()
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+            job.spans += spans
+            if error is not None:
+                job.data = None
+                self._finish(job, error=error)
+            elif not self._put(self._encoded, job):
+                return
+
+    def _write(self):
+        while True:
+            job = self._get(self._encoded)
+            if job is _DONE:
+                return
+            with recording() as spans:
+                try:
+                    with stage("write", job.output):
+                        with open(job.output, "wb") as f:
+                            f.write(job.data)
+                    job.data = None
+                    self._cache_store(job)
+                except Exception as e:
+                    error = e
+                else:
+                    error = None
+            job.spans += spans
+            self._finish(job, None if error else str(job.output), error)
+
+    def _convert_tiled(self, job: _Job):
+        """Image géante : convertie par bandes dans ce thread, sans passer par l'écriture"""
+        with recording() as spans:
+            try:
+                convert_tiled(job.filepath, self.fmt, self.opts, job.output, cancel_event=self._cancel)
+                self._cache_store(job)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+        job.spans += spans
+        self._finish(job, None if error else str(job.output), error)
+
+    # === OUTILS ===
+
+    def _cache_lookup(self, job: _Job) -> Optional[str]:
+        if self.cache_settings is None:
+            return None
+        try:
+            with stage("cache-lookup"):
+                cache = get_cache(*self.cache_settings)
+                job.key = cache.key(job.filepath, self.fmt, self.opts)
+                return cache.fetch(job.key, job.output,
+                                   default_output_path(job.filepath, self.fmt, job.output.parent, self.opts))
+        except (OSError, sqlite3.Error):
+            job.key = None
+            return None
+
+    def _cache_store(self, job: _Job):
+        if job.key is None:
+            return
+        try:
+            with stage("cache-store"):
+                get_cache(*self.cache_settings).store(job.key, job.output)
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _finish(self, job: _Job, result: Optional[str] = None, error: Optional[BaseException] = None):
+        if self.metrics is not None:
+            job.spans.append((JOB_STAGE, job.started, time.perf_counter() - job.t0, None, threading.get_ident()))
+            self.metrics.add([job.filepath], self.fmt, {"pid": os.getpid(), "spans": job.spans})
+        if error is None:
+            job.future.set_result(result)
+        else:
+            job.future.set_exception(error)
+
+    def _abandon(self):
+        """Annulation : fichiers jamais lus annulés, fichiers en cours interrompus"""
+        while True:
+            try:
+                job = self._todo.get_nowait()
+            except queue.Empty:
+                break
+            if job.future.set_running_or_notify_cancel():
+                job.future.set_exception(InterruptedError("Conversion annulée"))
+        for job in self._jobs:
+            job.data = None
+            if job.future.running():
+                job.future.set_exception(InterruptedError("Conversion annulée"))
+
+    def _put(self, target: "queue.Queue", item) -> bool:
+        """put() bloquant qui abandonne à l'annulation"""
+        while not self._cancel.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, source: "queue.Queue"):
+        """get() bloquant ; _DONE à l'annulation"""
+        while not self._cancel.is_set():
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Tests des archives
+
+    python3 -m unittest test_archives
+"""
+
+import random
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import archives
+from archives import BLOCK_SIZE, create_zip
+
+
+class CreateZipTest(unittest.TestCase):
+    """Aller-retour : l'archive se relit (CRC compris) et redonne les mêmes fichiers"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        tree = self.tmp / "dossier"
+        (tree / "sous").mkdir(parents=True)
+        rng = random.Random(0)
+        # Plusieurs blocs, compressibles ou non, et un fichier vide
+        self.files = {
+            "dossier/texte.txt": b"ligne de texte\n" * (BLOCK_SIZE // 5),
+            "dossier/sous/bruit.bin": rng.randbytes(2 * BLOCK_SIZE + 123),
+            "dossier/sous/vide": b"",
+        }
+        for name, data in self.files.items():
+            (self.tmp / name).write_bytes(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def round_trip(self, level: int):
+        output = create_zip([self.tmp / "dossier"], self.tmp / "out.zip", level=level, workers=4)
+        with zipfile.ZipFile(output) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual({n: zf.read(n) for n in self.files}, self.files)
+            self.assertIn("dossier/sous/", zf.namelist())
+            expected = zipfile.ZIP_DEFLATED if level > 0 else zipfile.ZIP_STORED
+            self.assertEqual(zf.getinfo("dossier/texte.txt").compress_type, expected)
+
+    def test_parallel_deflate(self):
+        if not archives.PARALLEL_DEFLATE:
+            self.skipTest("version de Python non vérifiée pour l'écriture parallèle")
+        self.round_trip(6)
+        self.round_trip(0)
+
+    def test_fallback(self):
+        with mock.patch.object(archives, "PARALLEL_DEFLATE", False):
+            self.round_trip(6)
+            self.round_trip(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Tests du cache de conversions
+
+    python3 -m unittest test_cache
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from cache import get_cache
+from converter import ConversionOptions, convert_cached, output_path_for
+
+
+class CacheOutputNameTest(unittest.TestCase):
+    """Un succès du cache produit toujours la sortie sous le nom attendu"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.cache_settings = (self.tmp / "cache", 10 * 1024 * 1024, False)
+        self.out = self.tmp / "out"
+        self.out.mkdir()
+        self.source = self.tmp / "p0.csv"
+        self.source.write_text("a,b\n1,2\n", encoding="utf-8")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def convert(self, source: Path, opts: ConversionOptions) -> str:
+        output = output_path_for(str(source), "json", self.out, opts=opts)
+        return convert_cached(self.cache_settings, str(source), "json", opts, self.out, output)
+
+    def test_same_source_reuses_output(self):
+        opts = ConversionOptions()
+        first = self.convert(self.source, opts)
+        self.assertEqual(self.convert(self.source, opts), first)
+        self.assertEqual(sorted(p.name for p in self.out.iterdir()), ["p0.json"])
+
+    def test_renamed_source_gets_its_own_output(self):
+        opts = ConversionOptions()
+        self.convert(self.source, opts)
+        copy = self.tmp / "copy_of_p0.csv"
+        shutil.copyfile(self.source, copy)
+        result = self.convert(copy, opts)
+        self.assertEqual(Path(result), self.out / "copy_of_p0.json")
+        self.assertEqual(Path(result).read_bytes(), (self.out / "p0.json").read_bytes())
+
+    def test_prefix_and_suffix_get_their_own_output(self):
+        self.convert(self.source, ConversionOptions())
+        opts = ConversionOptions()
+        opts.prefix, opts.suffix = "web_", "_v2"
+        result = self.convert(self.source, opts)
+        self.assertEqual(Path(result), self.out / "web_p0_v2.json")
+        self.assertTrue((self.out / "p0.json").is_file())
+
+    def test_renamed_source_gets_its_own_html_title(self):
+        source = self.tmp / "notes.txt"
+        source.write_text("bonjour\n", encoding="utf-8")
+        opts = ConversionOptions()
+        output = output_path_for(str(source), "html", self.out, opts=opts)
+        convert_cached(self.cache_settings, str(source), "html", opts, self.out, output)
+        copy = self.tmp / "journal.txt"
+        shutil.copyfile(source, copy)
+        output = output_path_for(str(copy), "html", self.out, opts=opts)
+        result = convert_cached(self.cache_settings, str(copy), "html", opts, self.out, output)
+        self.assertIn("<title>journal</title>", Path(result).read_text(encoding="utf-8"))
+
+    def test_output_renamed_after_conversion(self):
+        opts = ConversionOptions()
+        self.convert(self.source, opts)
+        # Comme la surveillance : la nouvelle version remplace l'ancienne sortie
+        self.source.write_text("a,b\n3,4\n", encoding="utf-8")
+        result = self.convert(self.source, opts)
+        self.assertNotEqual(Path(result), self.out / "p0.json")
+        os.replace(result, self.out / "p0.json")
+        get_cache(*self.cache_settings).moved(Path(result), self.out / "p0.json")
+
+        self.assertEqual(Path(self.convert(self.source, opts)), self.out / "p0.json")
+        self.assertEqual(sorted(p.name for p in self.out.iterdir()), ["p0.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
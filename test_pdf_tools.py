@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Tests des outils PDF
+
+    python3 -m unittest test_pdf_tools
+"""
+
+import importlib.util
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+HAS_PDF = importlib.util.find_spec("PIL") is not None and importlib.util.find_spec("pypdf") is not None
+
+
+@unittest.skipUnless(HAS_PDF, "Pillow et pypdf requis")
+class CompressPdfTest(unittest.TestCase):
+    """Les images non prises en charge sont laissées telles quelles, sans faire échouer le fichier"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_indexed_image_is_kept(self):
+        from PIL import Image
+        from pypdf import PdfReader
+        from pdf_tools import compress_pdf
+
+        # Palette : Pillow écrit un espace /Indexed (tableau), comme la conversion GIF → PDF
+        source = self.tmp / "palette.pdf"
+        Image.radial_gradient("L").resize((1200, 900)).convert("P").save(source)
+        image = PdfReader(str(source)).pages[0]["/Resources"]["/XObject"]["/image"].get_object()
+        self.assertEqual(image["/ColorSpace"][0], "/Indexed")
+
+        output = self.tmp / "compressed.pdf"
+        compress_pdf(str(source), output, max_size=300, workers=1)
+        self.assertEqual(len(PdfReader(str(output)).pages), 1)
+
+
+@unittest.skipUnless(HAS_PDF, "Pillow et pypdf requis")
+class MergedImagesTest(unittest.TestCase):
+    """Images → un seul PDF : pages identiques à celles d'une conversion image par image"""
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    @staticmethod
+    def page_color(pdf: Path, index: int = 0):
+        from pypdf import PdfReader
+        img = PdfReader(str(pdf)).pages[index].images[0].image.convert("RGB")
+        return img.resize((1, 1)).getpixel((0, 0))
+
+    def test_transparent_page_is_flattened(self):
+        from PIL import Image
+        from converter import ConversionOptions, ConversionScheduler, convert_file
+
+        # Rouge entièrement transparent : page du fond, pas rouge
+        pages = []
+        for name in ("a.png", "b.png"):
+            Image.new("RGBA", (64, 48), (255, 0, 0, 0)).save(self.tmp / name)
+            pages.append(str(self.tmp / name))
+        opts = ConversionOptions()
+        opts.background = (0, 0, 255)
+
+        single = Path(convert_file(pages[0], "pdf", opts, self.tmp))
+        merged_folder = self.tmp / "merged"
+        merged_folder.mkdir()
+        opts.merge_pdf = True
+        self.assertEqual(ConversionScheduler(merged_folder, workers=1).run(pages, "pdf", opts), (2, 0))
+        merged = next(merged_folder.glob("*.pdf"))
+
+        expected = self.page_color(single)
+        for index in range(2):
+            color = self.page_color(merged, index)
+            self.assertTrue(all(abs(a - b) <= 4 for a, b in zip(color, expected)), (color, expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Conversions texte en flux
+txt ↔ html, md → html, csv → json / xml / yaml, sans pandoc ni soffice
+
+Le fichier est lu et écrit morceau par morceau : mémoire constante,
+quelle que soit la taille (journaux, exports CSV de plusieurs Go).
+"""
+
+import csv
+import html
+import io
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, TextIO
+
+# Taille des morceaux lus (caractères)
+CHUNK_SIZE = 1024 * 1024
+# Avancement signalé au plus tous les PROGRESS_STEP octets lus
+PROGRESS_STEP = 4 * 1024 * 1024
+
+# Formats de données produits à partir d'un CSV
+DATA_FORMATS = ["json", "xml", "yaml"]
+
+# on_progress(fraction 0-1, vitesse, eta) : même signature que les conversions ffmpeg
+ProgressCallback = Callable[[float, Optional[float], Optional[float]], None]
+
+
+def can_stream(input_path: str, fmt: str) -> bool:
+    """La conversion peut-elle se faire ici, en flux ?"""
+    return (Path(input_path).suffix.lower()[1:], fmt) in _CONVERTERS
+
+
+@contextmanager
+def _text_output(output: Path):
+    """Fichier texte UTF-8 temporaire, renommé en sortie si tout s'est bien passé"""
+    tmp = output.with_name(f".{output.name}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+            yield f
+        os.replace(tmp, output)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class _Source:
+    """Lecture texte d'un fichier avec suivi de l'avancement (en octets)"""
+
+    def __init__(self, path: str, on_progress: Optional[ProgressCallback],
+                 cancel_event: Optional[threading.Event]):
+        self.raw = open(path, "rb")
+        self.size = os.fstat(self.raw.fileno()).st_size
+        # utf-8-sig : BOM éventuel retiré ; octets invalides remplacés plutôt qu'un échec
+        self.text = io.TextIOWrapper(self.raw, encoding="utf-8-sig", errors="replace", newline="")
+        self.on_progress = on_progress
+        self.cancel_event = cancel_event
+        self._reported = 0
+
+    def tick(self):
+        """À appeler régulièrement : annulation et avancement"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise InterruptedError("Conversion annulée")
+        if self.on_progress and self.size:
+            position = self.raw.tell()
+            if position - self._reported >= PROGRESS_STEP:
+                self._reported = position
+                self.on_progress(min(1.0, position / self.size), None, None)
+
+    def chunks(self) -> Iterator[str]:
+        for chunk in iter(lambda: self.text.read(CHUNK_SIZE), ""):
+            self.tick()
+            yield chunk
+
+    def lines(self) -> Iterator[str]:
+        for i, line in enumerate(self.text):
+            if i % 10000 == 0:
+                self.tick()
+            yield line
+
+    def close(self):
+        self.text.close()
+
+
+def _html_head(title: str) -> str:
+    return (f'<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{html.escape(title)}</title>\n</head>\n<body>\n")
+
+
+# === TXT → HTML ===
+
+def _txt_to_html(source: _Source, out: TextIO, title: str):
+    out.write(_html_head(title) + "<pre>")
+    for chunk in source.chunks():
+        # L'échappement est caractère par caractère : il se découpe sans risque
+        out.write(html.escape(chunk, quote=False))
+    out.write("</pre>\n</body>\n</html>\n")
+
+
+# === HTML → TXT ===
+
+class _TextExtractor(HTMLParser):
+    """Texte visible d'un document HTML, écrit au fil de l'analyse"""
+
+    BLOCKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6",
+              "pre", "blockquote", "section", "article", "header", "footer", "table", "ul", "ol", "hr"}
+    HIDDEN = {"script", "style", "head", "template", "noscript"}
+
+    def __init__(self, out: TextIO):
+        super().__init__(convert_charrefs=True)
+        self.out = out
+        self.hidden = 0
+        self.pre = 0
+        self.newline = True
+
+    def _break(self):
+        if not self.newline:
+            self.out.write("\n")
+            self.newline = True
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HIDDEN:
+            self.hidden += 1
+        elif tag == "pre":
+            self.pre += 1
+        if tag in self.BLOCKS:
+            self._break()
+        if tag == "li":
+            self.out.write("- ")
+            self.newline = False
+
+    def handle_endtag(self, tag):
+        if tag in self.HIDDEN:
+            self.hidden = max(0, self.hidden - 1)
+        elif tag == "pre":
+            self.pre = max(0, self.pre - 1)
+        if tag in self.BLOCKS:
+            self._break()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ("br", "hr"):
+            self.out.write("\n")
+            self.newline = True
+
+    def handle_data(self, data):
+        if self.hidden:
+            return
+        if not self.pre:
+            # Hors <pre>, les blancs se replient comme dans un navigateur
+            data = re.sub(r"\s+", " ", data)
+            if self.newline:
+                data = data.lstrip()
+        if data:
+            self.out.write(data)
+            self.newline = data.endswith("\n")
+
+
+def _html_to_txt(source: _Source, out: TextIO, title: str):
+    parser = _TextExtractor(out)
+    for chunk in source.chunks():
+        parser.feed(chunk)
+    parser.close()
+    if not parser.newline:
+        out.write("\n")
+
+
+# === MARKDOWN → HTML ===
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_RULE = re.compile(r"^ {0,3}([-*_])(\s*\1){2,}\s*$")
+_BULLET = re.compile(r"^\s{0,3}[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^\s{0,3}\d{1,9}[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^\s{0,3}>\s?(.*)$")
+_FENCE = re.compile(r"^\s{0,3}(```|~~~)\s*([\w+-]*)")
+
+_INLINE = [
+    (re.compile(r"!\[([^\]]*)\]\(([^)\s]+)\)"), r'<img src="\2" alt="\1">'),
+    (re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)"), r'<a href="\2">\1</a>'),
+    (re.compile(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1"), r"<strong>\2</strong>"),
+    (re.compile(r"\*(?=\S)(.+?)(?<=\S)\*"), r"<em>\1</em>"),
+    (re.compile(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)"), r"<em>\1</em>"),
+]
+_CODE_SPAN = re.compile(r"(`+)(.+?)\1")
+
+
+def _inline(text: str) -> str:
+    """Mise en forme en ligne ; rien n'est interprété dans le code"""
+    parts = []
+    last = 0
+    for match in _CODE_SPAN.finditer(text):
+        parts.append(_inline_plain(text[last:match.start()]))
+        parts.append(f"<code>{html.escape(match.group(2).strip())}</code>")
+        last = match.end()
+    parts.append(_inline_plain(text[last:]))
+    return "".join(parts)
+
+
+def _inline_plain(text: str) -> str:
+    text = html.escape(text)
+    for pattern, replacement in _INLINE:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class _MarkdownWriter:
+    """Markdown courant (titres, paragraphes, listes, citations, code, liens)
+
+    Ligne par ligne, sans garder le document : chaque bloc est ouvert,
+    alimenté puis fermé au fil de la lecture.
+    """
+
+    CLOSING = {"p": "</p>\n", "ul": "</li>\n</ul>\n", "ol": "</li>\n</ol>\n",
+               "blockquote": "</p>\n</blockquote>\n"}
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.block: Optional[str] = None
+        self.fence: Optional[str] = None
+
+    def close_block(self):
+        if self.block:
+            self.out.write(self.CLOSING[self.block])
+            self.block = None
+
+    def _open(self, block: str, opening: str):
+        if self.block != block:
+            self.close_block()
+            self.out.write(opening)
+            self.block = block
+            return True
+        return False
+
+    def line(self, line: str):
+        line = line.rstrip("\r\n")
+
+        if self.fence is not None:
+            if line.strip().startswith(self.fence):
+                self.out.write("</code></pre>\n")
+                self.fence = None
+            else:
+                self.out.write(html.escape(line, quote=False) + "\n")
+            return
+
+        if not line.strip():
+            self.close_block()
+            return
+
+        match = _FENCE.match(line)
+        if match:
+            self.close_block()
+            self.fence = match.group(1)
+            language = f' class="language-{match.group(2)}"' if match.group(2) else ""
+            self.out.write(f"<pre><code{language}>")
+            return
+
+        match = _HEADING.match(line)
+        if match:
+            self.close_block()
+            level = len(match.group(1))
+            self.out.write(f"<h{level}>{_inline(match.group(2))}</h{level}>\n")
+            return
+
+        if _RULE.match(line):
+            self.close_block()
+            self.out.write("<hr>\n")
+            return
+
+        for block, pattern in (("ul", _BULLET), ("ol", _NUMBERED)):
+            match = pattern.match(line)
+            if match:
+                if not self._open(block, f"<{block}>\n<li>"):
+                    self.out.write("</li>\n<li>")
+                self.out.write(_inline(match.group(1)))
+                return
+
+        match = _QUOTE.match(line)
+        if match:
+            if not self._open("blockquote", "<blockquote>\n<p>"):
+                self.out.write("\n")
+            self.out.write(_inline(match.group(1)))
+            return
+
+        # Suite d'un élément de liste ou d'un paragraphe
+        if self.block in ("ul", "ol", "p"):
+            self.out.write("\n" + _inline(line.strip()))
+        else:
+            self._open("p", "<p>")
+            self.out.write(_inline(line.strip()))
+
+    def close(self):
+        if self.fence is not None:
+            self.out.write("</code></pre>\n")
+        self.close_block()
+
+
+def _md_to_html(source: _Source, out: TextIO, title: str):
+    out.write(_html_head(title))
+    writer = _MarkdownWriter(out)
+    for line in source.lines():
+        writer.line(line)
+    writer.close()
+    out.write("</body>\n</html>\n")
+
+
+# === CSV → JSON / XML / YAML ===
+
+def _csv_reader(source: _Source) -> "csv.DictReader":
+    """Lecteur CSV : séparateur deviné sur le début du fichier, 1re ligne = en-têtes"""
+    sample = source.text.read(64 * 1024)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+    # L'échantillon est relu en tête du flux, sans revenir en arrière dans le fichier
+    rows = _chain(sample, source.lines())
+    reader = csv.DictReader(rows, dialect=dialect, restkey="_extra")
+    if reader.fieldnames:
+        reader.fieldnames = _unique_names(reader.fieldnames)
+    return reader
+
+
+def _chain(sample: str, rest: Iterator[str]) -> Iterator[str]:
+    lines = sample.splitlines(keepends=True)
+    if lines and not lines[-1].endswith(("\n", "\r")):
+        # Dernière ligne de l'échantillon coupée : la compléter avec la suite
+        lines[-1] += next(rest, "")
+    yield from lines
+    yield from rest
+
+
+def _unique_names(names: List[str]) -> List[str]:
+    """En-têtes vides ou en double : col_3, nom_2..."""
+    seen = {}
+    result = []
+    for i, name in enumerate(names, 1):
+        name = name.strip() or f"col_{i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 1
+        result.append(name)
+    return result
+
+
+def _csv_to_json(source: _Source, out: TextIO, title: str):
+    out.write("[")
+    first = True
+    for row in _csv_reader(source):
+        out.write("\n  " if first else ",\n  ")
+        out.write(json.dumps(row, ensure_ascii=False))
+        first = False
+    out.write("\n]\n" if not first else "]\n")
+
+
+_XML_INVALID = re.compile(r"[^\w.-]", re.UNICODE)
+# Caractères interdits en XML 1.0 (contrôles hors tabulation et sauts de ligne)
+_XML_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xml_name(name: str) -> str:
+    name = _XML_INVALID.sub("_", name)
+    if not name or not (name[0].isalpha() or name[0] == "_") or name.lower().startswith("xml"):
+        name = "_" + name
+    return name
+
+
+def _xml_text(value) -> str:
+    if isinstance(value, list):
+        value = "\t".join(value)
+    return html.escape(_XML_CONTROL.sub("", value or ""), quote=False)
+
+
+def _csv_to_xml(source: _Source, out: TextIO, title: str):
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n<rows>\n')
+    reader = _csv_reader(source)
+    tags = None
+    for row in reader:
+        if tags is None:
+            tags = {name: _xml_name(name) for name in (reader.fieldnames or [])}
+            tags["_extra"] = "_extra"
+        out.write("  <row>\n")
+        for name, value in row.items():
+            tag = tags[name]
+            out.write(f"    <{tag}>{_xml_text(value)}</{tag}>\n")
+        out.write("  </row>\n")
+    out.write("</rows>\n")
+
+
+# Chaîne JSON entre guillemets : scalaire YAML valide, sans interprétation (dates, booléens...)
+_quote = json.encoder.encode_basestring
+
+
+def _yaml_scalar(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, list):
+        return json.dumps(value, ensure_ascii=False)
+    return _quote(value)
+
+
+def _csv_to_yaml(source: _Source, out: TextIO, title: str):
+    keys: dict = {}
+    empty = True
+    for row in _csv_reader(source):
+        lines = []
+        for name, value in row.items():
+            key = keys.get(name)
+            if key is None:
+                key = keys[name] = _quote(name) + ": "
+            lines.append(key + _yaml_scalar(value))
+        out.write("- " + "\n  ".join(lines) + "\n" if lines else "- {}\n")
+        empty = False
+    if empty:
+        out.write("[]\n")
+
+
+# (extension source, format cible) → conversion
+_CONVERTERS = {
+    ("txt", "html"): _txt_to_html, ("log", "html"): _txt_to_html, ("md", "html"): _md_to_html,
+    ("html", "txt"): _html_to_txt, ("htm", "txt"): _html_to_txt,
+    ("csv", "json"): _csv_to_json, ("csv", "xml"): _csv_to_xml, ("csv", "yaml"): _csv_to_yaml,
+}
+
+
+def convert_text(input_path: str, fmt: str, output: Path,
+                 on_progress: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None) -> Path:
+    """Convertir un fichier texte en flux, dans le processus courant"""
+    ext = Path(input_path).suffix.lower()[1:]
+    converter = _CONVERTERS.get((ext, fmt))
+    if converter is None:
+        raise ValueError(f"Conversion {ext or '?'} → {fmt} non prise en charge")
+
+    output = Path(output)
+    source = _Source(input_path, on_progress, cancel_event)
+    try:
+        with _text_output(output) as out:
+            converter(source, out, Path(input_path).stem)
+    finally:
+        source.close()
+    if on_progress:
+        on_progress(1.0, None, None)
+    return output
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Miniatures
+Génération en arrière-plan avec cache LRU mémoire et disque
+"""
+
+import hashlib
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+THUMBNAIL_DIR = Path.home() / ".format_converter_cache" / "thumbnails"
+THUMBNAIL_SIZE = (200, 140)
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.tiff', '.webp']
+
+# Priorités de la file : l'aperçu demandé passe avant le préchargement
+PRIORITY_REQUEST = 0
+PRIORITY_PREFETCH = 1
+
+
+def cache_key(filepath: str) -> Optional[str]:
+    """Clé chemin + date de modification + taille (None si illisible)"""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    raw = f"{os.path.abspath(filepath)}|{st.st_mtime_ns}|{st.st_size}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def make_thumbnail(filepath: str, size: Tuple[int, int] = THUMBNAIL_SIZE):
+    """Miniature (image PIL) et dimensions d'origine, en un seul décodage réduit"""
+    from PIL import Image
+    from converter import load_pillow_plugins
+    load_pillow_plugins(os.path.splitext(filepath)[1][1:])
+    with Image.open(filepath) as img:
+        # Dimensions lues dans l'en-tête, avant tout décodage
+        dimensions = img.size
+        # JPEG : décodage direct à 1/2, 1/4 ou 1/8
+        img.draft("RGB", (size[0] * 2, size[1] * 2))
+        img.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        thumb = img.convert("RGBA") if img.mode not in ("RGB", "RGBA", "L") else img.copy()
+    return thumb, dimensions
+
+
+class ThumbnailCache:
+    """Cache LRU des miniatures : mémoire puis disque"""
+
+    def __init__(self, directory: Path = THUMBNAIL_DIR, memory_items: int = 256, disk_items: int = 5000):
+        self.directory = Path(directory)
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get_memory(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            return entry
+
+    def _put_memory(self, key: str, entry: tuple):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """(miniature, dimensions) ou None"""
+        entry = self.get_memory(key)
+        if entry is not None:
+            return entry
+
+        path = self.directory / f"{key}.png"
+        if not path.exists():
+            return None
+        try:
+            from PIL import Image
+            with Image.open(path) as img:
+                img.load()
+                w, h = img.text.get("FCSize", "0x0").split("x")
+                entry = (img.copy(), (int(w), int(h)))
+            os.utime(path)  # LRU disque : date d'accès = date de modification
+        except:
+            return None
+        self._put_memory(key, entry)
+        return entry
+
+    def put(self, key: str, thumb, dimensions: Tuple[int, int]):
+        entry = (thumb, dimensions)
+        self._put_memory(key, entry)
+        try:
+            from PIL.PngImagePlugin import PngInfo
+            self.directory.mkdir(parents=True, exist_ok=True)
+            info = PngInfo()
+            info.add_text("FCSize", f"{dimensions[0]}x{dimensions[1]}")
+            tmp = self.directory / f".{key}.tmp"
+            thumb.save(tmp, "PNG", pnginfo=info)
+            os.replace(tmp, self.directory / f"{key}.png")
+        except:
+            return
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self.prune()
+
+    def prune(self):
+        """Supprimer les miniatures disque les moins récemment utilisées"""
+        try:
+            files = sorted(self.directory.glob("*.png"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files[:max(0, len(files) - self.disk_items)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+class ThumbnailLoader:
+    """Génère les miniatures hors du thread de l'interface
+
+    Les résultats arrivent dans la file `results` sous la forme
+    (chemin, miniature, dimensions) ; miniature vaut None en cas d'erreur.
+    L'interface la vide depuis son propre thread (after).
+    """
+
+    def __init__(self, cache: Optional[ThumbnailCache] = None, workers: int = 2):
+        self.cache = cache or ThumbnailCache()
+        self.results: "queue.Queue[tuple]" = queue.Queue()
+        self._tasks: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"thumbnail-{i}", daemon=True).start()
+
+    def cached(self, filepath: str):
+        """Miniature déjà en mémoire (appel immédiat, sans disque)"""
+        key = cache_key(filepath)
+        return self.cache.get_memory(key) if key else None
+
+    def request(self, filepath: str):
+        """Aperçu demandé par l'utilisateur : priorité haute"""
+        self._enqueue(filepath, PRIORITY_REQUEST, notify=True)
+
+    def prefetch(self, filepaths: List[str]):
+        """Précharger les miniatures des fichiers de la liste"""
+        for filepath in filepaths:
+            if Path(filepath).suffix.lower() in IMAGE_EXTENSIONS:
+                self._enqueue(filepath, PRIORITY_PREFETCH, notify=False)
+
+    def _enqueue(self, filepath: str, priority: int, notify: bool):
+        with self._lock:
+            # Un préchargement déjà en file suffit ; une demande passe toujours
+            if not notify and filepath in self._queued:
+                return
+            self._queued.add(filepath)
+        self._tasks.put((priority, next(self._counter), filepath, notify))
+
+    def _worker(self):
+        while True:
+            priority, _, filepath, notify = self._tasks.get()
+            with self._lock:
+                self._queued.discard(filepath)
+
+            thumb = dimensions = None
+            key = cache_key(filepath)
+            if key:
+                entry = self.cache.get(key)
+                if entry is None:
+                    try:
+                        thumb, dimensions = make_thumbnail(filepath)
+                        self.cache.put(key, thumb, dimensions)
+                    except:
+                        thumb = dimensions = None
+                else:
+                    thumb, dimensions = entry
+
+            if notify:
+                self.results.put((filepath, thumb, dimensions))
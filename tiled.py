@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Images géantes par bandes
+Scans TIFF et plans PNG de plusieurs centaines de mégapixels : lus,
+convertis et écrits bande par bande, sans jamais décoder l'image entière
+
+Lecture : les bandes TIFF sont faites de bandes (strips) ou de rangées
+de tuiles du fichier d'origine, décodées par Pillow ; le flux PNG est
+décompressé au fil de l'eau. Réduction par filtre boîte, conversion de
+mode comme pour les autres images. Sortie PNG / TIFF écrite au fil des
+bandes ; sortie JPEG (ou sortie assez petite) assemblée puis enregistrée
+par Pillow.
+"""
+
+import io
+import math
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from converter import ConversionOptions, flatten_image, image_target_size, load_pillow_plugins, save_image
+from media import ProgressCallback
+from metrics import stage
+
+# Pixels décodés par bande (octets, 4 par pixel au plus) ; le pic mémoire
+# vaut quelques bandes (décodage, fenêtre de lignes, filtre, compression)
+BAND_BYTES = 16 * 1024 * 1024
+# Strip TIFF (ou rangée de tuiles) décodée d'un bloc : au-delà, la lecture
+# par bandes n'économise rien (TIFF d'une seule strip) et le chemin habituel s'applique
+UNIT_BYTES = 2 * BAND_BYTES
+# Morceaux lus dans le flux PNG compressé
+READ_SIZE = 1024 * 1024
+
+# Formats lus par bandes, formats produits
+TILED_SOURCES = ["png", "tif", "tiff"]
+TILED_OUTPUTS = ["png", "tiff", "jpg", "jpeg"]
+
+# Bits par pixel des PNG non entrelacés lus par bandes (mode brut Pillow) ;
+# le 16 bits est réduit à 8 bits au décodage : la ligne précédente serait perdue
+_PNG_BITS = {"1": 1, "P;1": 1, "P;2": 2, "P;4": 4, "L": 8, "P": 8, "LA": 16, "RGB": 24, "RGBA": 32}
+
+# Étiquettes TIFF recopiées dans chaque bande (types gérés : BYTE, SHORT, LONG, UNDEFINED)
+_TIFF_COPIED = (258, 259, 262, 266, 277, 284, 317, 320, 338, 339, 347, 530)
+_TIFF_TYPES = {1: "B", 3: "H", 4: "L", 7: "B"}
+
+
+def image_size(input_path: str) -> Optional[Tuple[int, int]]:
+    """Dimensions lues dans l'en-tête, sans le contrôle de Pillow contre les images géantes"""
+    ext = Path(input_path).suffix.lower()[1:]
+    if ext not in TILED_SOURCES:
+        return None
+    try:
+        with _open_header(input_path) as img:
+            return img.size
+    except Exception:
+        # Fichier illisible : le chemin habituel signalera l'erreur
+        return None
+
+
+def needs_tiling(input_path: str, fmt: str, opts: ConversionOptions) -> bool:
+    """L'image dépasse-t-elle le seuil de traitement par bandes, et se lit-elle par bandes ?"""
+    if fmt not in TILED_OUTPUTS or not opts.tiled_threshold:
+        return False
+    size = image_size(input_path)
+    if size is None or size[0] * size[1] <= opts.tiled_threshold:
+        return False
+    try:
+        _open_reader(input_path)
+    except Exception:
+        # PNG entrelacé ou 16 bits, TIFF à plans séparés ou d'une seule
+        # strip : chemin habituel de Pillow, qui signalera une éventuelle erreur
+        return False
+    return True
+
+
+def _open_header(input_path: str):
+    # Classe du format instanciée directement : Image.open() refuse les
+    # images de plus de 2 × MAX_IMAGE_PIXELS (protection contre les bombes)
+    if Path(input_path).suffix.lower() == ".png":
+        from PIL import PngImagePlugin
+        return PngImagePlugin.PngImageFile(input_path)
+    from PIL import TiffImagePlugin
+    return TiffImagePlugin.TiffImageFile(input_path)
+
+
+def _as_tuple(value) -> tuple:
+    return value if isinstance(value, tuple) else (value,)
+
+
+# === LECTURE ===
+
+class _PngReader:
+    """PNG non entrelacé : flux IDAT décompressé bande par bande
+
+    Chaque bande est décodée par Pillow (décodeur zip) précédée de la
+    dernière ligne de la bande précédente, non filtrée : les filtres PNG
+    (Up, Average, Paeth) retrouvent ainsi la ligne du dessus.
+    """
+
+    def __init__(self, input_path: str, img):
+        self.path = input_path
+        self.size = img.size
+        self.mode = img.mode
+        self.rawmode = img.tile[0][3]
+        self.offset = img.tile[0][2]
+        self.stride = (img.size[0] * _PNG_BITS[self.rawmode] + 7) // 8
+        self.palette = (img.palette.rawmode, img.palette.palette) if img.mode == "P" else None
+        self.transparency = img.info.get("transparency")
+
+    @staticmethod
+    def supports(img) -> bool:
+        return (not img.info.get("interlace") and len(img.tile) == 1
+                and img.tile[0][0] == "zip" and img.tile[0][3] in _PNG_BITS)
+
+    def _idat(self, f) -> Iterator[bytes]:
+        """Données compressées des blocs IDAT consécutifs, par morceaux"""
+        f.seek(self.offset - 8)
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            length, kind = struct.unpack(">I4s", header)
+            if kind != b"IDAT":
+                return
+            while length:
+                piece = f.read(min(length, READ_SIZE))
+                if not piece:
+                    return
+                length -= len(piece)
+                yield piece
+            f.read(4)  # CRC
+
+    def bands(self, rows: int):
+        from PIL import Image
+        width, height = self.size
+        line = self.stride + 1
+        decompressor = zlib.decompressobj()
+        previous = None
+        with open(self.path, "rb") as f:
+            pieces = self._idat(f)
+            for y0 in range(0, height, rows):
+                count = min(rows, height - y0)
+                needed = count * line
+                data = bytearray()
+                while len(data) < needed:
+                    pending = decompressor.unconsumed_tail or next(pieces, b"")
+                    if not pending:
+                        raise OSError(f"PNG tronqué : {Path(self.path).name}")
+                    # max_length : jamais plus que la bande, même très compressible
+                    data += decompressor.decompress(pending, needed - len(data))
+                if previous is not None:
+                    data[:0] = b"\0" + previous
+                lines = count + (previous is not None)
+                with stage("decode"):
+                    band = Image.frombytes(self.mode, (width, lines), zlib.compress(data, 0),
+                                           "zip", self.rawmode)
+                del data
+                previous = band.crop((0, lines - 1, width, lines)).tobytes("raw", self.rawmode)
+                if lines > count:
+                    band = band.crop((0, 1, width, lines))
+                if self.palette is not None:
+                    band.putpalette(self.palette[1], self.palette[0])
+                if self.transparency is not None:
+                    band.info["transparency"] = self.transparency
+                yield y0, band
+
+
+class _TiffReader:
+    """TIFF en bandes (strips) ou en tuiles, une seule image par fichier lue
+
+    Chaque bande devient un petit TIFF en mémoire (mêmes étiquettes de
+    compression, prédicteur, palette, tables JPEG) décodé par Pillow :
+    toutes les compressions lues par Pillow sont prises en charge.
+    """
+
+    def __init__(self, input_path: str, img):
+        self.path = input_path
+        self.size = img.size
+        self.mode = img.mode
+        self.transparency = None
+        tags = img.tag_v2
+        self.tags = [(tag, tags.tagtype[tag], tags[tag]) for tag in _TIFF_COPIED
+                     if tag in tags and tags.tagtype.get(tag) in _TIFF_TYPES]
+        self.tiled = 324 in tags
+        if self.tiled:
+            self.tile_size = (int(tags[322]), int(tags[323]))
+            self.offsets, self.counts = _as_tuple(tags[324]), _as_tuple(tags[325])
+            self.unit = self.tile_size[1]
+        else:
+            self.offsets, self.counts = _as_tuple(tags[273]), _as_tuple(tags[279])
+            self.unit = min(int(tags.get(278, img.size[1])), img.size[1])
+
+    @staticmethod
+    def supports(img) -> bool:
+        tags = img.tag_v2
+        # Plans séparés (PlanarConfiguration = 2) : non pris en charge
+        if tags.get(284, 1) != 1 or not (273 in tags or 324 in tags):
+            return False
+        # Lignes décodées d'un bloc : hauteur d'une strip ou d'une rangée de tuiles
+        unit = int(tags[323]) if 324 in tags else min(int(tags.get(278, img.size[1])), img.size[1])
+        return unit * img.size[0] * 4 <= UNIT_BYTES
+
+    def bands(self, rows: int):
+        from PIL import Image
+        width, height = self.size
+        # Bandes faites de strips (ou rangées de tuiles) entiers
+        units = max(1, rows // self.unit)
+        per_row = math.ceil(width / self.tile_size[0]) if self.tiled else 1
+        with open(self.path, "rb") as f:
+            for y0 in range(0, height, units * self.unit):
+                count = min(units * self.unit, height - y0)
+                first = (y0 // self.unit) * per_row
+                last = first + math.ceil(count / self.unit) * per_row
+                chunks = []
+                for offset, length in zip(self.offsets[first:last], self.counts[first:last]):
+                    f.seek(offset)
+                    chunks.append(f.read(length))
+                with stage("decode"):
+                    band = Image.open(io.BytesIO(self._band_file(width, count, chunks)))
+                    band.load()
+                yield y0, band
+
+    def _band_file(self, width: int, height: int, chunks: List[bytes]) -> bytes:
+        """TIFF en mémoire : l'en-tête d'origine, ces strips / tuiles seulement"""
+        if self.tiled:
+            layout = [(322, 4, self.tile_size[0]), (323, 4, self.tile_size[1]), (324, 4, None), (325, 4, None)]
+        else:
+            layout = [(273, 4, None), (278, 4, self.unit), (279, 4, None)]
+        entries = self.tags + [(256, 4, width), (257, 4, height)] + layout
+        offset_tag, count_tag = (324, 325) if self.tiled else (273, 279)
+        counts = tuple(len(c) for c in chunks)
+        # Premier passage pour la taille de l'en-tête, puis positions réelles des données
+        placeholder = [(t, k, tuple(0 for _ in chunks) if t == offset_tag else counts if t == count_tag else v)
+                       for t, k, v in entries]
+        start = 8 + len(_tiff_ifd(placeholder, 8))
+        offsets, position = [], start
+        for chunk in chunks:
+            offsets.append(position)
+            position += len(chunk)
+        final = [(t, k, tuple(offsets) if t == offset_tag else counts if t == count_tag else v)
+                 for t, k, v in entries]
+        return b"".join([b"II*\0", struct.pack("<I", 8), _tiff_ifd(final, 8)] + chunks)
+
+
+def _tiff_ifd(entries, offset: int, next_ifd: int = 0) -> bytes:
+    """IFD TIFF little-endian placé à offset, suivi des valeurs trop longues pour une entrée"""
+    entries = sorted(entries, key=lambda e: e[0])
+    extra_at = offset + 2 + 12 * len(entries) + 4
+    table, extra = [struct.pack("<H", len(entries))], []
+    for tag, kind, value in entries:
+        if isinstance(value, (bytes, bytearray)):
+            kind = 7 if kind not in (1, 7) else kind
+            data = bytes(value)
+            count = len(data)
+        else:
+            values = _as_tuple(value)
+            count = len(values)
+            data = struct.pack(f"<{count}{_TIFF_TYPES[kind]}", *values)
+        if len(data) <= 4:
+            table.append(struct.pack("<HHI", tag, kind, count) + data.ljust(4, b"\0"))
+        else:
+            position = extra_at + sum(len(e) for e in extra)
+            table.append(struct.pack("<HHII", tag, kind, count, position))
+            # Valeurs alignées sur un mot
+            extra.append(data + b"\0" * (len(data) % 2))
+    table.append(struct.pack("<I", next_ifd))
+    return b"".join(table + extra)
+
+
+def _open_reader(input_path: str):
+    img = _open_header(input_path)
+    try:
+        if Path(input_path).suffix.lower() == ".png":
+            if _PngReader.supports(img):
+                return _PngReader(input_path, img)
+            raise ValueError("PNG entrelacé ou en 16 bits : lecture par bandes impossible")
+        if _TiffReader.supports(img):
+            return _TiffReader(input_path, img)
+        raise ValueError("TIFF à plans séparés ou d'une seule strip : lecture par bandes impossible")
+    finally:
+        img.close()
+
+
+class _RowWindow:
+    """Lignes source demandées dans l'ordre, lues bande par bande
+
+    Ne garde que les lignes encore utiles : mémoire bornée par la plus
+    grande demande plus une bande.
+    """
+
+    def __init__(self, bands, mode: str):
+        self.bands = bands
+        self.mode = mode
+        self.buffer = None
+        self.top = self.bottom = 0
+
+    def rows(self, start: int, end: int):
+        from PIL import Image
+        while self.bottom < end:
+            y0, band = next(self.bands)
+            band = _working_mode(band, self.mode)
+            if self.buffer is None or self.bottom <= start:
+                self.buffer, self.top = band, y0
+            else:
+                # Lignes encore utiles + nouvelle bande
+                keep = self.buffer.crop((0, start - self.top, band.width, self.bottom - self.top))
+                merged = Image.new(self.mode, (band.width, keep.height + band.height))
+                merged.paste(keep, (0, 0))
+                merged.paste(band, (0, keep.height))
+                self.buffer, self.top = merged, start
+            self.bottom = y0 + band.height
+        return self.buffer.crop((0, start - self.top, self.buffer.width, end - self.top))
+
+
+def _working_mode(band, mode: str):
+    if band.mode != mode:
+        with stage("convert"):
+            band = band.convert(mode)
+    return band
+
+
+def _source_mode(reader) -> str:
+    """Mode de travail : celui de la source, palette et 1 bit dépliés, RGB sinon (CMYK, 16 bits...)"""
+    if reader.mode == "P":
+        return "RGBA" if reader.transparency is not None else "RGB"
+    if reader.mode == "1":
+        return "L"
+    if reader.mode in ("L", "LA", "RGB", "RGBA"):
+        return reader.mode
+    return "RGB"
+
+
+def _target_mode(mode: str, fmt: str) -> str:
+    # Comme prepare_image : JPEG sans transparence, aplati sur le fond
+    if fmt in ["jpg", "jpeg"]:
+        return {"RGBA": "RGB", "LA": "RGB"}.get(mode, mode)
+    return mode
+
+
+# === ÉCRITURE ===
+
+def _left_delta(band):
+    """Différence avec le pixel de gauche, octet par octet (filtre Sub PNG, prédicteur TIFF 2)"""
+    from PIL import Image, ImageChops
+    shifted = Image.new(band.mode, band.size)
+    shifted.paste(band.crop((0, 0, band.width - 1, band.height)), (1, 0))
+    return ImageChops.subtract_modulo(band, shifted)
+
+
+class _PngWriter:
+    """PNG écrit bande par bande (filtre Sub, un seul flux zlib)"""
+
+    _COLOR_TYPES = {"L": 0, "RGB": 2, "LA": 4, "RGBA": 6}
+
+    def __init__(self, output: Path, size: Tuple[int, int], mode: str):
+        self.f = open(output, "wb")
+        self.stride = size[0] * len(mode)
+        self.compressor = zlib.compressobj(6)
+        self.f.write(b"\x89PNG\r\n\x1a\n")
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", size[0], size[1], 8, self._COLOR_TYPES[mode], 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes):
+        if kind == b"IDAT" and not data:
+            return
+        self.f.write(struct.pack(">I", len(data)) + kind + data)
+        self.f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def write(self, band):
+        raw = _left_delta(band).tobytes()
+        # Octet de filtre (1 = Sub) en tête de chaque ligne
+        lines = b"".join(b"\1" + raw[i:i + self.stride] for i in range(0, len(raw), self.stride))
+        self._chunk(b"IDAT", self.compressor.compress(lines))
+
+    def close(self):
+        self._chunk(b"IDAT", self.compressor.flush())
+        self._chunk(b"IEND", b"")
+        self.f.close()
+
+
+class _TiffWriter:
+    """TIFF écrit bande par bande : une strip Deflate (prédicteur horizontal) par bande"""
+
+    _PHOTOMETRIC = {"L": 1, "LA": 1, "RGB": 2, "RGBA": 2}
+
+    def __init__(self, output: Path, size: Tuple[int, int], mode: str, rows: int):
+        self.f = open(output, "wb")
+        self.size = size
+        self.mode = mode
+        self.rows = rows
+        self.offsets: List[int] = []
+        self.counts: List[int] = []
+        # Position de l'IFD inscrite à la fin
+        self.f.write(b"II*\0" + struct.pack("<I", 0))
+
+    def write(self, band):
+        data = zlib.compress(_left_delta(band).tobytes(), 6)
+        position = self.f.tell()
+        if position + len(data) >= 2 ** 32:
+            raise OSError("TIFF de plus de 4 Go : réduire la taille ou choisir le PNG")
+        self.offsets.append(position)
+        self.counts.append(len(data))
+        self.f.write(data)
+
+    def close(self):
+        samples = len(self.mode)
+        entries = [
+            (256, 4, self.size[0]), (257, 4, self.size[1]), (258, 3, (8,) * samples),
+            (259, 3, 8), (262, 3, self._PHOTOMETRIC[self.mode]), (273, 4, tuple(self.offsets)),
+            (277, 3, samples), (278, 4, self.rows), (279, 4, tuple(self.counts)),
+            (284, 3, 1), (317, 3, 2),
+        ]
+        if self.mode in ("LA", "RGBA"):
+            entries.append((338, 3, 2))  # alpha non prémultiplié
+        position = self.f.tell() + self.f.tell() % 2
+        self.f.write(b"\0" * (position - self.f.tell()))
+        self.f.write(_tiff_ifd(entries, position))
+        self.f.seek(4)
+        self.f.write(struct.pack("<I", position))
+        self.f.close()
+
+
+class _Assembler:
+    """Sortie assemblée en mémoire (taille de sortie seulement) puis enregistrée par Pillow"""
+
+    def __init__(self, output: Path, size: Tuple[int, int], mode: str, fmt: str, opts: ConversionOptions):
+        from PIL import Image
+        self.output, self.fmt, self.opts = output, fmt, opts
+        self.image = Image.new(mode, size)
+        self.y = 0
+
+    def write(self, band):
+        self.image.paste(band, (0, self.y))
+        self.y += band.height
+
+    def close(self):
+        with stage("save", self.output):
+            save_image(self.image, str(self.output), self.fmt, self.opts)
+
+
+# === CONVERSION ===
+
+def convert_tiled(input_path: str, fmt: str, opts: ConversionOptions, output: Path,
+                  on_progress: Optional[ProgressCallback] = None,
+                  cancel_event: Optional[threading.Event] = None) -> Path:
+    """Convertir une image géante bande par bande ; renvoie la sortie
+
+    La sortie est écrite au fil des bandes en PNG / TIFF au-delà de
+    opts.tiled_threshold pixels ; en deçà (ou en JPEG), elle est assemblée
+    puis enregistrée comme d'habitude.
+    """
+    from PIL import Image
+    load_pillow_plugins(fmt)
+    output = Path(output)
+    with stage("open", Path(input_path)):
+        reader = _open_reader(input_path)
+    width, height = reader.size
+    out_width, out_height = image_target_size(fmt, opts) or (width, height)
+
+    source_mode = _source_mode(reader)
+    mode = _target_mode(source_mode, fmt)
+    scale = height / out_height
+    # Bandes de sortie : leurs lignes source tiennent dans BAND_BYTES
+    source_rows = max(1, BAND_BYTES // (width * 4))
+    rows = max(1, min(int(source_rows / scale), BAND_BYTES // (out_width * 4)))
+    # Boîte en réduction, bicubique (et marge de lignes) en agrandissement
+    downscale = out_width <= width and out_height <= height
+    resample = Image.Resampling.BOX if downscale else Image.Resampling.BICUBIC
+    margin = 1 if downscale else 3
+
+    if fmt in ["png", "tiff"] and out_width * out_height > opts.tiled_threshold:
+        writer = _PngWriter(output, (out_width, out_height), mode) if fmt == "png" else \
+            _TiffWriter(output, (out_width, out_height), mode, rows)
+    else:
+        writer = _Assembler(output, (out_width, out_height), mode, fmt, opts)
+
+    window = _RowWindow(reader.bands(min(source_rows, height)), source_mode)
+    try:
+        for y0 in range(0, out_height, rows):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Conversion annulée")
+            y1 = min(out_height, y0 + rows)
+            if (out_width, out_height) == (width, height):
+                band = window.rows(y0, y1)
+            else:
+                top, bottom = y0 * scale, y1 * scale
+                start = max(0, math.floor(top) - margin)
+                end = min(height, math.ceil(bottom) + margin)
+                source = window.rows(start, end)
+                with stage("resize"):
+                    band = source.resize((out_width, y1 - y0), resample,
+                                         box=(0, top - start, width, bottom - start))
+            if band.mode != mode:
+                with stage("convert"):
+                    band = flatten_image(band, tuple(opts.background)) if band.mode in ("RGBA", "LA") \
+                        else band.convert(mode)
+            with stage("encode"):
+                writer.write(band)
+            if on_progress:
+                on_progress(y1 / out_height, None, None)
+        writer.close()
+    except BaseException:
+        if not isinstance(writer, _Assembler):
+            writer.f.close()
+        if output.is_file():
+            output.unlink()
+        raise
+    return output
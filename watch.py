@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Format Converter - Dossiers surveillés
+Conversion incrémentale des fichiers nouveaux ou modifiés (inotify ou scrutation)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from cache import CACHE_DIR, CACHE_MAX_BYTES, get_cache, options_fingerprint
+from converter import ConversionOptions, ConversionScheduler
+
+MANIFEST_DB = Path.home() / ".format_converter_watch.db"
+
+# Fichiers en cours de téléchargement / d'écriture à ignorer
+TEMP_SUFFIXES = (".part", ".crdownload", ".download", ".tmp", ".swp")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processed (
+    path TEXT NOT NULL,
+    format TEXT NOT NULL,
+    options TEXT NOT NULL,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    output TEXT,
+    success INTEGER NOT NULL,
+    PRIMARY KEY (path, format, options)
+);
+"""
+
+
+class WatchManifest:
+    """Fichiers déjà traités, conservés d'un lancement à l'autre"""
+
+    def __init__(self, path: Path = MANIFEST_DB):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def lookup(self, path: str, fmt: str, options: str) -> Optional[Tuple[int, int, Optional[str]]]:
+        """(mtime, taille, sortie) du dernier traitement, ou None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT mtime, size, output FROM processed WHERE path = ? AND format = ? AND options = ?",
+                (path, fmt, options)
+            ).fetchone()
+
+    def record(self, path: str, fmt: str, options: str, mtime: int, size: int,
+               output: Optional[str], success: bool):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO processed (path, format, options, mtime, size, output, success) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, fmt, options, mtime, size, output, 1 if success else 0)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Inotify:
+    """Accès minimal à inotify (Linux) via ctypes"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs: Dict[int, str] = {}
+
+    def add(self, directory: str):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def read(self, timeout: float) -> List[Tuple[str, bool]]:
+        """Chemins touchés (chemin, est un dossier) depuis le dernier appel"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory and name:
+                events.append((os.path.join(directory, os.fsdecode(name)), bool(mask & self.IN_ISDIR)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Surveille des dossiers et convertit ce qui y arrive
+
+    Un fichier n'est converti qu'une fois stable (taille et date
+    inchangées pendant `settle` secondes). Les conversions passent par
+    ConversionScheduler, par lots.
+    """
+
+    def __init__(self, directories: Iterable[str], fmt: str, opts: ConversionOptions, output_folder: Path,
+                 workers: Optional[int] = None, recursive: bool = True, settle: float = 2.0,
+                 poll_interval: float = 2.0, use_cache: bool = True, cache_link: bool = False,
+                 manifest: Optional[WatchManifest] = None,
+                 on_progress: Optional[Callable[[int, str, Optional[str], Optional[BaseException]], None]] = None):
+        self.directories = [os.path.abspath(os.path.expanduser(d)) for d in directories]
+        self.fmt = fmt
+        self.opts = opts
+        self.output_folder = Path(output_folder)
+        self.workers = workers
+        self.recursive = recursive
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_cache = use_cache
+        self.cache_link = cache_link
+        self.manifest = manifest or WatchManifest()
+        self.on_progress = on_progress
+        self.fingerprint = options_fingerprint(opts)
+        self.stop_event = threading.Event()
+
+        # Fichiers vus mais pas encore stables : chemin → (taille, date, vu stable depuis)
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+
+    # === DÉTECTION ===
+
+    def _ignored(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith((".", "~")) or name.lower().endswith(TEMP_SUFFIXES):
+            return True
+        # Ne jamais reconvertir nos propres sorties
+        output = str(self.output_folder.resolve())
+        return os.path.abspath(path).startswith(output + os.sep)
+
+    def _scan(self, directory: str) -> Iterable[Tuple[str, os.stat_result]]:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive and not entry.name.startswith("."):
+                        yield from self._scan(entry.path)
+                elif entry.is_file() and not self._ignored(entry.path):
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue
+
+    def _poll(self) -> Set[str]:
+        """Mode scrutation : comparer l'arborescence au relevé précédent"""
+        snapshot = {}
+        changed = set()
+        for directory in self.directories:
+            for path, st in self._scan(directory):
+                snapshot[path] = (st.st_size, st.st_mtime_ns)
+                if self._snapshot.get(path) != snapshot[path]:
+                    changed.add(path)
+        self._snapshot = snapshot
+        return changed
+
+    def _touch(self, paths: Iterable[str]):
+        for path in paths:
+            if not self._ignored(path) and path not in self._candidates:
+                self._candidates[path] = (-1, -1, time.monotonic())
+
+    def _ready(self) -> List[str]:
+        """Candidats stables depuis `settle` secondes et pas encore traités"""
+        now = time.monotonic()
+        ready = []
+        for path, (size, mtime, since) in list(self._candidates.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self._candidates[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                # Encore en cours d'écriture : on repart de zéro
+                self._candidates[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.settle:
+                del self._candidates[path]
+                done = self.manifest.lookup(path, self.fmt, self.fingerprint)
+                if done is None or (done[0], done[1]) != (st.st_mtime_ns, st.st_size):
+                    ready.append(path)
+        return ready
+
+    # === CONVERSION ===
+
+    def _convert(self, paths: List[str]):
+        stats = {}
+        previous: Dict[str, str] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+            last = self.manifest.lookup(path, self.fmt, self.fingerprint)
+            if last and last[2]:
+                previous[path] = last[2]
+
+        def on_progress(done: int, filepath: str, output: Optional[str], error: Optional[BaseException]):
+            # Fichier modifié : la nouvelle sortie remplace celle de la fois
+            # précédente (et prend son nom) seulement une fois la conversion réussie
+            old = previous.get(filepath)
+            if error is None and output and old and old != output and os.path.isfile(old) \
+                    and os.path.isfile(output):
+                try:
+                    os.replace(output, old)
+                except OSError:
+                    pass
+                else:
+                    # Le cache doit suivre le renommage, sinon son prochain
+                    # succès viserait un fichier qui n'existe plus
+                    if self.use_cache:
+                        try:
+                            get_cache(CACHE_DIR, CACHE_MAX_BYTES, self.cache_link).moved(Path(output), Path(old))
+                        except (OSError, sqlite3.Error):
+                            pass
+                    output = old
+            mtime, size = stats[filepath]
+            self.manifest.record(filepath, self.fmt, self.fingerprint, mtime, size, output, error is None)
+            if self.on_progress:
+                self.on_progress(done, filepath, output, error)
+
+        scheduler = ConversionScheduler(self.output_folder, workers=self.workers,
+                                        use_cache=self.use_cache, cache_link=self.cache_link)
+        scheduler.run(list(stats), self.fmt, self.opts, on_progress=on_progress,
+                      is_cancelled=self.stop_event.is_set)
+
+    def run(self):
+        """Boucle de surveillance (jusqu'à stop())"""
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+
+        inotify = None
+        if sys.platform.startswith("linux"):
+            try:
+                inotify = _Inotify()
+            except (OSError, AttributeError):
+                inotify = None
+
+        # Relevé initial : le manifeste évite de refaire ce qui l'a déjà été
+        if inotify is not None:
+            for directory in self.directories:
+                inotify.add(directory)
+                if self.recursive:
+                    for root, dirs, _ in os.walk(directory):
+                        dirs[:] = [d for d in dirs if not d.startswith(".")]
+                        for d in dirs:
+                            inotify.add(os.path.join(root, d))
+            self._touch(path for d in self.directories for path, _ in self._scan(d))
+        else:
+            self._touch(self._poll())
+
+        try:
+            while not self.stop_event.is_set():
+                if inotify is not None:
+                    # Réveil régulier pour vérifier la stabilité des candidats
+                    for path, is_dir in inotify.read(min(self.settle, 1.0)):
+                        if is_dir and self.recursive:
+                            inotify.add(path)
+                            self._touch(p for p, _ in self._scan(path))
+                        elif not is_dir:
+                            self._touch([path])
+                else:
+                    self.stop_event.wait(self.poll_interval)
+                    self._touch(self._poll())
+
+                ready = self._ready()
+                if ready:
+                    self._convert(ready)
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def stop(self):
+        self.stop_event.set()